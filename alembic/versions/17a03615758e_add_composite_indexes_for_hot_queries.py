@@ -0,0 +1,80 @@
+"""add_composite_indexes_for_hot_queries
+
+Revision ID: 17a03615758e
+Revises: 8ca4d5c039b7
+Create Date: 2026-10-16 10:12:41.518203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '17a03615758e'
+down_revision: Union[str, Sequence[str], None] = '8ca4d5c039b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# 去重时删掉的年轮记录备份在这里
+BACKUP_TABLE = 'memory_snapshots_dedup_backup'
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 照片墙：WHERE owner_id = ? ORDER BY taken_date DESC, created_at DESC
+    op.create_index(
+        'ix_couple_photos_owner_taken_created',
+        'couple_photos',
+        ['owner_id', sa.text('taken_date DESC'), sa.text('created_at DESC')],
+        unique=False,
+        if_not_exists=True,
+    )
+
+    # 唯一索引之前先清理重复的年轮记录（同一纪念日同一年只保留最新一条）；
+    # 删掉的行先整行复制到备份表，downgrade 时再放回去，不直接丢用户数据
+    duplicates = """
+        SELECT * FROM memory_snapshots
+        WHERE id NOT IN (
+            SELECT max_id FROM (
+                SELECT MAX(id) AS max_id
+                FROM memory_snapshots
+                GROUP BY memory_day_id, year
+            ) AS keep
+        )
+    """
+    op.execute(f"CREATE TABLE {BACKUP_TABLE} AS {duplicates}")
+    removed = [row[0] for row in op.get_bind().execute(sa.text(f"SELECT id FROM {BACKUP_TABLE} ORDER BY id"))]
+    if removed:
+        print(f"⚠️ memory_snapshots 有 {len(removed)} 条重复记录，已备份到 {BACKUP_TABLE} 后删除: {removed}")
+        op.execute(f"DELETE FROM memory_snapshots WHERE id IN (SELECT id FROM {BACKUP_TABLE})")
+    op.create_index(
+        'uq_memory_snapshots_memory_day_id_year',
+        'memory_snapshots',
+        ['memory_day_id', 'year'],
+        unique=True,
+        if_not_exists=True,
+    )
+
+    op.create_index('ix_memory_days_owner_id_type', 'memory_days', ['owner_id', 'type'],
+                    unique=False, if_not_exists=True)
+    op.create_index('ix_album_comments_photo_id', 'album_comments', ['photo_id'],
+                    unique=False, if_not_exists=True)
+    op.create_index('ix_moments_created_at', 'moments', ['created_at'],
+                    unique=False, if_not_exists=True)
+    op.create_index('ix_album_photos_shoot_date', 'album_photos', ['shoot_date'],
+                    unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_album_photos_shoot_date', table_name='album_photos', if_exists=True)
+    op.drop_index('ix_moments_created_at', table_name='moments', if_exists=True)
+    op.drop_index('ix_album_comments_photo_id', table_name='album_comments', if_exists=True)
+    op.drop_index('ix_memory_days_owner_id_type', table_name='memory_days', if_exists=True)
+    op.drop_index('uq_memory_snapshots_memory_day_id_year', table_name='memory_snapshots', if_exists=True)
+    # 放回 upgrade 时去重删掉的记录
+    op.execute(f"INSERT INTO memory_snapshots SELECT * FROM {BACKUP_TABLE}")
+    op.drop_table(BACKUP_TABLE)
+    op.drop_index('ix_couple_photos_owner_taken_created', table_name='couple_photos', if_exists=True)
@@ -0,0 +1,45 @@
+"""add_pending_deletions_table
+
+Revision ID: 4f6b2d8a1c39
+Revises: e71b0d94a6c5
+Create Date: 2026-10-17 15:06:41.218304
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f6b2d8a1c39'
+down_revision: Union[str, Sequence[str], None] = 'e71b0d94a6c5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 远端图片的后台删除队列（app/service/deletion_service.py）
+    op.create_table(
+        'pending_deletions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('backend', sa.String(length=20), nullable=False),
+        sa.Column('public_id', sa.String(length=255), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+    op.create_index(
+        'ix_pending_deletions_next_attempt_at', 'pending_deletions', ['next_attempt_at'],
+        unique=False, if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_pending_deletions_next_attempt_at', table_name='pending_deletions', if_exists=True)
+    op.drop_table('pending_deletions', if_exists=True)
@@ -0,0 +1,36 @@
+"""add_schema_meta_table
+
+Revision ID: 5b2e9c7d41f0
+Revises: 17a03615758e
+Create Date: 2026-10-17 09:20:14.103527
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b2e9c7d41f0'
+down_revision: Union[str, Sequence[str], None] = '17a03615758e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 启动时的表结构指纹（app/db_schema.py）
+    op.create_table(
+        'schema_meta',
+        sa.Column('key', sa.String(length=50), nullable=False),
+        sa.Column('value', sa.String(length=255), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('key'),
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('schema_meta', if_exists=True)
@@ -0,0 +1,34 @@
+"""add_memory_days_next_anniversary_date
+
+Revision ID: 9d4f1a6c2e73
+Revises: 5b2e9c7d41f0
+Create Date: 2026-10-17 10:05:41.512208
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d4f1a6c2e73'
+down_revision: Union[str, Sequence[str], None] = '5b2e9c7d41f0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 老数据为空，应用启动时的滚动任务会补上
+    op.add_column('memory_days', sa.Column('next_anniversary_date', sa.Date(), nullable=True))
+    op.create_index(
+        'ix_memory_days_owner_next_anniversary', 'memory_days',
+        ['owner_id', 'next_anniversary_date'], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_memory_days_owner_next_anniversary', table_name='memory_days')
+    op.drop_column('memory_days', 'next_anniversary_date')
@@ -0,0 +1,33 @@
+"""add_image_variants_to_photos
+
+Revision ID: b58e3f1d7a20
+Revises: 4f6b2d8a1c39
+Create Date: 2026-10-17 16:21:09.537120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b58e3f1d7a20'
+down_revision: Union[str, Sequence[str], None] = '4f6b2d8a1c39'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 上传时写入；老数据为空，接口返回时按 public_id 现算（app/service/storage.py 的 image_variants）
+    op.add_column('moments', sa.Column('image_variants', sa.JSON(), nullable=True))
+    op.add_column('album_photos', sa.Column('image_variants', sa.JSON(), nullable=True))
+    op.add_column('couple_photos', sa.Column('image_variants', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('couple_photos', 'image_variants')
+    op.drop_column('album_photos', 'image_variants')
+    op.drop_column('moments', 'image_variants')
@@ -0,0 +1,40 @@
+"""add_couple_photo_stats_table
+
+Revision ID: c3a8e5f2b917
+Revises: 9d4f1a6c2e73
+Create Date: 2026-10-17 11:32:08.774613
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3a8e5f2b917'
+down_revision: Union[str, Sequence[str], None] = '9d4f1a6c2e73'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 数据在应用启动时按 couple_photos 生成（app/service/couple_stats_service.py）
+    op.create_table(
+        'couple_photo_stats',
+        sa.Column('owner_id', sa.Integer(), nullable=False),
+        sa.Column('year', sa.Integer(), nullable=False),
+        sa.Column('photo_count', sa.Integer(), nullable=False),
+        sa.Column('favorite_count', sa.Integer(), nullable=False),
+        sa.Column('earliest_date', sa.Date(), nullable=True),
+        sa.Column('latest_date', sa.Date(), nullable=True),
+        sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('owner_id', 'year'),
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('couple_photo_stats', if_exists=True)
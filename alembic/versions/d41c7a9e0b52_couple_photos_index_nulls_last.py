@@ -0,0 +1,47 @@
+"""couple_photos_index_nulls_last
+
+Revision ID: d41c7a9e0b52
+Revises: b58e3f1d7a20
+Create Date: 2026-10-17 18:05:47.201934
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41c7a9e0b52'
+down_revision: Union[str, Sequence[str], None] = 'b58e3f1d7a20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 照片墙改成 ORDER BY taken_date DESC NULLS LAST, created_at DESC NULLS LAST，
+    # Postgres 的 DESC 索引默认空值在前，重建成一致的顺序才能走索引；
+    # SQLite 里空值本来就最小，DESC 索引已经是空值在后（它也不支持在索引里写 NULLS LAST）
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.drop_index('ix_couple_photos_owner_taken_created', table_name='couple_photos', if_exists=True)
+    op.create_index(
+        'ix_couple_photos_owner_taken_created',
+        'couple_photos',
+        ['owner_id', sa.text('taken_date DESC NULLS LAST'), sa.text('created_at DESC NULLS LAST')],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.drop_index('ix_couple_photos_owner_taken_created', table_name='couple_photos', if_exists=True)
+    op.create_index(
+        'ix_couple_photos_owner_taken_created',
+        'couple_photos',
+        ['owner_id', sa.text('taken_date DESC'), sa.text('created_at DESC')],
+        unique=False,
+    )
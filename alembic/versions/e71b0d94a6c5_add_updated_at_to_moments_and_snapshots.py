@@ -0,0 +1,31 @@
+"""add_updated_at_to_moments_and_snapshots
+
+Revision ID: e71b0d94a6c5
+Revises: c3a8e5f2b917
+Create Date: 2026-10-17 13:02:56.408311
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e71b0d94a6c5'
+down_revision: Union[str, Sequence[str], None] = 'c3a8e5f2b917'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 列表接口的 ETag 用 max(updated_at)；老数据为空时按 created_at 算
+    op.add_column('moments', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.add_column('memory_snapshots', sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('memory_snapshots', 'updated_at')
+    op.drop_column('moments', 'updated_at')
@@ -4,18 +4,22 @@ import time
 
 import os
 
-from fastapi import APIRouter, Request, Depends,Form,UploadFile,File
-from sqlalchemy import text
+from fastapi import APIRouter, Request, Depends,Form,UploadFile,File,Query
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.responses import RedirectResponse, HTMLResponse, JSONResponse
 from datetime import datetime
 
-from app.db import get_db
+from app.db import get_db, get_async_db, get_async_read_db
 from app.models import AlbumPhoto, AlbumComment
-from fastapi.templating import Jinja2Templates
-from collections import defaultdict
+from app.core.templates import templates
 
 from app.service.image_service import CloudinaryService
+from app.service.deletion_service import enqueue_deletion
+from app.service.album_service import (
+    MONTHS_PER_PAGE, PHOTOS_PER_MONTH,
+    parse_month, get_album_months, get_album_summary, get_month_items, comment_to_dict
+)
 
 # 获取项目根目录
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -26,7 +30,6 @@ ALLOWED_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp', '.bmp'}
 ALLOWED_MIME_TYPES = ['image/jpeg', 'image/png', 'image/gif', 'image/webp', 'image/bmp']
 
 router = APIRouter(prefix="/album", tags=["Album"])
-templates = Jinja2Templates(directory="app/templates")
 
 @router.get("")
 def album_home(request: Request):
@@ -41,87 +44,102 @@ def album_home(request: Request):
 
 
 @router.get("/timeline", response_class=HTMLResponse)
-def album_timeline(request: Request, db: Session = Depends(get_db)):
+async def album_timeline(request: Request, db: AsyncSession = Depends(get_async_read_db)):
     user = request.session.get("username")
     if not user:
         return RedirectResponse("/login")
 
-    # 查询照片和评论
-    try:
-        photos = db.query(AlbumPhoto).order_by(AlbumPhoto.shoot_date.desc()).all()
-    except Exception as e:
-        # 回滚并使用备用查询
-        print(f"⚠️ 查询失败，回滚事务并使用备用查询: {e}")
-        db.rollback()
+    # 月份列表来自一次分组查询，只渲染最近几个月的第一页，其余月份由页面按需加载
+    months = await get_album_months(db)
+    summary = await get_album_summary(db)
 
-        query = text("""
-            SELECT id, "user", memory, location, shoot_date, image, created_at
-            FROM album_photos 
-            ORDER BY shoot_date DESC
-        """)
-        result = db.execute(query)
-        photos = []
-        for row in result:
-            photos.append({
-                "id": row.id,
-                "user": row.user,
-                "memory": row.memory,
-                "location": row.location,
-                "shoot_date": row.shoot_date,
-                "image": row.image,
-                "image_url": row.image,  # 映射
-                "created_at": row.created_at
-            })
-    comments = db.query(AlbumComment).all()
-
-    # 构建评论映射
-    comment_map = defaultdict(list)
-    for c in comments:
-        comment_map[c.photo_id].append(c)
-
-    # 封装照片数据
-    view_photos = []
-    for p in photos:
-        # 使用Cloudinary的图片URL
-        image_url = p.image_url
-        # 如果需要缩略图，可以这样：
-        # thumbnail_url = CloudinaryService.get_image_url(p.cloudinary_public_id, width=300, height=300)
-
-        view_photos.append({
-            "id": p.id,
-            "user": p.user,
-            "image": image_url,
-            "shoot_date": p.shoot_date,
-            "memory": p.memory,
-            "location": p.location,
-            "public_id": p.cloudinary_public_id,  # 用于删除操作
-            "format": p.format,
-            "created_at": p.created_at
-        })
-
-    # 年月分组
-    timeline = defaultdict(list)
-    for p in view_photos:
-        key = p["shoot_date"].strftime("%Y-%m")
-        timeline[key].append({
-            "photo": p,
-            "comments": comment_map.get(p["id"], [])
-        })
-
-    sorted_timeline = dict(sorted(timeline.items(), key=lambda x: x[0], reverse=True))
+    timeline = []
+    for bucket in months[:MONTHS_PER_PAGE]:
+        year, month = parse_month(bucket["month"])
+        items, has_more = await get_month_items(db, year, month)
+        timeline.append({"month": bucket["month"], "items": items, "has_more": has_more})
 
     return templates.TemplateResponse(
         "album_timeline.html",
         {
             "request": request,
-            "timeline": sorted_timeline,
+            "timeline": timeline,
+            "more_months": [bucket["month"] for bucket in months[MONTHS_PER_PAGE:]],
+            "months_per_page": MONTHS_PER_PAGE,
             "current_user": user,
-            "photos_count": len(photos),
-            "users_count": len(set(p["user"] for p in view_photos)) if photos else 0
+            "photos_count": summary["photos_count"],
+            "users_count": summary["users_count"]
         }
     )
 
 
+@router.get("/timeline/months")
+async def album_timeline_months(request: Request, db: AsyncSession = Depends(get_async_read_db)):
+    """时光轴的月份列表及每月照片数"""
+    user = request.session.get("username")
+    if not user:
+        return JSONResponse(status_code=401, content={"error": "未登录"})
+
+    months = await get_album_months(db)
+    summary = await get_album_summary(db)
+    return {"months": months, **summary}
+
+
+@router.get("/timeline/month/{month}")
+async def album_timeline_month(
+        request: Request,
+        month: str,
+        page: int = Query(1, ge=1),
+        per_page: int = Query(PHOTOS_PER_MONTH, ge=1, le=100),
+        fragment: bool = False,
+        db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    某个月的一页照片及其评论
+    fragment=true 时返回渲染好的 HTML 片段，给时光轴页面“加载更多”用
+    """
+    user = request.session.get("username")
+    if not user:
+        return JSONResponse(status_code=401, content={"error": "未登录"})
+
+    try:
+        year, mon = parse_month(month)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+
+    items, has_more = await get_month_items(db, year, mon, page, per_page)
+
+    if fragment:
+        return templates.TemplateResponse(
+            "album_timeline_month.html",
+            {
+                "request": request,
+                "month": f"{year:04d}-{mon:02d}",
+                "items": items,
+                "page": page,
+                "offset": (page - 1) * per_page,
+                "has_more": has_more,
+                "current_user": user
+            }
+        )
+
+    photos = []
+    for item in items:
+        photo = dict(item["photo"])
+        photo["shoot_date"] = photo["shoot_date"].isoformat() if photo["shoot_date"] else None
+        photo["created_at"] = photo["created_at"].isoformat() if photo["created_at"] else None
+        photo["comments"] = [comment_to_dict(c) for c in item["comments"]]
+        photos.append(photo)
+
+    return {
+        "month": f"{year:04d}-{mon:02d}",
+        "page": page,
+        "per_page": per_page,
+        "has_more": has_more,
+        "photos": photos
+    }
+
+
 # ✅ 1. GET 方法：显示上传表单
 @router.get("/timeline/upload", response_class=HTMLResponse)
 async def show_upload_form(request: Request):
@@ -146,7 +164,7 @@ async def upload_album_photo(
         location: str = Form(""),
         shoot_date: str = Form(...),
         image: UploadFile = File(...),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
     """上传照片到Cloudinary"""
     user = request.session.get("username")
@@ -200,12 +218,13 @@ async def upload_album_photo(
             shoot_date=parsed_date,
             cloudinary_public_id=upload_result.get("public_id"),
             image_url=upload_result.get("url"),
-            format=upload_result.get("format")
+            format=upload_result.get("format"),
+            image_variants=upload_result.get("variants")
         )
 
         db.add(photo)
-        db.commit()
-        db.refresh(photo)
+        await db.commit()
+        await db.refresh(photo)
 
         print(f"✅ 数据库记录创建成功 - ID: {photo.id}")
 
@@ -218,7 +237,8 @@ async def upload_album_photo(
             "location": photo.location,
             "shoot_date": photo.shoot_date.isoformat() if photo.shoot_date else None,
             "public_id": photo.cloudinary_public_id,
-            "format": photo.format
+            "format": photo.format,
+            "variants": photo.image_variants
         }
 
         if request.headers.get("x-requested-with") == "XMLHttpRequest":
@@ -231,7 +251,7 @@ async def upload_album_photo(
             return RedirectResponse("/album/timeline", status_code=303)
 
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(f"❌ 上传失败: {str(e)}")
         import traceback
         traceback.print_exc()
@@ -251,12 +271,12 @@ async def upload_album_photo(
 
 
 @router.delete("/photo/{photo_id}")
-async def delete_album_photo(
+def delete_album_photo(
         request: Request,
         photo_id: int,
         db: Session = Depends(get_db)
 ):
-    """删除照片（同时删除Cloudinary上的文件）"""
+    """删除照片（Cloudinary 上的文件由后台删除队列删除）"""
     user = request.session.get("username")
     if not user:
         return JSONResponse(status_code=401, content={"error": "未登录"})
@@ -271,12 +291,8 @@ async def delete_album_photo(
         if not photo:
             return JSONResponse(status_code=404, content={"error": "照片不存在或无权删除"})
 
-        # 从Cloudinary删除图片
-        if photo.cloudinary_public_id:
-            delete_result = CloudinaryService.delete_image(photo.cloudinary_public_id)
-            if not delete_result.get("success"):
-                print(f"⚠️ Cloudinary删除失败: {delete_result.get('error')}")
-                # 继续删除数据库记录，避免僵尸记录
+        # 远端图片交给后台删除队列，和数据库记录在同一个事务里提交
+        enqueue_deletion(db, photo.cloudinary_public_id)
 
         # 删除相关评论
         db.query(AlbumComment).filter(AlbumComment.photo_id == photo_id).delete()
@@ -312,7 +328,7 @@ async def add_album_comment(
         request: Request,
         photo_id: int = Form(...),
         content: str = Form(...),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
     """添加评论（支持AJAX）"""
     user = request.session.get("username")
@@ -320,7 +336,7 @@ async def add_album_comment(
         return JSONResponse(status_code=401, content={"error": "未登录"})
 
     # 检查照片是否存在
-    photo = db.query(AlbumPhoto).filter(AlbumPhoto.id == photo_id).first()
+    photo = await db.get(AlbumPhoto, photo_id)
     if not photo:
         return JSONResponse(status_code=404, content={"error": "照片不存在"})
 
@@ -334,8 +350,8 @@ async def add_album_comment(
 
     try:
         db.add(comment)
-        db.commit()
-        db.refresh(comment)
+        await db.commit()
+        await db.refresh(comment)
 
         # 判断请求类型
         if request.headers.get("x-requested-with") == "XMLHttpRequest":
@@ -353,7 +369,7 @@ async def add_album_comment(
             return RedirectResponse("/album/timeline", status_code=303)
 
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         if request.headers.get("x-requested-with") == "XMLHttpRequest":
             return JSONResponse(status_code=500, content={"error": f"评论失败: {str(e)}"})
         return RedirectResponse("/album/timeline", status_code=303)
\ No newline at end of file
@@ -1,25 +1,29 @@
 # app/api/couple.py
-from fastapi import APIRouter, Request, Depends, UploadFile, File, Form, HTTPException, Query
+from fastapi import APIRouter, Request, Depends, UploadFile, File, Form, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 import uuid
 import os
 from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
-from app.db import get_db
+from app.db import get_db, get_async_read_db
 from app.deps import get_current_user
-from app.models import User, CouplePhoto
-from fastapi.templating import Jinja2Templates
+from app.models import User
 from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
 from app.service.couple_service import (
     create_photo, delete_photo, toggle_favorite,
-    today_memory, get_all_photos, update_photo_info, get_user_stats
+    today_memory, get_all_photos, update_photo_info, get_user_stats, photos_version
 )
 from app.service.image_service import CloudinaryService  # 新增导入
+from app.service.storage import variants_of
+from app.core.cache import response_cache
+from app.core.templates import templates
+from app.core.conditional import make_etag, etag_matches, set_etag, not_modified
 
 router = APIRouter(prefix="/couple", tags=["Couple Photos"])
-templates = Jinja2Templates(directory="app/templates")
 
 # 允许的文件类型
 ALLOWED_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp'}
@@ -27,20 +31,20 @@ ALLOWED_MIME_TYPES = ['image/jpeg', 'image/png', 'image/gif', 'image/webp']
 
 
 @router.get("/wall", response_class=HTMLResponse)
-def photo_wall(
+async def photo_wall(
         request: Request,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_read_db),
         user: User = Depends(get_current_user)
 ):
     """合照照片墙页面"""
     # 获取照片
-    photos, total = get_all_photos(db, user_id=user.id)
+    photos, total, next_cursor = await get_all_photos(db, user_id=user.id)
 
     # 获取今日回忆
-    memory = today_memory(db, user.id)
+    memory = await today_memory(db, user.id)
 
     # 获取用户统计
-    stats = get_user_stats(db, user.id)
+    stats = await get_user_stats(db, user.id)
 
     return templates.TemplateResponse(
         "album_couple_wall.html",
@@ -50,31 +54,55 @@ def photo_wall(
             "total": total,
             "memory": memory,
             "stats": stats,
+            "next_cursor": next_cursor,
             "current_user": user
         }
     )
 
 
 @router.get("/wall/data")
-def get_wall_data(
+async def get_wall_data(
+        request: Request,
+        response: Response,
         page: int = Query(1, ge=1),
         per_page: int = Query(20, ge=1, le=100),
         only_favorites: bool = Query(False),
         year: Optional[int] = Query(None),
         month: Optional[int] = Query(None),
-        db: Session = Depends(get_db),
+        cursor: Optional[str] = Query(None),
+        include_total: bool = Query(True),
+        db: AsyncSession = Depends(get_async_read_db),
         user: User = Depends(get_current_user)
 ):
-    """获取照片墙数据（API接口）"""
-    photos, total = get_all_photos(
-        db,
-        user_id=user.id,
-        page=page,
-        per_page=per_page,
-        only_favorites=only_favorites,
-        year=year,
-        month=month
+    """
+    获取照片墙数据（API接口）
+
+    无限滚动：第一页不带 cursor，之后把返回的 next_cursor 原样传回来，
+    同时传 include_total=false 可以省掉每页的 count 查询。
+    带 If-None-Match 且照片没有变化时返回 304。
+    """
+    version = await photos_version(db, user.id)
+    etag = make_etag(
+        "couple_wall", user.id, page, per_page, only_favorites, year, month, cursor, include_total, *version
     )
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+
+    try:
+        photos, total, next_cursor = await get_all_photos(
+            db,
+            user_id=user.id,
+            page=page,
+            per_page=per_page,
+            only_favorites=only_favorites,
+            year=year,
+            month=month,
+            cursor=cursor,
+            include_total=include_total
+        )
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
 
     # 格式化返回数据
     photo_list = []
@@ -93,6 +121,7 @@ def get_wall_data(
             "format": photo.format,
             "width": photo.width,
             "height": photo.height,
+            "variants": variants_of(photo),
             "owner_id": photo.owner_id,
             "owner_name": photo.owner.name if photo.owner else "未知"
         })
@@ -102,7 +131,8 @@ def get_wall_data(
         "total": total,
         "page": page,
         "per_page": per_page,
-        "has_more": (page * per_page) < total
+        "has_more": next_cursor is not None,
+        "next_cursor": next_cursor
     }
 
 
@@ -168,8 +198,9 @@ async def upload_photo(
         else:
             parsed_date = datetime.now().date()
 
-        # 创建数据库记录
-        photo = create_photo(
+        # 创建数据库记录（同步会话，放到线程池里执行，避免阻塞事件循环）
+        photo = await run_in_threadpool(
+            create_photo,
             db=db,
             user_id=user.id,
             cloudinary_public_id=upload_result.get("public_id"),
@@ -181,7 +212,8 @@ async def upload_photo(
             caption=caption,
             memory=memory,
             location=location,
-            taken_date=parsed_date
+            taken_date=parsed_date,
+            image_variants=upload_result.get("variants")
         )
 
         print(f"✅ 数据库记录创建成功 - ID: {photo.id}")
@@ -198,7 +230,8 @@ async def upload_photo(
             "is_favorite": photo.is_favorite,
             "is_private": photo.is_private,
             "cloudinary_public_id": photo.cloudinary_public_id,
-            "format": photo.format
+            "format": photo.format,
+            "variants": photo.image_variants
         }
 
         if request.headers.get("x-requested-with") == "XMLHttpRequest":
@@ -359,22 +392,25 @@ def show_upload_form(request: Request, user: User = Depends(get_current_user)):
 
 
 @router.get("/stats")
-def get_stats(
-        db: Session = Depends(get_db),
+async def get_stats(
+        db: AsyncSession = Depends(get_async_read_db),
         user: User = Depends(get_current_user)
 ):
     """获取用户统计信息"""
-    stats = get_user_stats(db, user.id)
-    return JSONResponse(stats)
+    # 缓存里存的是序列化后的数据；上传/删除/收藏等提交后自动失效
+    return await response_cache.get_or_load(
+        "couple", user.id, "stats",
+        lambda: get_user_stats(db, user.id)
+    )
 
 
 @router.get("/memory/today")
-def get_today_memory(
-        db: Session = Depends(get_db),
+async def get_today_memory(
+        db: AsyncSession = Depends(get_async_read_db),
         user: User = Depends(get_current_user)
 ):
     """获取今日回忆"""
-    memory = today_memory(db, user.id)
+    memory = await today_memory(db, user.id)
 
     if memory:
         return JSONResponse({
@@ -1,55 +1,53 @@
 # app/api/memory.py
-from fastapi import APIRouter, Depends, HTTPException, status, Request, Form, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response, Form, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse, RedirectResponse, HTMLResponse
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime, date
-import os
-import uuid
 from pathlib import Path
 
-from app.db import get_db
-from app.deps import get_current_user
+from app.db import get_db, get_read_db, get_async_read_db
+from app.deps import get_current_user, get_optional_user
 from app.models import User, MemoryDay, MemorySnapshot
 from app.schema.memory import (
     MemoryDayCreate, MemoryDayUpdate, MemoryDayResponse,
     MemorySnapshotCreate, MemoryDayStats
 )
 from app.service.memory_service import MemoryService
-from fastapi.templating import Jinja2Templates
+from app.core.cache import response_cache
+from app.core.templates import templates
+from app.core.conditional import make_etag, etag_matches, set_etag, not_modified
+from app.service.image_service import CloudinaryService
 
 router = APIRouter(prefix="/memories", tags=["纪念日"])
-templates = Jinja2Templates(directory="app/templates")
-
-# 上传目录配置
-UPLOAD_DIR = "static/uploads/memory"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 
 # ========== HTML 页面路由 ==========
 @router.get("/", response_class=HTMLResponse)
-def memory_home(
+async def memory_home(
         request: Request,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_read_db),
+        current_user: Optional[User] = Depends(get_optional_user)
 ):
     """纪念日首页"""
     user = request.session.get("username")
     if not user:
         return RedirectResponse("/login")
 
-    # 获取当前用户
-    current_user = db.query(User).filter(User.name == user).first()
+    # 当前用户来自身份缓存
     if not current_user:
         return RedirectResponse("/login")
 
     # 获取纪念日列表
-    memory_days = MemoryService.get_memory_days(db, current_user.id)
+    memory_days = await MemoryService.get_memory_days(db, current_user.id)
 
     # 获取统计信息
-    stats = MemoryService.get_memory_stats(db, current_user.id)
+    stats = await MemoryService.get_memory_stats(db, current_user.id)
 
     # 获取即将到来的纪念日
-    upcoming = MemoryService.get_upcoming_anniversaries(db, current_user.id, 30)
+    upcoming = await MemoryService.get_upcoming_anniversaries(db, current_user.id, 30)
 
     # 定义颜色类函数
     def get_color_class(memory_type):
@@ -104,7 +102,8 @@ async def create_memory_day_form(
         icon: str = Form("❤️"),
         color: str = Form("#ff6b6b"),
         is_annual: bool = Form(True),
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_db),
+        current_user: Optional[User] = Depends(get_optional_user)
 ):
     """通过表单创建纪念日"""
     user = request.session.get("username")
@@ -114,7 +113,6 @@ async def create_memory_day_form(
             content={"error": "未登录"}
         )
 
-    current_user = db.query(User).filter(User.name == user).first()
     if not current_user:
         return JSONResponse(
             status_code=401,
@@ -178,14 +176,14 @@ async def create_memory_day_form(
 def memory_detail(
         request: Request,
         memory_id: int,
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db),
+        current_user: Optional[User] = Depends(get_optional_user)
 ):
     """纪念日详情页"""
     user = request.session.get("username")
     if not user:
         return RedirectResponse("/login")
 
-    current_user = db.query(User).filter(User.name == user).first()
     if not current_user:
         return RedirectResponse("/login")
 
@@ -220,7 +218,8 @@ async def add_snapshot(
         weather: str = Form(""),
         mood: str = Form(""),
         location: str = Form(""),
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_db),
+        current_user: Optional[User] = Depends(get_optional_user)
 ):
     """添加年轮记录"""
     user = request.session.get("username")
@@ -232,7 +231,6 @@ async def add_snapshot(
             )
         return RedirectResponse("/login")
 
-    current_user = db.query(User).filter(User.name == user).first()
     if not current_user:
         return RedirectResponse("/login")
 
@@ -265,20 +263,17 @@ async def add_snapshot(
                     )
                 return RedirectResponse(f"/memories/{memory_id}")  # ✅ 修复这里
 
-            # 创建上传目录
-            upload_dir = "static/uploads/memory"
-            os.makedirs(upload_dir, exist_ok=True)
-
-            # 生成文件名
-            filename = f"{user}_{int(datetime.now().timestamp())}_{uuid.uuid4().hex[:8]}{file_ext}"
-            file_path = os.path.join(upload_dir, filename)
-
-            # 保存文件
-            with open(file_path, "wb") as buffer:
-                content = await image.read()
-                buffer.write(content)
+            # 和合照、动态一样交给配置的存储后端（STORAGE_BACKEND）
+            upload_result = await CloudinaryService.upload_image(image, user, folder="love_app/memory")
+            if not upload_result.get("success"):
+                if request.headers.get("x-requested-with") == "XMLHttpRequest":
+                    return JSONResponse(
+                        status_code=400,
+                        content={"error": upload_result.get("error", "上传失败")}
+                    )
+                return RedirectResponse(f"/memories/{memory_id}")
 
-            image_url = f"/static/uploads/memory/{filename}"
+            image_url = upload_result.get("url")
 
         except Exception as e:
             print(f"图片上传失败: {e}")
@@ -323,19 +318,70 @@ async def add_snapshot(
 
 # ========== API 接口 ==========
 @router.get("/api/list", response_model=List[MemoryDayResponse])
-def get_memory_days_api(
-        db: Session = Depends(get_db),
+async def get_memory_days_api(
+        request: Request,
+        response: Response,
+        db: AsyncSession = Depends(get_async_read_db),
         current_user: User = Depends(get_current_user),
         type: Optional[str] = None
 ):
-    """获取纪念日列表（API）"""
-    return MemoryService.get_memory_days(db, current_user.id, memory_type=type)
+    """获取纪念日列表（API）；带 If-None-Match 且没有变化时返回 304"""
+    # 天数类字段按“今天”算，日期也算进 ETag
+    version = await MemoryService.get_memory_days_version(db, current_user.id)
+    etag = make_etag("memory_list", current_user.id, type, date.today(), *version)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+
+    return await MemoryService.get_memory_days(db, current_user.id, memory_type=type)
+
+
+# 固定路径要写在 /api/{memory_id} 前面，否则会被当成 memory_id 解析
+@router.get("/api/stats")
+async def get_memory_stats_api(
+        db: AsyncSession = Depends(get_async_read_db),
+        current_user: User = Depends(get_current_user)
+):
+    """获取纪念日统计（API）"""
+    # 结果和“今天”有关（在一起的年数、即将到来的纪念日），日期也放进缓存键
+    return await response_cache.get_or_load(
+        "memory", current_user.id, "stats",
+        lambda: MemoryService.get_memory_stats(db, current_user.id),
+        params=date.today()
+    )
+
+
+@router.get("/api/timeline")
+async def get_memory_timeline_api(
+        db: AsyncSession = Depends(get_async_read_db),
+        current_user: User = Depends(get_current_user)
+):
+    """获取时间线视图（API）"""
+    return await response_cache.get_or_load(
+        "memory", current_user.id, "timeline",
+        lambda: MemoryService.get_timeline_view(db, current_user.id),
+        params=date.today()
+    )
+
+
+@router.get("/api/upcoming")
+async def get_upcoming_anniversaries_api(
+        db: AsyncSession = Depends(get_async_read_db),
+        current_user: User = Depends(get_current_user),
+        days: int = 30
+):
+    """获取即将到来的纪念日（API）"""
+    return await response_cache.get_or_load(
+        "memory", current_user.id, "upcoming",
+        lambda: MemoryService.get_upcoming_anniversaries(db, current_user.id, days),
+        params=(date.today(), days)
+    )
 
 
 @router.get("/api/{memory_id}", response_model=MemoryDayResponse)
 def get_memory_day_api(
         memory_id: int,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """获取单个纪念日详情（API）"""
@@ -382,7 +428,7 @@ def delete_memory_day_api(
 
 
 @router.post("/api/{memory_id}/snapshot")
-def create_memory_snapshot_api(
+async def create_memory_snapshot_api(
         request: Request,
         memory_id: int,
         year: int = Form(...),
@@ -391,16 +437,14 @@ def create_memory_snapshot_api(
         weather: str = Form(""),
         mood: str = Form(""),
         location: str = Form(""),
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_db),
+        current_user: User = Depends(get_current_user)
 ):
     """创建年轮记录"""
-    user = request.session.get("username")
-    if not user:
-        raise HTTPException(status_code=401, detail="未登录")
+    user = current_user.name
 
-    # 检查纪念日是否存在
-    current_user = db.query(User).filter(User.name == user).first()
-    memory = MemoryService.get_memory_day_by_id(db, memory_id, current_user.id)
+    # 检查纪念日是否存在（同步会话，放到线程池里执行，避免阻塞事件循环）
+    memory = await run_in_threadpool(MemoryService.get_memory_day_by_id, db, memory_id, current_user.id)
     if not memory:
         raise HTTPException(status_code=404, detail="纪念日不存在")
 
@@ -412,16 +456,12 @@ def create_memory_snapshot_api(
         if file_ext not in ['.jpg', '.jpeg', '.png', '.gif', '.webp']:
             raise HTTPException(status_code=400, detail="不支持的图片格式")
 
-        # 生成文件名
-        filename = f"{user}_{int(datetime.now().timestamp())}_{uuid.uuid4().hex[:8]}{file_ext}"
-        file_path = os.path.join(UPLOAD_DIR, filename)
-
-        # 保存文件
-        with open(file_path, "wb") as buffer:
-            content = image.file.read()
-            buffer.write(content)
+        # 和合照、动态一样交给配置的存储后端（STORAGE_BACKEND）
+        upload_result = await CloudinaryService.upload_image(image, user, folder="love_app/memory")
+        if not upload_result.get("success"):
+            raise HTTPException(status_code=400, detail=upload_result.get("error", "上传失败"))
 
-        image_url = f"/static/uploads/memory/{filename}"
+        image_url = upload_result.get("url")
 
     # 创建年轮记录
     snapshot_data = MemorySnapshotCreate(
@@ -433,8 +473,8 @@ def create_memory_snapshot_api(
         location=location
     )
 
-    snapshot = MemoryService.create_memory_snapshot(
-        db, snapshot_data, memory_id, user
+    snapshot = await run_in_threadpool(
+        MemoryService.create_memory_snapshot, db, snapshot_data, memory_id, user
     )
 
     if request.headers.get("x-requested-with") == "XMLHttpRequest":
@@ -455,31 +495,3 @@ def create_memory_snapshot_api(
         })
 
     return RedirectResponse(f"/memory/{memory_id}", status_code=303)
-
-
-@router.get("/api/stats")
-def get_memory_stats_api(
-        db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_user)
-):
-    """获取纪念日统计（API）"""
-    return MemoryService.get_memory_stats(db, current_user.id)
-
-
-@router.get("/api/timeline")
-def get_memory_timeline_api(
-        db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_user)
-):
-    """获取时间线视图（API）"""
-    return MemoryService.get_timeline_view(db, current_user.id)
-
-
-@router.get("/api/upcoming")
-def get_upcoming_anniversaries_api(
-        db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_user),
-        days: int = 30
-):
-    """获取即将到来的纪念日（API）"""
-    return MemoryService.get_upcoming_anniversaries(db, current_user.id, days)
\ No newline at end of file
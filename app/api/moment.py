@@ -1,21 +1,27 @@
 # app/api/moment.py
-from fastapi import APIRouter, Depends, Request, Form, HTTPException, UploadFile, File
-from fastapi.responses import RedirectResponse, HTMLResponse, JSONResponse
-from fastapi.templating import Jinja2Templates
+from fastapi import APIRouter, Depends, Request, Response, Form, HTTPException, UploadFile, File, Query
+from fastapi.responses import RedirectResponse, HTMLResponse, JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
+from typing import Optional
+import json
 import os
 import uuid
 from pathlib import Path
-from app.db import get_db
+from app.db import get_db, get_read_db, get_async_db, get_async_read_db
 from app.models import Moment
+from app.core.templates import templates
 from app.service.image_service import CloudinaryService  # 新增导入
+from app.service.deletion_service import enqueue_deletion
+from app.service.moment_service import (
+    FEED_PAGE_SIZE, FEED_COLUMNS, STREAM_BATCH_SIZE,
+    moments_feed_query, moments_version_query, split_page, moment_to_dict, moment_view
+)
+from app.core.conditional import make_etag, etag_matches, set_etag, not_modified
 
 router = APIRouter(prefix="/moments", tags=["Moments"])
 
-# 确保模板目录正确
-templates = Jinja2Templates(directory="app/templates")
-
 # 允许的文件类型
 ALLOWED_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp'}
 ALLOWED_MIME_TYPES = ['image/jpeg', 'image/png', 'image/gif', 'image/webp']
@@ -23,33 +29,24 @@ ALLOWED_MIME_TYPES = ['image/jpeg', 'image/png', 'image/gif', 'image/webp']
 
 # ========== 页面路由 ==========
 @router.get("/timeline", response_class=HTMLResponse)
-def timeline(request: Request, db: Session = Depends(get_db)):
+async def timeline(request: Request, db: AsyncSession = Depends(get_async_read_db)):
     """动态页面"""
     # 检查用户是否登录
     user = request.session.get("username")
     if not user:
         return RedirectResponse("/login")
 
-    # 获取所有动态，按时间倒序
-    moments = db.query(Moment).order_by(Moment.created_at.desc()).all()
-    view_moments = []
-    for m in moments:
-        view_moments.append({
-            "id": m.id,
-            "user": m.user,  # 明确是 username
-            "content": m.content,
-            "image": m.image_url,  # 使用Cloudinary的image_url
-            "created_at": m.created_at,
-            "is_owner": m.user == user,  # ⭐ 核心
-            "format": m.format,  # 新增：图片格式
-            "cloudinary_public_id": m.cloudinary_public_id  # 新增：Cloudinary ID
-        })
+    # 只渲染第一页，后面的通过 /moments/?before= 继续加载
+    rows = (await db.scalars(moments_feed_query(limit=FEED_PAGE_SIZE))).all()
+    moments, next_before = split_page(list(rows), FEED_PAGE_SIZE)
+    view_moments = [moment_view(m, user) for m in moments]
     return templates.TemplateResponse(
         "timeline.html",
         {
             "request": request,
             "moments": view_moments,
             "current_user": user,
+            "next_before": next_before,
             "page": "timeline"
         }
     )
@@ -61,7 +58,7 @@ async def create_moment(
         request: Request,
         content: str = Form(...),
         image: UploadFile = File(None),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
     """创建动态（使用Cloudinary存储图片）"""
     # 检查用户是否登录
@@ -83,6 +80,7 @@ async def create_moment(
         width = None
         height = None
         file_bytes = None
+        variants = None
 
         if image and image.filename:
             # 验证文件类型
@@ -118,6 +116,7 @@ async def create_moment(
             width = upload_result.get("width")
             height = upload_result.get("height")
             file_bytes = upload_result.get("bytes")
+            variants = upload_result.get("variants")
 
         # 创建动态记录 - 使用本地时间
         now = datetime.now()
@@ -131,12 +130,13 @@ async def create_moment(
             width=width,
             height=height,
             bytes=file_bytes,
+            image_variants=variants,
             created_at=now
         )
 
         db.add(moment)
-        db.commit()
-        db.refresh(moment)
+        await db.commit()
+        await db.refresh(moment)
 
         # 判断请求类型
         if request.headers.get("x-requested-with") == "XMLHttpRequest":
@@ -151,7 +151,8 @@ async def create_moment(
                     "image": moment.image_url,
                     "created_at": moment.created_at.isoformat() if moment.created_at else None,
                     "cloudinary_public_id": moment.cloudinary_public_id,
-                    "format": moment.format
+                    "format": moment.format,
+                    "variants": moment.image_variants
                 }
             })
         else:
@@ -159,7 +160,7 @@ async def create_moment(
             return RedirectResponse("/moments/timeline", status_code=303)
 
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(f"发布失败: {e}")
 
         if request.headers.get("x-requested-with") == "XMLHttpRequest":
@@ -171,31 +172,61 @@ async def create_moment(
 
 
 @router.get("/")
-def list_moments(request: Request, db: Session = Depends(get_db)):
-    """获取动态列表（API接口）"""
+async def list_moments(
+        request: Request,
+        response: Response,
+        before: Optional[str] = None,
+        limit: int = Query(FEED_PAGE_SIZE, ge=1, le=100),
+        db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    获取动态列表（API接口），按时间倒序分页；下一页游标放在 X-Next-Before 响应头里
+    带 If-None-Match 且动态没有变化时返回 304
+    """
     user = request.session.get("username")
-    moments = db.query(Moment).order_by(Moment.created_at.desc()).all()
-
-    result = []
-    for m in moments:
-        moment_data = {
-            "id": m.id,
-            "user": m.user,
-            "content": m.content,
-            "image": m.image_url,  # 使用Cloudinary的image_url
-            "created_at": m.created_at.isoformat() if m.created_at else None,
-            "is_owner": m.user == user,  # 添加 is_owner 字段
-            "cloudinary_public_id": m.cloudinary_public_id,
-            "format": m.format
-        }
-        result.append(moment_data)
+    try:
+        query = moments_feed_query(before=before, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # is_owner 和当前用户有关，用户名也算进 ETag
+    version = (await db.execute(moments_version_query())).one()
+    etag = make_etag("moments", user, before, limit, *version)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
 
-    return result
+    rows = (await db.scalars(query)).all()
+    moments, next_before = split_page(list(rows), limit)
+    if next_before:
+        response.headers["X-Next-Before"] = next_before
+
+    return [moment_to_dict(m, user) for m in moments]
+
+
+@router.get("/stream")
+async def stream_moments(request: Request, db: AsyncSession = Depends(get_async_read_db)):
+    """全部动态的流式 JSON 数组（导出用），分批读取，内存占用不随动态数量增长"""
+    user = request.session.get("username")
+
+    async def generate():
+        yield "["
+        first = True
+        result = await db.stream(
+            moments_feed_query(columns=FEED_COLUMNS).execution_options(yield_per=STREAM_BATCH_SIZE)
+        )
+        async for partition in result.partitions():
+            chunk = ",".join(json.dumps(moment_to_dict(row, user), ensure_ascii=False) for row in partition)
+            yield chunk if first else "," + chunk
+            first = False
+        yield "]"
+
+    return StreamingResponse(generate(), media_type="application/json")
 
 
 # ========== 以下路由需要修改删除逻辑 ==========
 @router.get("/{moment_id}")
-def get_moment(moment_id: int, db: Session = Depends(get_db)):
+def get_moment(moment_id: int, db: Session = Depends(get_read_db)):
     """获取单个动态"""
     moment = db.query(Moment).filter(Moment.id == moment_id).first()
     if not moment:
@@ -250,12 +281,12 @@ def update_moment(
 
 
 @router.delete("/{moment_id}")
-async def delete_moment(
+def delete_moment(
         request: Request,
         moment_id: int,
         db: Session = Depends(get_db)
 ):
-    """删除动态（同时删除Cloudinary上的图片）"""
+    """删除动态（Cloudinary 上的图片由后台删除队列删除）"""
     user = request.session.get("username")
     if not user:
         if request.headers.get("x-requested-with") == "XMLHttpRequest":
@@ -279,4 +310,14 @@ async def delete_moment(
         if request.headers.get("x-requested-with") == "XMLHttpRequest":
             return JSONResponse(
                 status_code=403,
-                content={"error": "无权删除此动态"})
\ No newline at end of file
+                content={"error": "无权删除此动态"})
+        raise HTTPException(status_code=403, detail="无权删除此动态")
+
+    # 远端图片交给后台删除队列，和动态在同一个事务里提交，接口不等 Cloudinary
+    enqueue_deletion(db, moment.cloudinary_public_id)
+    db.delete(moment)
+    db.commit()
+
+    if request.headers.get("x-requested-with") == "XMLHttpRequest":
+        return JSONResponse({"success": True, "message": "动态已删除"})
+    return RedirectResponse("/moments/timeline", status_code=303)
@@ -0,0 +1,92 @@
+# app/api/ops.py
+import hmac
+import os
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from app.db import engine, async_engine, read_engine, async_read_engine, POOL_OPTIONS, get_db
+from app.db_pool import pool_status
+from app.core.cache import response_cache
+from app.core.compression import (
+    brotli, compressed_body_cache,
+    COMPRESSION_MIN_SIZE, COMPRESSION_GZIP_LEVEL, COMPRESSION_BROTLI_QUALITY
+)
+from app.core.upload_pool import upload_pool
+from app.service.storage import get_storage
+from app.service.deletion_service import deletion_stats
+
+router = APIRouter(prefix="/_ops", tags=["Ops"])
+
+
+def check_ops_token(token: Optional[str]):
+    """
+    运维接口需要带 X-Ops-Token 请求头，和 OPS_TOKEN 一致才放行；
+    没有设置 OPS_TOKEN 时一律拒绝，本地开发可以设置 OPS_DEV=1 免校验
+    """
+    expected = os.getenv("OPS_TOKEN")
+    if not expected:
+        if os.getenv("OPS_DEV", "0") == "1":
+            return
+        raise HTTPException(status_code=403, detail="无权访问")
+    if not token or not hmac.compare_digest(token.encode(), expected.encode()):
+        raise HTTPException(status_code=403, detail="无权访问")
+
+
+@router.get("/db-pool")
+def db_pool_stats(x_ops_token: Optional[str] = Header(None)):
+    """数据库连接池实时状态"""
+    check_ops_token(x_ops_token)
+    result = {
+        "pid": os.getpid(),
+        "config": POOL_OPTIONS,
+        "sync": pool_status(engine),
+        "async": pool_status(async_engine.sync_engine),
+    }
+    # 只读副本 / SQLite 只读连接池
+    if read_engine is not engine:
+        result["read_sync"] = pool_status(read_engine)
+    if async_read_engine is not async_engine:
+        result["read_async"] = pool_status(async_read_engine.sync_engine)
+    return result
+
+
+@router.get("/cache")
+def response_cache_stats(x_ops_token: Optional[str] = Header(None)):
+    """接口响应缓存的命中情况（每个 worker 进程各自统计）"""
+    check_ops_token(x_ops_token)
+    return {
+        "pid": os.getpid(),
+        "backend": type(response_cache.backend).__name__,
+        "ttl": response_cache.ttl,
+        **response_cache.backend.stats(),
+    }
+
+
+@router.get("/compression")
+def compression_stats(x_ops_token: Optional[str] = Header(None)):
+    """响应压缩的配置和压缩结果缓存的命中情况"""
+    check_ops_token(x_ops_token)
+    return {
+        "pid": os.getpid(),
+        "brotli": brotli is not None,
+        "min_size": COMPRESSION_MIN_SIZE,
+        "gzip_level": COMPRESSION_GZIP_LEVEL,
+        "brotli_quality": COMPRESSION_BROTLI_QUALITY,
+        "cache": compressed_body_cache.stats(),
+    }
+
+
+@router.get("/uploads")
+def upload_pool_stats(x_ops_token: Optional[str] = Header(None)):
+    """上传线程池：排队数、进行中、完成/失败/超时/拒绝次数，以及当前的存储后端"""
+    check_ops_token(x_ops_token)
+    return {"pid": os.getpid(), "storage": get_storage().name, **upload_pool.stats()}
+
+
+@router.get("/deletions")
+def pending_deletion_stats(x_ops_token: Optional[str] = Header(None), db: Session = Depends(get_db)):
+    """后台删除队列：待删除、已到期、重试次数用完的数量，以及最早一条的登记时间"""
+    check_ops_token(x_ops_token)
+    return {"pid": os.getpid(), **deletion_stats(db)}
@@ -1,10 +1,9 @@
 from fastapi import APIRouter, Request, Depends
 from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
 from sqlalchemy import text
 from sqlalchemy.orm import Session
-from app.models import Moment
-from app.db import SessionLocal
+from app.service.moment_service import FEED_PAGE_SIZE, moments_feed_query, split_page, moment_view
+from app.db import get_read_db
 from app.service.todo_service import list_todos
 from app.service.weather_service import get_weather
 from app.service.greeting_service import generate_greeting
@@ -13,17 +12,9 @@ from fastapi import APIRouter, Request
 from fastapi.responses import HTMLResponse, RedirectResponse
 from app.core.templates import templates
 router = APIRouter()
-templates = Jinja2Templates(directory="app/templates")
-
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
 
 @router.get("/", response_class=HTMLResponse)
-def home(request: Request, db: Session = Depends(get_db)):
+def home(request: Request, db: Session = Depends(get_read_db)):
     user_id = request.session.get("user_id")
     username = request.session.get("username")
 
@@ -74,27 +65,34 @@ def album(request: Request):
 #         }
 #     )
 @router.get("/timeline", response_class=HTMLResponse)
-def timeline(request: Request, db: Session = Depends(get_db)):
+def timeline(request: Request, db: Session = Depends(get_read_db)):
     user = request.session.get("user_id")
     if not user:
         return RedirectResponse("/login")
+    username = request.session.get("username")
 
     # 修改后：
     try:
         # 尝试新的查询（包含Cloudinary字段）
-        moments = db.query(Moment).order_by(Moment.created_at.desc()).all()
+        # 只渲染第一页，剩下的由页面通过 /moments/?before= 加载
+        moments = db.scalars(moments_feed_query(limit=FEED_PAGE_SIZE)).all()
+        moments, next_before = split_page(list(moments), FEED_PAGE_SIZE)
+        # 转成模板用的结构，带上缩略图尺寸（variants），首屏也能拼 srcset
+        moments = [moment_view(m, username) for m in moments]
     except Exception as e:
         # 如果失败，回滚事务并使用原始SQL查询
         print(f"⚠️ 查询失败，回滚事务并使用备用查询: {e}")
         db.rollback()  # 回滚失败的事务
+        next_before = None
 
         # 使用原始SQL查询，只选择存在的字段
         query = text("""
                 SELECT id, "user", content, image, created_at
                 FROM moments 
                 ORDER BY created_at DESC
+                LIMIT :limit
             """)
-        result = db.execute(query)
+        result = db.execute(query, {"limit": FEED_PAGE_SIZE})
         moments = []
         for row in result:
             moments.append({
@@ -103,7 +101,9 @@ def timeline(request: Request, db: Session = Depends(get_db)):
                 "content": row.content,
                 "image": row.image,
                 "image_url": row.image,  # 将旧字段映射到新字段名
-                "created_at": row.created_at
+                "created_at": row.created_at,
+                "is_owner": row.user == username,
+                "variants": None
             })
 
     return templates.TemplateResponse(
@@ -111,6 +111,8 @@ def timeline(request: Request, db: Session = Depends(get_db)):
         {
             "request": request,
             "moments": moments,
+            "next_before": next_before,
+            "current_user": username,
             "user": user
         }
     )
\ No newline at end of file
@@ -1,7 +1,7 @@
 from pydantic import BaseModel
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from app.db import get_db
+from app.db import get_db, get_read_db
 from app.models import Todo, User
 from app.deps import get_current_user
 
@@ -44,7 +44,7 @@ def create_todo(
 
 @router.get("/", response_model=list[TodoResponse])
 def list_my_todos(
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         user: User = Depends(get_current_user)
 ):
     return db.query(Todo).filter(
@@ -1,8 +1,8 @@
 from fastapi import APIRouter
-from app.service.weather_service import get_weather
+from app.service.weather_service import weather_provider, DEFAULT_LATITUDE, DEFAULT_LONGITUDE
 
 router = APIRouter()
 
 @router.get("/")
-def weather(city: str):
-    return {"city": city, "weather": get_weather()}
+async def weather(city: str, lat: float = DEFAULT_LATITUDE, lon: float = DEFAULT_LONGITUDE):
+    return {"city": city, "weather": await weather_provider.get(lat, lon)}
@@ -1,9 +1,25 @@
-import cloudinary
 import os
 
-cloudinary.config(
-    cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
-    api_key=os.getenv("CLOUDINARY_API_KEY"),
-    api_secret=os.getenv("CLOUDINARY_API_SECRET"),
-    secure=True
-)
+_cloudinary = None
+
+
+def get_cloudinary():
+    """
+    第一次用到时才导入并配置 Cloudinary SDK
+    （SDK 连带 urllib3 等导入较慢，不放在 worker 启动路径上）
+    """
+    global _cloudinary
+    if _cloudinary is None:
+        import cloudinary
+        import cloudinary.api
+        import cloudinary.uploader
+        import cloudinary.utils
+
+        cloudinary.config(
+            cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
+            api_key=os.getenv("CLOUDINARY_API_KEY"),
+            api_secret=os.getenv("CLOUDINARY_API_SECRET"),
+            secure=True
+        )
+        _cloudinary = cloudinary
+    return _cloudinary
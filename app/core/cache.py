@@ -0,0 +1,182 @@
+# app/core/cache.py
+"""
+按用户的接口响应缓存
+
+    return await response_cache.get_or_load(
+        "memory", user.id, "stats",
+        lambda: MemoryService.get_memory_stats(db, user.id)
+    )
+
+缓存的是 jsonable_encoder 之后的纯数据，命中时不再碰数据库。
+写入通过 SQLAlchemy 会话事件失效：提交了 CouplePhoto / MemoryDay / MemorySnapshot
+的改动后，对应用户的 couple / memory 缓存整块清掉。
+后端可替换：默认进程内 LRU；多 worker 部署时每个进程各有一份，
+所以另外加了一个较短的 TTL 兜底，换成共享后端后可以调大。
+"""
+import os
+import threading
+from abc import ABC, abstractmethod
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.models import CouplePhoto, MemoryDay, MemorySnapshot
+
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "60"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024"))
+
+_MISS = object()
+
+# key = (scope, user_id, endpoint, params)
+CacheKey = Tuple[str, Any, str, Hashable]
+
+
+class CacheBackend(ABC):
+    """缓存后端接口：换成 Redis 等共享后端时实现这几个方法即可"""
+
+    @abstractmethod
+    def get(self, key: CacheKey) -> Any:
+        """未命中返回 _MISS"""
+
+    @abstractmethod
+    def set(self, key: CacheKey, value: Any, ttl: float):
+        ...
+
+    @abstractmethod
+    def invalidate(self, scope: str, user_id: Any = None):
+        """清掉某个用户在某个 scope 下的全部缓存；user_id 为 None 时清掉整个 scope"""
+
+    @abstractmethod
+    def clear(self):
+        ...
+
+    def stats(self) -> dict:
+        return {}
+
+
+class LRUCacheBackend(CacheBackend):
+    """进程内 LRU，带过期时间（线程安全，同步路由在线程池里也会用到）"""
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[CacheKey, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] < time.monotonic():
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return _MISS
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def invalidate(self, scope, user_id=None):
+        with self._lock:
+            for key in [k for k in self._data if k[0] == scope and (user_id is None or k[1] == user_id)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._data), "hits": self.hits, "misses": self.misses}
+
+
+class ResponseCache:
+    def __init__(self, backend: CacheBackend, ttl: float = RESPONSE_CACHE_TTL):
+        self.backend = backend
+        self.ttl = ttl
+
+    async def get_or_load(
+            self,
+            scope: str,
+            user_id: Any,
+            endpoint: str,
+            loader: Callable[[], Awaitable[Any]],
+            params: Hashable = None,
+            ttl: Optional[float] = None
+    ) -> Any:
+        """读穿缓存：命中直接返回，否则调用 loader 并缓存序列化后的结果"""
+        key = (scope, user_id, endpoint, params)
+        value = self.backend.get(key)
+        if value is not _MISS:
+            return value
+
+        value = jsonable_encoder(await loader())
+        self.backend.set(key, value, self.ttl if ttl is None else ttl)
+        return value
+
+    def invalidate(self, scope: str, user_id: Any = None):
+        self.backend.invalidate(scope, user_id)
+
+
+response_cache = ResponseCache(LRUCacheBackend())
+
+
+# ========== 写入后失效 ==========
+# 模型 -> (scope, 取 user_id 的函数)；取不到 user_id 时清掉整个 scope
+def _snapshot_owner(snapshot: MemorySnapshot):
+    # 只看已经加载的关系，不在 flush 里触发懒加载
+    memory_day = inspect(snapshot).dict.get("memory_day")
+    return memory_day.owner_id if memory_day is not None else None
+
+
+INVALIDATION_RULES = {
+    CouplePhoto: ("couple", lambda obj: obj.owner_id),
+    MemoryDay: ("memory", lambda obj: obj.owner_id),
+    MemorySnapshot: ("memory", _snapshot_owner),
+}
+
+_PENDING_KEY = "response_cache_invalidations"
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_invalidations(session, flush_context):
+    pending = session.info.setdefault(_PENDING_KEY, set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        rule = INVALIDATION_RULES.get(type(obj))
+        if rule:
+            scope, owner_of = rule
+            pending.add((scope, owner_of(obj)))
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_invalidations(orm_execute_state):
+    # query(...).delete() / update() 不经过 flush，按 scope 整块失效
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    rule = INVALIDATION_RULES.get(mapper.class_) if mapper is not None else None
+    if rule:
+        orm_execute_state.session.info.setdefault(_PENDING_KEY, set()).add((rule[0], None))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_invalidations(session):
+    for scope, user_id in session.info.pop(_PENDING_KEY, ()):
+        response_cache.invalidate(scope, user_id)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_invalidations(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop(_PENDING_KEY, None)
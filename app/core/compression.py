@@ -0,0 +1,240 @@
+# app/core/compression.py
+"""
+响应压缩中间件：按 Accept-Encoding 协商 br / gzip
+
+- 只压缩白名单里的文本类型（HTML / JSON / CSS / JS / SVG），小于阈值的不压
+- /static/uploads 下的用户图片、已经带 Content-Encoding 的响应直接放过
+- 一次性返回的响应整体压缩并带 Content-Length；StreamingResponse 边发边压
+- 同样的响应体（比如没变化的页面被反复打开）压缩结果放在一个小 LRU 里，不重复压缩
+- 没装 brotli 时只用 gzip
+
+压缩级别可以用 benchmarks/bench_compression.py 比较后通过环境变量调整。
+"""
+import gzip
+import hashlib
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # 可选依赖
+    brotli = None
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "5"))
+COMPRESSION_CACHE_ENTRIES = int(os.getenv("COMPRESSION_CACHE_ENTRIES", "128"))
+# 超过这个大小的响应体不进压缩缓存
+COMPRESSION_CACHE_MAX_BODY = 1024 * 1024
+
+COMPRESSIBLE_TYPES = (
+    "text/html",
+    "text/css",
+    "text/plain",
+    "text/javascript",
+    "application/javascript",
+    "application/json",
+    "application/xml",
+    "image/svg+xml",
+)
+SKIP_PATH_PREFIXES = ("/static/uploads/",)
+
+
+def parse_accept_encoding(header: str) -> dict:
+    """'br;q=1.0, gzip;q=0.8, *;q=0.1' -> {"br": 1.0, "gzip": 0.8, "*": 0.1}"""
+    result = {}
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        result[name] = q
+    return result
+
+
+def choose_encoding(header: Optional[str]) -> Optional[str]:
+    """选出客户端能接受、权重最高的编码；同权重优先 br"""
+    if not header:
+        return None
+    accepted = parse_accept_encoding(header)
+    candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best, best_q = None, 0.0
+    for name in candidates:
+        q = accepted.get(name, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+def is_compressible(content_type: str) -> bool:
+    return content_type.split(";")[0].strip().lower() in COMPRESSIBLE_TYPES
+
+
+def compress(body: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=COMPRESSION_BROTLI_QUALITY if level is None else level)
+    return gzip.compress(body, compresslevel=COMPRESSION_GZIP_LEVEL if level is None else level, mtime=0)
+
+
+class _StreamCompressor:
+    """流式压缩：每个分块压完立刻 flush 出去，客户端可以边收边解"""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=COMPRESSION_BROTLI_QUALITY)
+        else:
+            # wbits=31 表示带 gzip 头
+            self._compressor = zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def feed(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.process(data) + self._compressor.flush()
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class CompressedBodyCache:
+    """按 (响应体摘要, 编码) 缓存压缩结果"""
+
+    def __init__(self, max_entries: int = COMPRESSION_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[tuple, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compress(self, body: bytes, encoding: str) -> bytes:
+        if len(body) > COMPRESSION_CACHE_MAX_BODY or self.max_entries <= 0:
+            return compress(body, encoding)
+
+        key = (hashlib.blake2b(body, digest_size=16).digest(), encoding)
+        with self._lock:
+            cached = self._data.get(key)
+            if cached is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        compressed = compress(body, encoding)
+        with self._lock:
+            self._data[key] = compressed
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+        return compressed
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._data), "hits": self.hits, "misses": self.misses}
+
+
+compressed_body_cache = CompressedBodyCache()
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(SKIP_PATH_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(send, encoding, self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    def __init__(self, send, encoding: str, minimum_size: int):
+        self._send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start_message = None
+        self.active = None  # None: 还没决定；True: 压缩；False: 原样转发
+        self.stream: Optional[_StreamCompressor] = None
+
+    def _should_compress(self, headers: MutableHeaders) -> bool:
+        if self.start_message["status"] in (204, 304) or self.start_message["status"] < 200:
+            return False
+        if "content-encoding" in headers or "content-range" in headers:
+            return False
+        if "no-transform" in headers.get("cache-control", ""):
+            return False
+        return is_compressible(headers.get("content-type", ""))
+
+    def _mark_encoded(self, headers: MutableHeaders):
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        # 内容编码变了，强 ETag 降为弱 ETag
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = "W/" + etag
+
+    async def send(self, message):
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            return
+
+        if message["type"] != "http.response.body" or self.active is False:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.active is None:
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            if not self._should_compress(headers):
+                self.active = False
+            elif not more_body:
+                # 一次性响应：太小不压
+                if len(body) < self.minimum_size:
+                    self.active = False
+                else:
+                    self.active = True
+                    body = compressed_body_cache.get_or_compress(body, self.encoding)
+                    self._mark_encoded(headers)
+                    headers["Content-Length"] = str(len(body))
+            else:
+                # 流式响应：长度未知，边发边压
+                self.active = True
+                self.stream = _StreamCompressor(self.encoding)
+                self._mark_encoded(headers)
+                del headers["Content-Length"]
+
+            await self._send(self.start_message)
+            if self.stream is None:
+                await self._send({"type": "http.response.body", "body": body, "more_body": more_body})
+                return
+
+        if self.stream is None:
+            await self._send(message)
+            return
+
+        data = self.stream.feed(body)
+        if not more_body:
+            data += self.stream.finish()
+        await self._send({"type": "http.response.body", "body": data, "more_body": more_body})
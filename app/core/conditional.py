@@ -0,0 +1,49 @@
+# app/core/conditional.py
+"""
+列表接口的条件请求（ETag / If-None-Match）
+
+路由先用一条聚合查询（行数、最大 id、最大 updated_at，不加载行）加上筛选参数算出 ETag，
+和请求头 If-None-Match 一致时直接返回 304，不再查列表、不再序列化：
+
+    etag = make_etag("moments", user, before, limit, *version_row)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+"""
+import hashlib
+
+from fastapi import Request, Response
+
+# 浏览器每次都带着 ETag 回来确认，不直接用本地缓存
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts) -> str:
+    """弱 ETag：内容相同即可，压缩等编码差异不影响"""
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return _opaque(etag) in {_opaque(tag) for tag in header.split(",")}
+
+
+def set_etag(response: Response, etag: str):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+
+
+def not_modified(etag: str) -> Response:
+    response = Response(status_code=304)
+    set_etag(response, etag)
+    return response
@@ -0,0 +1,84 @@
+# app/core/identity.py
+"""
+登录用户的身份缓存：按 session 里的 user_id 缓存 User 的列值（进程级，短 TTL），
+每个请求内再缓存一次（request.state），鉴权不用每次都查 users 表。
+返回的是 detached 的 User 对象，只用来读 id / name；需要挂到会话上时用
+db.merge(user, load=False)，不会再查库。
+"""
+import os
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.models import User
+
+IDENTITY_CACHE_TTL = float(os.getenv("IDENTITY_CACHE_TTL", "30"))
+
+_USER_COLUMNS = tuple(c.key for c in User.__table__.columns)
+
+
+class IdentityCache:
+    def __init__(self, ttl: float = IDENTITY_CACHE_TTL):
+        self.ttl = ttl
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> Optional[User]:
+        with self._lock:
+            item = self._data.get(user_id)
+            if item is None:
+                return None
+            if item[0] < time.monotonic():
+                del self._data[user_id]
+                return None
+            values = item[1]
+        return detached_user(values)
+
+    def set(self, user: User):
+        values = {key: getattr(user, key) for key in _USER_COLUMNS}
+        with self._lock:
+            self._data[user.id] = (time.monotonic() + self.ttl, values)
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._data.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+def detached_user(values: dict) -> User:
+    """用缓存的列值构造一个带主键身份的 detached User"""
+    user = User(**values)
+    make_transient_to_detached(user)
+    return user
+
+
+identity_cache = IdentityCache()
+
+
+# ========== 用户信息变更后失效 ==========
+_PENDING_KEY = "identity_cache_invalidations"
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_user_changes(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, User) and obj.id is not None:
+            session.info.setdefault(_PENDING_KEY, set()).add(obj.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_users(session):
+    for user_id in session.info.pop(_PENDING_KEY, ()):
+        identity_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_user_changes(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,230 @@
+# app/core/static.py
+"""
+/static 的静态文件服务：缓存头、带指纹的资源 URL、预压缩文件
+
+- static/uploads 下的上传文件名都是唯一的（uuid），内容不会变，直接 immutable 缓存一年
+- 模板里用 {{ static_url("css/app.css") }} 生成 /static/css/app.css?v=<内容哈希>，
+  指纹和当前文件一致时同样 immutable；其它静态文件 no-cache（每次用 ETag 确认）
+- 有预先生成的 .br / .gz 兄弟文件、且客户端接受时直接发压缩好的文件
+
+生成 .br / .gz 和指纹清单：
+    python -m app.core.static
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import stat
+from typing import Optional
+
+import anyio
+from starlette.datastructures import Headers, QueryParams
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+
+from app.core.compression import COMPRESSIBLE_TYPES, parse_accept_encoding
+
+try:
+    import brotli
+except ImportError:  # 可选依赖
+    brotli = None
+
+STATIC_DIR = "static"
+STATIC_URL_PREFIX = "/static"
+MANIFEST_NAME = "manifest.json"
+UPLOADS_PREFIX = "uploads/"
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "public, no-cache"
+
+# 预压缩文件的后缀，按优先顺序
+ENCODING_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+# 小于这个大小的文件不生成压缩版本
+PRECOMPRESS_MIN_SIZE = 1024
+
+
+# ========== 指纹 ==========
+def file_fingerprint(full_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(full_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+class AssetManifest:
+    """
+    路径 -> 内容哈希。优先读构建时生成的 static/manifest.json，
+    清单里没有的文件按 mtime 缓存现算，开发时改了文件也能拿到新指纹
+    """
+
+    def __init__(self, directory: str = STATIC_DIR):
+        self.directory = directory
+        self._manifest: Optional[dict] = None
+        self._computed = {}
+
+    def _load(self) -> dict:
+        if self._manifest is None:
+            try:
+                with open(os.path.join(self.directory, MANIFEST_NAME), encoding="utf-8") as f:
+                    self._manifest = json.load(f)
+            except (OSError, ValueError):
+                self._manifest = {}
+        return self._manifest
+
+    def fingerprint(self, path: str) -> Optional[str]:
+        path = path.lstrip("/")
+        full_path = os.path.join(self.directory, path)
+        try:
+            mtime = os.stat(full_path).st_mtime_ns
+        except OSError:
+            return None
+
+        built = self._load().get(path)
+        if built and built["mtime"] == mtime:
+            return built["hash"]
+
+        cached = self._computed.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        value = file_fingerprint(full_path)
+        self._computed[path] = (mtime, value)
+        return value
+
+    def reload(self):
+        self._manifest = None
+        self._computed.clear()
+
+
+asset_manifest = AssetManifest()
+
+
+def static_url(path: str) -> str:
+    """模板里用：带内容指纹的静态资源地址，文件不存在时不加指纹"""
+    path = path.lstrip("/")
+    fingerprint = asset_manifest.fingerprint(path)
+    url = f"{STATIC_URL_PREFIX}/{path}"
+    return f"{url}?v={fingerprint}" if fingerprint else url
+
+
+# ========== 静态文件服务 ==========
+class CachedStaticFiles(StaticFiles):
+    def __init__(self, *, directory: str = STATIC_DIR, **kwargs):
+        super().__init__(directory=directory, **kwargs)
+        same_dir = os.path.abspath(directory) == os.path.abspath(asset_manifest.directory)
+        self.manifest = asset_manifest if same_dir else AssetManifest(directory)
+
+    def cache_control(self, path: str, scope) -> str:
+        if path.startswith(UPLOADS_PREFIX):
+            return IMMUTABLE
+        version = QueryParams(scope.get("query_string", b"")).get("v")
+        if version and version == self.manifest.fingerprint(path):
+            return IMMUTABLE
+        return REVALIDATE
+
+    async def get_response(self, path: str, scope) -> Response:
+        response = await self._precompressed_response(path, scope)
+        if response is None:
+            response = await super().get_response(path, scope)
+        if response.status_code in (200, 304):
+            response.headers["Cache-Control"] = self.cache_control(path, scope)
+        return response
+
+    async def _precompressed_response(self, path: str, scope) -> Optional[Response]:
+        """有 .br / .gz 兄弟文件且客户端接受时返回它，否则返回 None 走普通流程"""
+        if scope["method"] not in ("GET", "HEAD") or path.startswith(UPLOADS_PREFIX):
+            return None
+        media_type = mimetypes.guess_type(path)[0]
+        if media_type not in COMPRESSIBLE_TYPES:
+            return None
+
+        headers = Headers(scope=scope)
+        if "range" in headers:
+            return None
+        # 发的是构建好的文件，不需要 brotli 库，只看客户端接不接受
+        accepted = parse_accept_encoding(headers.get("accept-encoding", ""))
+        for encoding in ENCODING_SUFFIXES:
+            if accepted.get(encoding, accepted.get("*", 0.0)) <= 0:
+                continue
+            try:
+                full_path, stat_result = await anyio.to_thread.run_sync(
+                    self.lookup_path, path + ENCODING_SUFFIXES[encoding]
+                )
+            except OSError:
+                continue
+            if not (stat_result and stat.S_ISREG(stat_result.st_mode)):
+                continue
+
+            response = self.file_response(full_path, stat_result, scope)
+            if response.status_code == 200:
+                response.headers["Content-Type"] = media_type + ("; charset=utf-8" if media_type.startswith("text/") else "")
+            response.headers["Content-Encoding"] = encoding
+            response.headers["Vary"] = "Accept-Encoding"
+            return response
+        return None
+
+
+# ========== 构建：预压缩 + 指纹清单 ==========
+def precompress_file(full_path: str) -> list:
+    """生成 .br / .gz（比原文件小才保留），返回生成的文件"""
+    with open(full_path, "rb") as f:
+        body = f.read()
+
+    outputs = {".gz": gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        outputs[".br"] = brotli.compress(body, quality=11)
+
+    written = []
+    for suffix, data in outputs.items():
+        target = full_path + suffix
+        if len(data) >= len(body):
+            if os.path.exists(target):
+                os.remove(target)
+            continue
+        with open(target, "wb") as f:
+            f.write(data)
+        written.append(target)
+    return written
+
+
+def build_static(directory: str = STATIC_DIR) -> dict:
+    """遍历静态目录（跳过 uploads），生成预压缩文件和 manifest.json"""
+    manifest = {}
+    compressed = 0
+    for root, dirs, files in os.walk(directory):
+        rel_root = os.path.relpath(root, directory).replace(os.sep, "/")
+        if rel_root == "uploads" or rel_root.startswith(UPLOADS_PREFIX):
+            dirs[:] = []
+            continue
+        for name in files:
+            if name == MANIFEST_NAME or name.endswith(tuple(ENCODING_SUFFIXES.values())):
+                continue
+            full_path = os.path.join(root, name)
+            rel_path = os.path.relpath(full_path, directory).replace(os.sep, "/")
+            manifest[rel_path] = {
+                "hash": file_fingerprint(full_path),
+                "mtime": os.stat(full_path).st_mtime_ns,
+            }
+            if mimetypes.guess_type(name)[0] in COMPRESSIBLE_TYPES and \
+                    os.path.getsize(full_path) >= PRECOMPRESS_MIN_SIZE:
+                compressed += len(precompress_file(full_path))
+
+    with open(os.path.join(directory, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+    asset_manifest.reload()
+    return {"assets": len(manifest), "compressed": compressed}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="生成静态资源的 .br / .gz 和指纹清单")
+    parser.add_argument("--dir", default=STATIC_DIR)
+    args = parser.parse_args(argv)
+
+    result = build_static(args.dir)
+    print(f"✅ 静态资源 {result['assets']} 个，生成压缩文件 {result['compressed']} 个")
+
+
+if __name__ == "__main__":
+    main()
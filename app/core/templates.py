@@ -1,3 +1,71 @@
+# app/core/templates.py
+"""
+全局共享的模板环境：所有路由都从这里 import templates，只有一个 Jinja 环境和一份模板缓存
+
+- 编译结果写进文件系统字节码缓存（TEMPLATE_BYTECODE_DIR，默认系统临时目录），
+  进程重启后不用重新编译
+- TEMPLATE_PRELOAD=1（默认）时启动阶段把所有模板编译一遍，部署后第一次打开页面不用等编译
+- TEMPLATE_AUTO_RELOAD=0 时不再每次渲染都检查模板文件是否修改（线上可关）
+"""
+import os
+import time
+
 from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+from markupsafe import Markup, escape
+
+from app.core.static import static_url
+from app.service.storage import image_srcset, image_variant_url, variants_of
+
+TEMPLATE_DIR = "app/templates"
+TEMPLATE_BYTECODE_DIR = os.getenv("TEMPLATE_BYTECODE_DIR")
+TEMPLATE_PRELOAD = os.getenv("TEMPLATE_PRELOAD", "1") == "1"
+TEMPLATE_AUTO_RELOAD = os.getenv("TEMPLATE_AUTO_RELOAD", "1") == "1"
+
+
+def _bytecode_cache() -> FileSystemBytecodeCache:
+    if TEMPLATE_BYTECODE_DIR:
+        os.makedirs(TEMPLATE_BYTECODE_DIR, exist_ok=True)
+        return FileSystemBytecodeCache(TEMPLATE_BYTECODE_DIR)
+    return FileSystemBytecodeCache()
+
+
+def image_attrs(variants, fallback_url: str = "", size: str = "thumb", sizes: str = "100vw") -> Markup:
+    """
+    <img {{ image_attrs(photo.variants, photo.image, "medium", "(max-width: 640px) 100vw, 640px") }}>
+    输出 src（指定尺寸，没有时用原图）和 srcset / sizes（有两个以上尺寸时）
+    """
+    variants = variants or {}
+    src = (variants.get(size) or variants.get("full") or {}).get("url") or fallback_url
+    attrs = f'src="{escape(src)}"'
+    srcset = image_srcset(variants)
+    if srcset:
+        attrs += f' srcset="{escape(srcset)}" sizes="{escape(sizes)}"'
+    return Markup(attrs)
+
+
+env = Environment(
+    loader=FileSystemLoader(TEMPLATE_DIR),
+    autoescape=True,
+    auto_reload=TEMPLATE_AUTO_RELOAD,
+    bytecode_cache=_bytecode_cache(),
+    cache_size=-1,  # 模板数量有限，全部留在内存里
+)
+
+templates = Jinja2Templates(env=env)
+# {{ static_url("css/app.css") }} -> /static/css/app.css?v=<内容哈希>
+env.globals["static_url"] = static_url
+# {{ image_variant_url(photo.cloudinary_public_id, photo.format, 300, 300) }}，按 public_id 找存储后端
+env.globals["image_variant_url"] = image_variant_url
+env.globals["variants_of"] = variants_of
+env.globals["image_attrs"] = image_attrs
+
 
-templates = Jinja2Templates(directory="app/templates")
+def preload_templates() -> int:
+    """把所有模板编译进内存缓存（字节码缓存命中时只是反序列化），返回模板数"""
+    start = time.perf_counter()
+    names = env.list_templates(extensions=["html"])
+    for name in names:
+        env.get_template(name)
+    print(f"🧩 预编译模板 {len(names)} 个，耗时 {(time.perf_counter() - start) * 1000:.1f}ms")
+    return len(names)
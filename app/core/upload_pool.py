@@ -0,0 +1,141 @@
+# app/core/upload_pool.py
+"""
+上传专用线程池：Cloudinary SDK 是同步的，直接在 async 路由里调用会把整个事件循环卡住几秒
+
+- UPLOAD_MAX_WORKERS：同时进行的上传数（默认 4）
+- UPLOAD_QUEUE_LIMIT：线程都忙时最多排队几个，再多直接拒绝（默认 16）
+- UPLOAD_TIMEOUT：单次上传最长等待秒数（默认 60），超时后接口先返回，线程里的上传自己结束；
+  已经开始的上传没法中途打断，晚到的成功结果交给 on_abandoned 清理（比如登记删除），不留孤儿图片
+"""
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+UPLOAD_MAX_WORKERS = int(os.getenv("UPLOAD_MAX_WORKERS", "4"))
+UPLOAD_QUEUE_LIMIT = int(os.getenv("UPLOAD_QUEUE_LIMIT", "16"))
+UPLOAD_TIMEOUT = float(os.getenv("UPLOAD_TIMEOUT", "60"))
+
+
+class UploadPoolBusy(Exception):
+    """排队已满"""
+
+
+class _Job:
+    """一次上传：调用方放弃等待（超时）和线程里跑完，两边用锁对一下，结果不会两头落空"""
+    __slots__ = ("lock", "finished", "abandoned")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.finished = False
+        self.abandoned = False
+
+
+class UploadPool:
+    def __init__(self, max_workers: int = UPLOAD_MAX_WORKERS,
+                 queue_limit: int = UPLOAD_QUEUE_LIMIT, timeout: float = UPLOAD_TIMEOUT):
+        self.max_workers = max_workers
+        self.queue_limit = queue_limit
+        self.timeout = timeout
+        self._executor = None
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self._total_seconds = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # 第一次上传时才建线程；shutdown 之后再用会重新建一个
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="upload")
+            return self._executor
+
+    def _run(self, job: _Job, fn, args, kwargs, on_abandoned):
+        with self._lock:
+            self.queued -= 1
+            self.in_flight += 1
+        start = time.perf_counter()
+        ok = False
+        try:
+            result = fn(*args, **kwargs)
+            ok = True
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self._total_seconds += time.perf_counter() - start
+                if ok:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+
+        with job.lock:
+            abandoned = job.abandoned
+            job.finished = True
+        if abandoned and on_abandoned is not None:
+            # 调用方已经超时返回了，没人会用这个结果
+            try:
+                on_abandoned(result)
+            except Exception as e:
+                print(f"⚠️ 清理超时后才完成的上传失败: {e}")
+        return result
+
+    async def run(self, fn, *args, timeout: float = None, on_abandoned=None, **kwargs):
+        """
+        在上传线程里执行 fn，排队满了抛 UploadPoolBusy，超时抛 asyncio.TimeoutError
+        on_abandoned(result)：超时以后 fn 才成功时，在上传线程里用它的结果调用一次
+        """
+        with self._lock:
+            if self.queued + self.in_flight >= self.max_workers + self.queue_limit:
+                self.rejected += 1
+                raise UploadPoolBusy("上传的人太多了，请稍后再试")
+            self.queued += 1
+
+        job = _Job()
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._get_executor(), self._run, job, fn, args, kwargs, on_abandoned)
+
+        try:
+            # shield：超时只是不再等待，不取消已经开始的上传
+            return await asyncio.wait_for(asyncio.shield(future), timeout or self.timeout)
+        except asyncio.TimeoutError:
+            with job.lock:
+                finished = job.finished
+                job.abandoned = not finished
+            if finished:
+                # 刚好在超时的时候跑完了，结果还是交给调用方
+                return await future
+            with self._lock:
+                self.timeouts += 1
+            raise
+
+    def stats(self) -> dict:
+        with self._lock:
+            finished = self.completed + self.failed
+            return {
+                "max_workers": self.max_workers,
+                "queue_limit": self.queue_limit,
+                "timeout": self.timeout,
+                "queued": self.queued,
+                "in_flight": self.in_flight,
+                "completed": self.completed,
+                "failed": self.failed,
+                "timeouts": self.timeouts,
+                "rejected": self.rejected,
+                "avg_seconds": round(self._total_seconds / finished, 3) if finished else None,
+            }
+
+    def shutdown(self):
+        """停止接收新任务，排队中的取消，进行中的让它跑完"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self.queued = 0  # 排队中的会被取消，不会再执行
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+upload_pool = UploadPool()
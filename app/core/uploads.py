@@ -0,0 +1,132 @@
+# app/core/uploads.py
+"""
+上传文件的流式处理：不把整个文件读成 bytes
+
+- UploadSizeLimitMiddleware：multipart 请求边收边数字节，超过上限立刻 413，不等整个请求体传完
+  （没有 Content-Length 的分块上传也一样）
+- Starlette 解析表单时已经把文件分块写进 SpooledTemporaryFile（超过 1MB 落到临时文件）
+- spool_upload：分块检查大小，复制一份文件句柄交给存储后端（见 app/service/storage.py）
+
+UPLOAD_MAX_BYTES：单个文件上限（默认 10MB）
+UPLOAD_MAX_REQUEST_BYTES：整个 multipart 请求上限（默认单文件上限 + 1MB 表单字段）
+"""
+import os
+from tempfile import SpooledTemporaryFile
+from typing import BinaryIO, Tuple
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(10 * 1024 * 1024)))
+UPLOAD_MAX_REQUEST_BYTES = int(os.getenv("UPLOAD_MAX_REQUEST_BYTES", str(UPLOAD_MAX_BYTES + 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = 256 * 1024
+# 和 Starlette 表单解析一致：超过 1MB 的内容写到临时文件
+UPLOAD_SPOOL_SIZE = 1024 * 1024
+
+
+class UploadTooLarge(Exception):
+    def __init__(self, limit: int):
+        self.limit = limit
+        super().__init__(f"文件大小不能超过{limit / 1024 / 1024:.0f}MB")
+
+
+# ========== 请求体大小限制 ==========
+class UploadSizeLimitMiddleware:
+    def __init__(self, app, max_bytes: int = UPLOAD_MAX_REQUEST_BYTES):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        if not headers.get("content-type", "").startswith("multipart/form-data"):
+            await self.app(scope, receive, send)
+            return
+
+        # 声明的长度已经超了，直接拒绝，不读请求体
+        content_length = headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > self.max_bytes:
+            await self._reject(scope, receive, send)
+            return
+
+        received = 0
+        exceeded = False
+        response_started = False
+        replaced = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    exceeded = True
+                    raise UploadTooLarge(self.max_bytes)
+            return message
+
+        async def guarded_send(message):
+            nonlocal response_started, replaced
+            if replaced:
+                return
+            if exceeded and not response_started and message["type"] == "http.response.start":
+                # FastAPI 解析表单时会把 UploadTooLarge 包成 400，这里换成 413，丢掉原来的响应体
+                replaced = True
+                await self._reject(scope, receive, send)
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            if not exceeded or response_started or replaced:
+                raise
+            await self._reject(scope, receive, send)
+            return
+        if exceeded and not response_started and not replaced:
+            await self._reject(scope, receive, send)
+
+    async def _reject(self, scope, receive, send):
+        error = UploadTooLarge(UPLOAD_MAX_BYTES)
+        response = JSONResponse(status_code=413, content={"error": str(error)}, headers={"Connection": "close"})
+        await response(scope, receive, send)
+
+
+# ========== 文件句柄 ==========
+def _copy_limited(source: BinaryIO, target: BinaryIO, max_bytes: int) -> int:
+    size = 0
+    while True:
+        chunk = source.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            return size
+        size += len(chunk)
+        if size > max_bytes:
+            raise UploadTooLarge(max_bytes)
+        target.write(chunk)
+
+
+def _spool(file: UploadFile, max_bytes: int) -> Tuple[BinaryIO, int]:
+    # 已知大小超限的不用复制
+    if file.size is not None and file.size > max_bytes:
+        raise UploadTooLarge(max_bytes)
+    # 复制一份自己的：UploadFile 的句柄在响应发出后会被 FastAPI 关掉，
+    # 上传超时后线程还在读的话会读到一半失败
+    spool = SpooledTemporaryFile(max_size=UPLOAD_SPOOL_SIZE)
+    try:
+        file.file.seek(0)
+        size = _copy_limited(file.file, spool, max_bytes)
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool, size
+
+
+async def spool_upload(file: UploadFile, max_bytes: int = UPLOAD_MAX_BYTES) -> Tuple[BinaryIO, int]:
+    """返回 (可读的文件句柄, 字节数)，超过上限抛 UploadTooLarge；句柄是单独复制的，用完由调用方关闭"""
+    return await run_in_threadpool(_spool, file, max_bytes)
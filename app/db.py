@@ -1,6 +1,12 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
+from fastapi import Request
 import os
+import time
+
+from app.db_pool import pool_options, InstrumentedQueuePool, InstrumentedAsyncQueuePool
+from app.db_sqlite import install_sqlite_pragmas
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 print("当前 DATABASE_URL:", DATABASE_URL)
@@ -8,19 +14,141 @@ if not DATABASE_URL:
     # 本地开发
     DATABASE_URL = "sqlite:///./todo.db"
 
+
+def to_async_url(url: str) -> str:
+    """把同步驱动的连接串换成对应的异步驱动（sqlite -> aiosqlite, postgres -> asyncpg）"""
+    if url.startswith("sqlite:///"):
+        return url.replace("sqlite:///", "sqlite+aiosqlite:///", 1)
+
+    for prefix in ("postgres://", "postgresql://", "postgresql+psycopg2://"):
+        if url.startswith(prefix):
+            url = url.replace(prefix, "postgresql+asyncpg://", 1)
+            # asyncpg 不认识 libpq 的 sslmode 参数
+            return url.replace("sslmode=", "ssl=")
+
+    return url
+
+
+# 异步连接串，可以单独用 ASYNC_DATABASE_URL 覆盖
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(DATABASE_URL)
+
+# 只读副本（可选）：GET 路由走副本，写操作始终走主库
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL")
+# 用户自己写入后的这段时间内，读请求仍然走主库，避免复制延迟导致“刚上传的照片看不到”
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "10"))
+
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+
+# 连接池配置（内存 SQLite 只能用单连接池，不走这些参数）
+POOL_OPTIONS = pool_options() if ":memory:" not in DATABASE_URL else {}
+
 engine = create_engine(
     DATABASE_URL,
-    connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
+    connect_args={"check_same_thread": False} if IS_SQLITE else {},
+    **(dict(poolclass=InstrumentedQueuePool, **POOL_OPTIONS) if POOL_OPTIONS else {})
+)
+
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    **(dict(poolclass=InstrumentedAsyncQueuePool, **POOL_OPTIONS) if POOL_OPTIONS else {})
 )
 
+# 只读连接：默认和主引擎共用；
+# 配置了 DATABASE_READ_URL 时走只读副本；
+# SQLite 下设置 SQLITE_READ_POOL=1 时，读请求走一个单独的只读连接池，不再和写请求抢连接；
+# 池子大小默认和 anyio 线程池的线程数（40）一致，同步路由最多也就这么多并发
+read_engine = engine
+async_read_engine = async_engine
+if DATABASE_READ_URL:
+    read_engine = create_engine(
+        DATABASE_READ_URL,
+        **(dict(poolclass=InstrumentedQueuePool, **POOL_OPTIONS) if POOL_OPTIONS else {})
+    )
+    async_read_engine = create_async_engine(
+        os.getenv("ASYNC_DATABASE_READ_URL") or to_async_url(DATABASE_READ_URL),
+        **(dict(poolclass=InstrumentedAsyncQueuePool, **POOL_OPTIONS) if POOL_OPTIONS else {})
+    )
+elif IS_SQLITE and os.getenv("SQLITE_READ_POOL", "0") == "1":
+    read_engine = create_engine(
+        DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        poolclass=InstrumentedQueuePool,
+        pool_size=int(os.getenv("SQLITE_READ_POOL_SIZE", "40")),
+        max_overflow=0,
+        pool_timeout=POOL_OPTIONS.get("pool_timeout", 30),
+    )
+    install_sqlite_pragmas(read_engine, read_only=True)
+
+if IS_SQLITE:
+    install_sqlite_pragmas(engine)
+    install_sqlite_pragmas(async_engine.sync_engine)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+# expire_on_commit=False：异步里提交后再访问属性会触发隐式IO，直接报错
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+AsyncReadSessionLocal = async_sessionmaker(
+    bind=async_read_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
 Base = declarative_base()
 
 
+# 读写分离：写请求在 session 里记一个截止时间，之前的读请求都回主库
+PRIMARY_UNTIL_KEY = "_db_primary_until"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def mark_write(request: Request):
+    """非 GET 请求拿主库会话时，开启 read-your-writes 窗口"""
+    if request.method in SAFE_METHODS or "session" not in request.scope:
+        return
+    if read_engine is not engine:
+        request.session[PRIMARY_UNTIL_KEY] = time.time() + READ_YOUR_WRITES_SECONDS
+
+
+def prefers_primary(request: Request) -> bool:
+    """当前用户最近写过数据，读请求需要走主库"""
+    if "session" not in request.scope:
+        return False
+    return request.session.get(PRIMARY_UNTIL_KEY, 0) > time.time()
+
+
 # FastAPI 依赖
-def get_db():
+def get_db(request: Request):
+    mark_write(request)
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+# FastAPI 依赖：只读路由用，不要在这个会话里写数据
+def get_read_db(request: Request):
+    db = SessionLocal() if prefers_primary(request) else ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+# FastAPI 异步依赖：用于 async def 路由，数据库IO不占用线程池
+async def get_async_db(request: Request):
+    mark_write(request)
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# FastAPI 异步只读依赖：GET 路由走只读副本
+async def get_async_read_db(request: Request):
+    session_factory = AsyncSessionLocal if prefers_primary(request) else AsyncReadSessionLocal
+    async with session_factory() as db:
+        yield db
@@ -0,0 +1,147 @@
+# app/db_schema.py
+import hashlib
+import json
+import os
+import time
+from datetime import datetime
+
+from sqlalchemy import text, inspect, select
+
+from app.db import Base, engine, IS_SQLITE
+from app.models import SchemaMeta
+
+FINGERPRINT_KEY = "schema_fingerprint"
+
+# 老库里图片地址存在 image 列，补 image_url 列时把旧数据复制过来
+LEGACY_COLUMNS = {
+    ("moments", "image_url"): "image",
+    ("album_photos", "image_url"): "image",
+}
+
+
+def schema_fingerprint(metadata=Base.metadata) -> str:
+    """根据模型定义（表、列、类型、索引）算出指纹，模型不变指纹就不变"""
+    tables = {}
+    for table in metadata.sorted_tables:
+        tables[table.name] = {
+            "columns": sorted(
+                (col.name, str(col.type), bool(col.nullable)) for col in table.columns
+            ),
+            "indexes": sorted(index.name for index in table.indexes),
+        }
+    payload = json.dumps(tables, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def read_catalog(conn) -> dict:
+    """一次查询读出数据库里现有的表和列：{表名: {列名}}"""
+    if IS_SQLITE:
+        rows = conn.execute(text("""
+            SELECT m.name, p.name
+            FROM sqlite_master AS m
+            JOIN pragma_table_info(m.name) AS p
+            WHERE m.type = 'table'
+        """))
+    elif conn.dialect.name == "postgresql":
+        rows = conn.execute(text("""
+            SELECT table_name, column_name
+            FROM information_schema.columns
+            WHERE table_schema = current_schema()
+        """))
+    else:
+        inspector = inspect(conn)
+        rows = [
+            (table_name, col["name"])
+            for table_name in inspector.get_table_names()
+            for col in inspector.get_columns(table_name)
+        ]
+
+    catalog = {}
+    for table_name, column_name in rows:
+        catalog.setdefault(table_name, set()).add(column_name)
+    return catalog
+
+
+def stored_fingerprint(conn):
+    """schema_meta 里记录的指纹；表还不存在时返回 None"""
+    try:
+        return conn.execute(
+            select(SchemaMeta.value).where(SchemaMeta.key == FINGERPRINT_KEY)
+        ).scalar()
+    except Exception:
+        return None
+
+
+def repair_schema(conn, catalog: dict) -> bool:
+    """按模型补齐缺失的表、列和索引；有索引没建成功时返回 False"""
+    ok = True
+    # 缺的表（连同它们的索引）直接建
+    missing_tables = [t for t in Base.metadata.sorted_tables if t.name not in catalog]
+    if missing_tables:
+        Base.metadata.create_all(bind=conn, tables=missing_tables)
+        print(f"  ➕ 创建表: {', '.join(t.name for t in missing_tables)}")
+
+    for table in Base.metadata.sorted_tables:
+        existing = catalog.get(table.name)
+        if existing is None:
+            continue
+
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            # 已有数据的表只能加可空列，约束交给 alembic
+            column_type = column.type.compile(dialect=conn.dialect)
+            conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {column_type}'))
+            print(f"  ➕ 添加 {table.name}.{column.name}")
+
+            old_column = LEGACY_COLUMNS.get((table.name, column.name))
+            if old_column and old_column in existing:
+                conn.execute(text(
+                    f'UPDATE {table.name} SET "{column.name}" = "{old_column}" '
+                    f'WHERE "{old_column}" IS NOT NULL AND "{column.name}" IS NULL'
+                ))
+                print(f"  📦 迁移 {old_column} -> {column.name}")
+
+        # 表已存在时 create_all 不会补索引
+        for index in table.indexes:
+            try:
+                with conn.begin_nested():
+                    index.create(bind=conn, checkfirst=True)
+            except Exception as e:
+                print(f"  ⚠️ 创建索引 {index.name} 失败: {e}")
+                ok = False
+
+    return ok
+
+
+def ensure_schema(force: bool = False) -> bool:
+    """
+    启动时的表结构检查：指纹和模型一致就直接返回，不做任何表结构查询；
+    不一致（或 SCHEMA_CHECK=force）时读一次数据库目录，补齐缺失部分后写回指纹。
+    返回是否执行了修复。
+    """
+    start = time.perf_counter()
+    expected = schema_fingerprint()
+    force = force or os.getenv("SCHEMA_CHECK", "").lower() == "force"
+
+    with engine.connect() as conn:
+        if not force and stored_fingerprint(conn) == expected:
+            print(f"✅ 表结构指纹一致，跳过检查 ({(time.perf_counter() - start) * 1000:.1f}ms)")
+            return False
+
+    print("🔧 表结构指纹不一致，开始检查...")
+    with engine.begin() as conn:
+        if not repair_schema(conn, read_catalog(conn)):
+            # 不写指纹，下次启动再检查
+            print("⚠️ 表结构未完全修复，请检查数据后重启或运行 alembic upgrade")
+            return True
+
+        row = conn.execute(select(SchemaMeta).where(SchemaMeta.key == FINGERPRINT_KEY)).first()
+        values = {"value": expected, "updated_at": datetime.now()}
+        if row:
+            conn.execute(SchemaMeta.__table__.update().where(SchemaMeta.key == FINGERPRINT_KEY).values(**values))
+        else:
+            conn.execute(SchemaMeta.__table__.insert().values(key=FINGERPRINT_KEY, **values))
+
+    print(f"✅ 表结构检查完成 ({(time.perf_counter() - start) * 1000:.1f}ms)")
+    return True
@@ -1,20 +1,48 @@
+from typing import Optional
+
 from fastapi import Request, HTTPException
-from sqlalchemy.orm import Session
-from app.db import get_db
+from app.db import AsyncSessionLocal
 from app.models import User
-from fastapi import Depends
+from app.core.identity import identity_cache
+
+_UNSET = object()
+
+
+async def load_current_user(request: Request) -> Optional[User]:
+    """
+    当前登录用户：先看本次请求里是否已经取过，再看进程级身份缓存，都没有才查库
+    未登录或用户不存在时返回 None
+    """
+    cached = getattr(request.state, "current_user", _UNSET)
+    if cached is not _UNSET:
+        return cached
+
+    user = None
+    user_id = request.session.get("user_id")
+    if user_id:
+        user = identity_cache.get(user_id)
+        if user is None:
+            async with AsyncSessionLocal() as db:
+                user = await db.get(User, user_id)
+            if user is not None:
+                identity_cache.set(user)
+
+    request.state.current_user = user
+    return user
 
 
-def get_current_user(
-    request: Request,
-    db: Session = Depends(get_db)
-) -> User:
+async def get_current_user(request: Request) -> User:
     user_id = request.session.get("user_id")
     if not user_id:
         raise HTTPException(status_code=401, detail="未登录")
 
-    user = db.query(User).get(user_id)
+    user = await load_current_user(request)
     if not user:
         raise HTTPException(status_code=401, detail="用户不存在")
 
     return user
+
+
+async def get_optional_user(request: Request) -> Optional[User]:
+    """页面路由用：未登录时返回 None，由路由自己跳转登录页"""
+    return await load_current_user(request)
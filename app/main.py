@@ -1,6 +1,6 @@
 from pathlib import Path
 from dotenv import load_dotenv
-from app.db import Base, engine, SessionLocal
+from app.db import engine, async_engine, async_read_engine, read_engine, SessionLocal
 from app.models import User,Couple
 from app.api.weather import router as weather_router
 from app.api.page import router as page_router
@@ -9,38 +9,44 @@ from app.api.todo import router as todo_router
 from app.api.love import router as love_router
 from app.api.auth import router as auth_router
 from app.api import memory
-from app.db_migration import run_migrations
-from app.init_db import init_database
+from app.db_schema import ensure_schema
+from app.service.weather_service import weather_provider
+from app.service.memory_service import run_anniversary_rollover, anniversary_rollover_loop
+from app.service.deletion_service import deletion_worker_loop
+from app.service.couple_stats_service import ensure_stats
+from app.core.templates import TEMPLATE_PRELOAD, preload_templates
 # from app.api import anniversary
 from app.api import auth, todo, page, weather, couple
 from starlette.middleware.sessions import SessionMiddleware
+from app.core.compression import CompressionMiddleware
+import asyncio
 import logging
 import time
 import os
-from fastapi.staticfiles import StaticFiles
+from app.core.static import CachedStaticFiles
+from app.core.upload_pool import upload_pool
+from app.core.uploads import UploadSizeLimitMiddleware
 from app.api import album
 from app.api import moment
 from app.api import couple
+from app.api import ops
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 
 app = FastAPI(title="Couple Todo Service")
-os.makedirs("static/uploads/moments", exist_ok=True)
-# 尝试两种配置方式
-try:
-    app.mount("/static", StaticFiles(directory="static"), name="static")
-    print("✅ 静态文件配置: static")
-except:
-    try:
-        app.mount("/static", StaticFiles(directory="app/static"), name="static")
-        print("✅ 静态文件配置: app/static")
-    except Exception as e:
-        print(f"❌ 静态文件配置失败: {e}")
+UPLOAD_DIRS = ("static/uploads/moments", "static/uploads/memory")
+# 上传目录在 startup 里创建；check_dir=False 让挂载不依赖目录已存在
+# 上传文件 immutable 缓存，其它资源带指纹或用 ETag 确认，有 .br / .gz 时直接发（python -m app.core.static 生成）
+app.mount("/static", CachedStaticFiles(directory="static", check_dir=False), name="static")
 app.add_middleware(
     SessionMiddleware,
     secret_key="love-secret-key"  # 开发期写死没问题
 )
+# 响应压缩（br / gzip），加在最后所以在 session 外层
+app.add_middleware(CompressionMiddleware)
+# multipart 请求体边收边计数，超过上传上限直接 413，放在最外层
+app.add_middleware(UploadSizeLimitMiddleware)
 BASE_DIR = Path(__file__).parent
 # 注册路由
 app.include_router(todo_router)
@@ -55,8 +61,7 @@ app.include_router(album.router)
 app.include_router(memory.router, tags=["纪念日"])
 # app.include_router(anniversary.router)
 app.include_router(couple.router,tags=["Couple Photos"])
-# 建表
-Base.metadata.create_all(bind=engine)
+app.include_router(ops.router)
 load_dotenv()
 # 种子数据（开发期）
 def init_demo_data():
@@ -78,51 +83,81 @@ def init_demo_data():
         db.commit()
     db.close()
 
-# 或者用try-except包裹
-try:
-    init_demo_data()
-except Exception as e:
-    print(f"⚠️ 初始化数据失败: {e}")
-    print("应用继续启动，不影响主要功能")
 print("Cloud Name:", os.getenv("CLOUDINARY_CLOUD_NAME"))
 
 
 @app.on_event("startup")
 async def startup_event():
     """应用启动时执行"""
+    start = time.perf_counter()
     print("🚀 应用启动中...")
-    # 修复数据库
-    try:
-        from app.db_fix import fix_database
-        if fix_database():
-            print("✅ 数据库修复成功")
-        else:
-            print("⚠️ 数据库修复可能失败，应用将继续启动")
-    except Exception as e:
-        print(f"⚠️ 数据库修复异常: {e}")
 
-    print("✅ 应用启动完成")
-    run_migrations()  # 添加这行
-    # 打印环境变量检查
-    import os
-    print(f"Cloud Name: {os.getenv('CLOUDINARY_CLOUD_NAME', '未设置')}")
+    for upload_dir in UPLOAD_DIRS:
+        os.makedirs(upload_dir, exist_ok=True)
 
-    # 初始化数据库（捕获所有异常，不影响启动）
+    # 表结构检查：指纹一致时只查一次 schema_meta，不一致才建表/补列
     try:
-        init_database()
-        print("✅ 数据库初始化完成")
+        ensure_schema()
     except Exception as e:
-        print(f"⚠️ 数据库初始化警告: {e}")
+        print(f"⚠️ 表结构检查失败: {e}")
         # 继续启动，可能表已经存在
 
-    # 不再调用 init_demo_data()，或者用更安全的方式
     try:
-        # from app.init_data import init_demo_data
         init_demo_data()
         print("✅ 示例数据初始化完成")
     except Exception as e:
         print(f"⚠️ 示例数据初始化失败: {e}")
         # 继续启动，不影响主要功能
+
+    # 合照统计汇总表：老库第一次启动时按照片生成
+    db = SessionLocal()
+    try:
+        ensure_stats(db)
+    except Exception as e:
+        print(f"⚠️ 合照统计汇总生成失败: {e}")
+    finally:
+        db.close()
+
+    # 纪念日的下一个周年日：启动时补一次，之后每天零点滚动
+    try:
+        await run_anniversary_rollover()
+    except Exception as e:
+        print(f"⚠️ 纪念日滚动更新失败: {e}")
+    app.state.anniversary_task = asyncio.create_task(anniversary_rollover_loop())
+
+    # 远端图片的后台删除队列（删除接口只登记，这里批量删除、失败重试）
+    app.state.deletion_task = asyncio.create_task(deletion_worker_loop())
+
+    # 模板提前编译，部署后第一次打开页面不用等
+    if TEMPLATE_PRELOAD:
+        try:
+            preload_templates()
+        except Exception as e:
+            print(f"⚠️ 模板预编译失败: {e}")
+
+    # 天气在后台拉取并缓存，首页只读缓存
+    await weather_provider.start()
+
+    print(f"✅ 应用启动完成，耗时 {time.perf_counter() - start:.3f}s")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """关闭连接池，异步引擎需要在事件循环里释放"""
+    await weather_provider.stop()
+    app.state.anniversary_task.cancel()
+    app.state.deletion_task.cancel()
+    upload_pool.shutdown()
+
+    await async_engine.dispose()
+    if async_read_engine is not async_engine:
+        await async_read_engine.dispose()
+
+    engine.dispose()
+    if read_engine is not engine:
+        read_engine.dispose()
+
+
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
     start_time = time.time()
@@ -1,6 +1,6 @@
 import enum
 
-from sqlalchemy import Text, DateTime, Column, Integer, String, Boolean, Date, ForeignKey, Enum
+from sqlalchemy import Text, DateTime, Column, Integer, String, Boolean, Date, ForeignKey, Enum, Index, JSON, event, inspect
 from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import relationship
 
@@ -8,6 +8,23 @@ from app.db import Base
 from datetime import datetime, date
 
 
+def anniversary_in_year(memory_date: date, year: int) -> date:
+    """某一年的周年日；2 月 29 日在平年算 2 月 28 日"""
+    try:
+        return memory_date.replace(year=year)
+    except ValueError:
+        return memory_date.replace(year=year, day=28)
+
+
+def next_anniversary_of(memory_date: date, today: date = None) -> date:
+    """今天或之后的下一个周年日"""
+    today = today or date.today()
+    this_year = anniversary_in_year(memory_date, today.year)
+    if this_year >= today:
+        return this_year
+    return anniversary_in_year(memory_date, today.year + 1)
+
+
 class User(Base):
     __tablename__ = "users"
 
@@ -49,8 +66,10 @@ class Moment(Base):
     width = Column(Integer, nullable=True)  # 图片宽度
     height = Column(Integer, nullable=True)  # 图片高度
     bytes = Column(Integer, nullable=True)  # 文件大小
+    image_variants = Column(JSON, nullable=True)  # 缩略图等尺寸变体：{"thumb": {"url", "width", "height"}, ...}
 
-    created_at = Column(DateTime, default=datetime.now)
+    created_at = Column(DateTime, default=datetime.now, index=True)  # 动态流按时间倒序
+    updated_at = Column(DateTime, nullable=True, default=datetime.now, onupdate=datetime.now)
 class AlbumPhoto(Base):
     __tablename__ = "album_photos"
 
@@ -59,12 +78,13 @@ class AlbumPhoto(Base):
 
     memory = Column(String, nullable=False)     # 一句话回忆
     location = Column(String, nullable=True)    # 地点
-    shoot_date = Column(DateTime, nullable=False)  # 拍摄日期
+    shoot_date = Column(DateTime, nullable=False, index=True)  # 拍摄日期（时光轴排序）
 
     # Cloudinary存储
     cloudinary_public_id = Column(String(255), nullable=True)  # Cloudinary的图片ID
     image_url = Column(String(500))  # Cloudinary的图片URL
     format = Column(String(10), nullable=True)  # 图片格式
+    image_variants = Column(JSON, nullable=True)  # 缩略图等尺寸变体：{"thumb": {"url", "width", "height"}, ...}
 
     created_at = Column(DateTime, default=datetime.now)
 
@@ -76,7 +96,7 @@ class AlbumComment(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     # 🌟 关键：必须有外键约束
-    photo_id = Column(Integer, ForeignKey("album_photos.id", ondelete="CASCADE"))  # 重要！
+    photo_id = Column(Integer, ForeignKey("album_photos.id", ondelete="CASCADE"), index=True)  # 重要！
     user = Column(String, index=True)       # me / her
     content = Column(Text)
     created_at = Column(DateTime, default=datetime.now)
@@ -101,6 +121,7 @@ class CouplePhoto(Base):
     width = Column(Integer, nullable=True)  # 图片宽度
     height = Column(Integer, nullable=True)  # 图片高度
     bytes = Column(Integer, nullable=True)  # 文件大小
+    image_variants = Column(JSON, nullable=True)  # 缩略图等尺寸变体：{"thumb": {"url", "width", "height"}, ...}
 
     # 元数据
     taken_date = Column(Date, nullable=True)  # 拍摄日期
@@ -115,6 +136,42 @@ class CouplePhoto(Base):
     likes = relationship("CouplePhotoLike", back_populates="photo", cascade="all, delete-orphan")
     comments = relationship("CouplePhotoComment", back_populates="photo", cascade="all, delete-orphan")
 
+    # 照片墙：按用户筛选，按拍摄日期、创建时间倒序（空值在最后，和 couple_service 的排序、游标一致）
+    __table_args__ = (
+        Index("ix_couple_photos_owner_taken_created", owner_id,
+              taken_date.desc().nulls_last(), created_at.desc().nulls_last()),
+    )
+
+
+class CouplePhotoStats(Base):
+    """合照统计汇总：每个用户每个拍摄年份一行，和照片的增删改在同一个事务里更新"""
+    __tablename__ = "couple_photo_stats"
+
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    year = Column(Integer, primary_key=True)  # 拍摄年份；没有拍摄日期的旧数据记为 0
+    photo_count = Column(Integer, nullable=False, default=0)
+    favorite_count = Column(Integer, nullable=False, default=0)
+    earliest_date = Column(Date, nullable=True)
+    latest_date = Column(Date, nullable=True)
+
+
+class PendingDeletion(Base):
+    """待删除的远端图片：和业务数据的删除在同一个事务里写入，后台批量删除，失败按退避重试"""
+    __tablename__ = "pending_deletions"
+
+    id = Column(Integer, primary_key=True)
+    backend = Column(String(20), nullable=False)  # cloudinary / local
+    public_id = Column(String(255), nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=True, default=datetime.now)  # 为空表示重试次数用完，不再处理
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.now)
+
+    __table_args__ = (
+        Index("ix_pending_deletions_next_attempt_at", next_attempt_at),
+    )
+
+
 class MemoryDay(Base):
     """纪念日主表 - 时间锚点"""
     __tablename__ = "memory_days"
@@ -129,6 +186,8 @@ class MemoryDay(Base):
     is_annual = Column(Boolean, default=True)  # 是否每年重复
     is_public = Column(Boolean, default=True)  # 是否公开
     owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
+    # 下一个周年日：写入时计算，每天凌晨的任务把已经过去的往后推一年；非每年重复的为空
+    next_anniversary_date = Column(Date, nullable=True)
     created_at = Column(DateTime, default=datetime.now)
     updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
 
@@ -139,6 +198,12 @@ class MemoryDay(Base):
                              cascade="all, delete-orphan",
                              order_by="desc(MemorySnapshot.year)")
 
+    # 按用户 + 类型筛选纪念日；按用户查即将到来的纪念日（范围查询）
+    __table_args__ = (
+        Index("ix_memory_days_owner_id_type", owner_id, type),
+        Index("ix_memory_days_owner_next_anniversary", owner_id, next_anniversary_date),
+    )
+
     def __repr__(self):
         return f"<MemoryDay {self.title} ({self.date})>"
 
@@ -158,23 +223,37 @@ class MemoryDay(Base):
             years -= 1
         return max(0, years)
 
-    @hybrid_property
-    def next_anniversary_date(self):
-        """下一个周年纪念日"""
-        today = date.today()
-        this_year = self.date.replace(year=today.year)
-
-        if this_year >= today:
-            return this_year
+    def refresh_next_anniversary(self, today: date = None):
+        """重新计算 next_anniversary_date"""
+        if self.is_annual is False or not self.date:
+            self.next_anniversary_date = None
         else:
-            return this_year.replace(year=today.year + 1)
+            self.next_anniversary_date = next_anniversary_of(self.date, today)
 
     @hybrid_property
     def days_to_next_anniversary(self):
         """距离下一个周年纪念日的天数"""
         if not self.is_annual:
             return None
-        return (self.next_anniversary_date - date.today()).days
+        today = date.today()
+        next_date = self.next_anniversary_date
+        # 每日任务还没跑到时现算
+        if next_date is None or next_date < today:
+            next_date = next_anniversary_of(self.date, today)
+        return (next_date - today).days
+
+
+@event.listens_for(MemoryDay, "before_insert")
+def _set_next_anniversary(mapper, connection, target):
+    target.refresh_next_anniversary()
+
+
+@event.listens_for(MemoryDay, "before_update")
+def _update_next_anniversary(mapper, connection, target):
+    # 只有日期或是否每年重复变了才重算，每日任务自己设置的值不覆盖
+    state = inspect(target)
+    if state.attrs.date.history.has_changes() or state.attrs.is_annual.history.has_changes():
+        target.refresh_next_anniversary()
 
 
 class MemorySnapshot(Base):
@@ -191,10 +270,16 @@ class MemorySnapshot(Base):
     location = Column(String(100), nullable=True)  # 地点
     created_by = Column(String(20))  # 谁添加的
     created_at = Column(DateTime, default=datetime.now)
+    updated_at = Column(DateTime, nullable=True, default=datetime.now, onupdate=datetime.now)
 
     # 关系
     memory_day = relationship("MemoryDay", back_populates="snapshots")
 
+    # 每个纪念日每年只有一条年轮记录
+    __table_args__ = (
+        Index("uq_memory_snapshots_memory_day_id_year", memory_day_id, year, unique=True),
+    )
+
     def __repr__(self):
         return f"<MemorySnapshot {self.year}: {self.note[:30]}>"
 
@@ -224,4 +309,12 @@ class CouplePhotoComment(Base):
 
     # 关系
     photo = relationship("CouplePhoto", back_populates="comments")
-    user = relationship("User")
\ No newline at end of file
+    user = relationship("User")
+
+class SchemaMeta(Base):
+    """表结构指纹等元数据，启动时用来判断是否需要检查/修复表结构"""
+    __tablename__ = "schema_meta"
+
+    key = Column(String(50), primary_key=True)
+    value = Column(String(255), nullable=False)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
@@ -0,0 +1,133 @@
+# app/service/album_service.py
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from sqlalchemy import select, func, extract, desc
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import AlbumPhoto, AlbumComment
+from app.service.storage import variants_of
+
+# 时光轴页面首屏渲染的月份数 / 每个月每页的照片数
+MONTHS_PER_PAGE = 3
+PHOTOS_PER_MONTH = 20
+
+
+def parse_month(month: str) -> Tuple[int, int]:
+    """'2024-05' -> (2024, 5)"""
+    try:
+        year, mon = (int(part) for part in month.split("-"))
+        datetime(year, mon, 1)
+    except (TypeError, ValueError):
+        raise ValueError("月份格式应为 YYYY-MM")
+    return year, mon
+
+
+def month_range(year: int, month: int) -> Tuple[datetime, datetime]:
+    """某个月的 [开始, 下个月开始)，走 shoot_date 索引做范围查询"""
+    start = datetime(year, month, 1)
+    end = datetime(year + 1, 1, 1) if month == 12 else datetime(year, month + 1, 1)
+    return start, end
+
+
+async def get_album_months(db: AsyncSession) -> List[dict]:
+    """所有有照片的月份及照片数，按时间倒序（一次分组查询）"""
+    year_col = extract("year", AlbumPhoto.shoot_date)
+    month_col = extract("month", AlbumPhoto.shoot_date)
+    rows = (await db.execute(
+        select(year_col.label("year"), month_col.label("month"), func.count(AlbumPhoto.id).label("count"))
+        .group_by(year_col, month_col)
+        .order_by(desc(year_col), desc(month_col))
+    )).all()
+
+    return [
+        {"month": f"{int(row.year):04d}-{int(row.month):02d}", "count": row.count}
+        for row in rows
+    ]
+
+
+async def get_album_summary(db: AsyncSession) -> dict:
+    """照片总数和上传过照片的人数"""
+    row = (await db.execute(
+        select(func.count(AlbumPhoto.id), func.count(func.distinct(AlbumPhoto.user)))
+    )).one()
+    return {"photos_count": row[0], "users_count": row[1]}
+
+
+async def get_month_photos(
+        db: AsyncSession,
+        year: int,
+        month: int,
+        page: int = 1,
+        per_page: int = PHOTOS_PER_MONTH
+) -> Tuple[List[AlbumPhoto], bool]:
+    """某个月的一页照片，返回 (照片列表, 是否还有下一页)"""
+    start, end = month_range(year, month)
+    photos = (await db.scalars(
+        select(AlbumPhoto)
+        .where(AlbumPhoto.shoot_date >= start, AlbumPhoto.shoot_date < end)
+        .order_by(desc(AlbumPhoto.shoot_date), desc(AlbumPhoto.id))
+        .offset((page - 1) * per_page)
+        .limit(per_page + 1)
+    )).all()
+
+    return list(photos[:per_page]), len(photos) > per_page
+
+
+async def get_comments_for_photos(db: AsyncSession, photo_ids: List[int]) -> Dict[int, List[AlbumComment]]:
+    """只查当前页照片的评论（一次 IN 查询）"""
+    comment_map = defaultdict(list)
+    if not photo_ids:
+        return comment_map
+
+    comments = (await db.scalars(
+        select(AlbumComment)
+        .where(AlbumComment.photo_id.in_(photo_ids))
+        .order_by(AlbumComment.created_at, AlbumComment.id)
+    )).all()
+    for c in comments:
+        comment_map[c.photo_id].append(c)
+    return comment_map
+
+
+def photo_to_dict(p: AlbumPhoto) -> dict:
+    return {
+        "id": p.id,
+        "user": p.user,
+        "image": p.image_url,  # 使用Cloudinary的图片URL
+        "shoot_date": p.shoot_date,
+        "memory": p.memory,
+        "location": p.location,
+        "public_id": p.cloudinary_public_id,  # 用于删除操作
+        "format": p.format,
+        "variants": variants_of(p),
+        "created_at": p.created_at
+    }
+
+
+def comment_to_dict(c: AlbumComment) -> dict:
+    return {
+        "id": c.id,
+        "user": c.user,
+        "content": c.content,
+        "created_at": c.created_at.strftime("%Y-%m-%d %H:%M:%S") if c.created_at else None
+    }
+
+
+async def get_month_items(
+        db: AsyncSession,
+        year: int,
+        month: int,
+        page: int = 1,
+        per_page: int = PHOTOS_PER_MONTH
+) -> Tuple[List[dict], bool]:
+    """时光轴上某个月的一页：[{photo, comments}]，是否还有下一页"""
+    photos, has_more = await get_month_photos(db, year, month, page, per_page)
+    comment_map = await get_comments_for_photos(db, [p.id for p in photos])
+
+    items = [
+        {"photo": photo_to_dict(p), "comments": comment_map.get(p.id, [])}
+        for p in photos
+    ]
+    return items, has_more
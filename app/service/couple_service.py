@@ -1,9 +1,14 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, and_
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import desc, and_, or_, select, func, extract
 from datetime import datetime, date
 from typing import Optional, Tuple, List
+from app.core.pagination import encode_cursor, decode_cursor
 from app.models import CouplePhoto, User
-from app.service.image_service  import CloudinaryService  # 新增导入
+from app.service.deletion_service import enqueue_deletion
+from app.service.couple_stats_service import (
+    add_photo_to_stats, remove_photo_from_stats, change_favorite_in_stats, read_user_stats
+)
 import os
 
 
@@ -19,7 +24,8 @@ def create_photo(
         caption: str = "",
         memory: str = "",
         location: str = "",
-        taken_date: Optional[date] = None
+        taken_date: Optional[date] = None,
+        image_variants: Optional[dict] = None
 ) -> CouplePhoto:
     """
     创建合照记录（使用Cloudinary）
@@ -32,13 +38,16 @@ def create_photo(
         width=width,
         height=height,
         bytes=bytes,
+        image_variants=image_variants,
         caption=caption,
         memory=memory,
         location=location,
-        taken_date=taken_date or datetime.now().date()
+        taken_date=taken_date or datetime.now().date(),
+        is_favorite=False
     )
 
     db.add(photo)
+    add_photo_to_stats(db, user_id, photo.taken_date, photo.is_favorite)
     db.commit()
     db.refresh(photo)
     return photo
@@ -46,7 +55,7 @@ def create_photo(
 
 def delete_photo(db: Session, photo_id: int, user_id: int) -> Tuple[bool, str]:
     """
-    删除合照（同时删除Cloudinary上的图片）
+    删除合照（Cloudinary 上的图片由后台删除队列删除）
     """
     photo = db.query(CouplePhoto).filter(
         CouplePhoto.id == photo_id,
@@ -57,15 +66,13 @@ def delete_photo(db: Session, photo_id: int, user_id: int) -> Tuple[bool, str]:
         return False, "照片不存在或无权删除"
 
     try:
-        # 从Cloudinary删除图片
-        if photo.cloudinary_public_id:
-            delete_result = CloudinaryService.delete_image(photo.cloudinary_public_id)
-            if not delete_result.get("success"):
-                # 记录错误但不阻止删除数据库记录
-                print(f"Cloudinary删除失败: {delete_result.get('error')}")
-
-        # 删除数据库记录
+        # 远端图片交给后台删除队列，和数据库记录在同一个事务里提交
+        enqueue_deletion(db, photo.cloudinary_public_id)
+
+        # 删除数据库记录，统计汇总在同一个事务里更新
         db.delete(photo)
+        db.flush()
+        remove_photo_from_stats(db, user_id, photo.taken_date, photo.is_favorite)
         db.commit()
         return True, "照片删除成功"
 
@@ -74,37 +81,121 @@ def delete_photo(db: Session, photo_id: int, user_id: int) -> Tuple[bool, str]:
         return False, f"删除失败: {str(e)}"
 
 
-def get_all_photos(
-        db: Session,
+def encode_photo_cursor(photo: CouplePhoto) -> str:
+    """把一页最后一张照片的排序键编码成不透明的游标"""
+    return encode_cursor(
+        photo.taken_date.isoformat() if photo.taken_date else None,
+        photo.created_at.isoformat() if photo.created_at else None,
+        photo.id
+    )
+
+
+def decode_photo_cursor(cursor: str) -> Tuple[Optional[date], Optional[datetime], int]:
+    """解析游标，格式不对时抛 ValueError"""
+    taken_date, created_at, photo_id = decode_cursor(cursor, 3)
+    try:
+        return (
+            date.fromisoformat(taken_date) if taken_date else None,
+            datetime.fromisoformat(created_at) if created_at else None,
+            int(photo_id)
+        )
+    except (TypeError, ValueError):
+        raise ValueError("无效的分页游标")
+
+
+def _desc_after(column, value, tie):
+    """
+    按 column DESC NULLS LAST 排序时，排在 value 之后的行；值相同时用 tie 继续比较
+    （SQLite 和 Postgres 对空值的默认排序位置不一样，所以排序和游标条件都显式写成空值在最后）
+    """
+    if value is None:
+        return and_(column.is_(None), tie)
+    return or_(column < value, column.is_(None), and_(column == value, tie))
+
+
+def _seek_after(cursor: str):
+    """
+    游标条件：排在游标之后的照片（taken_date, created_at, id 全部倒序，空值在最后）
+    配合 ix_couple_photos_owner_taken_created 索引直接定位，不用 OFFSET 扫描前面的行
+    """
+    taken_date, created_at, photo_id = decode_photo_cursor(cursor)
+    # 老数据里 taken_date 可能为空，翻过有日期的照片后接着翻这些
+    after_created = _desc_after(CouplePhoto.created_at, created_at, CouplePhoto.id < photo_id)
+    return _desc_after(CouplePhoto.taken_date, taken_date, after_created)
+
+
+async def get_all_photos(
+        db: AsyncSession,
         user_id: int,
         page: int = 1,
         per_page: int = 20,
         only_favorites: bool = False,
         year: Optional[int] = None,
-        month: Optional[int] = None
-) -> Tuple[List[CouplePhoto], int]:
+        month: Optional[int] = None,
+        cursor: Optional[str] = None,
+        include_total: bool = True
+) -> Tuple[List[CouplePhoto], Optional[int], Optional[str]]:
     """
-    获取用户的所有合照（支持分页和筛选）
+    获取用户的所有合照（支持分页和筛选，异步查询）
+
+    传 cursor 时按游标翻页（忽略 page），每页的代价都一样；
+    include_total=False 时不再额外跑 count 查询，total 返回 None。
+    返回 (照片列表, 总数, 下一页游标)，没有下一页时游标为 None。
     """
-    query = db.query(CouplePhoto).filter(CouplePhoto.owner_id == user_id)
+    # 游标先解析，格式不对直接报错，不用先跑 count
+    seek = _seek_after(cursor) if cursor else None
+
+    query = select(CouplePhoto).where(CouplePhoto.owner_id == user_id)
 
     # 筛选收藏
     if only_favorites:
-        query = query.filter(CouplePhoto.is_favorite == True)
+        query = query.where(CouplePhoto.is_favorite == True)
+
+    # 按年月筛选：有年份时转成日期范围，能走索引
+    if year and month:
+        start = date(year, month, 1)
+        end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+        query = query.where(CouplePhoto.taken_date >= start, CouplePhoto.taken_date < end)
+    elif year:
+        query = query.where(CouplePhoto.taken_date >= date(year, 1, 1),
+                            CouplePhoto.taken_date < date(year + 1, 1, 1))
+    elif month:
+        query = query.where(extract('month', CouplePhoto.taken_date) == month)
+
+    total = None
+    if include_total:
+        total = await db.scalar(select(func.count()).select_from(query.subquery()))
+
+    # 排序；id 兜底保证顺序稳定，游标才能准确定位
+    query = query.order_by(
+        desc(CouplePhoto.taken_date).nulls_last(),
+        desc(CouplePhoto.created_at).nulls_last(),
+        desc(CouplePhoto.id)
+    )
+    if seek is not None:
+        query = query.where(seek)
+    else:
+        query = query.offset((page - 1) * per_page)
+
+    # 多取一条用来判断是否还有下一页；owner 预加载，异步会话里不能懒加载
+    query = query.options(selectinload(CouplePhoto.owner)).limit(per_page + 1)
+    photos = (await db.scalars(query)).all()
 
-    # 按年月筛选
-    if year:
-        query = query.filter(db.extract('year', CouplePhoto.taken_date) == year)
-    if month:
-        query = query.filter(db.extract('month', CouplePhoto.taken_date) == month)
+    next_cursor = None
+    if len(photos) > per_page:
+        photos = photos[:per_page]
+        next_cursor = encode_photo_cursor(photos[-1])
 
-    # 排序和分页
-    query = query.order_by(desc(CouplePhoto.taken_date), desc(CouplePhoto.created_at))
+    return photos, total, next_cursor
 
-    total = query.count()
-    photos = query.offset((page - 1) * per_page).limit(per_page).all()
 
-    return photos, total
+async def photos_version(db: AsyncSession, user_id: int) -> tuple:
+    """用户照片的版本（行数、最大 id、最近修改时间），用来算 ETag，不加载行"""
+    row = (await db.execute(
+        select(func.count(CouplePhoto.id), func.max(CouplePhoto.id), func.max(CouplePhoto.updated_at))
+        .where(CouplePhoto.owner_id == user_id)
+    )).one()
+    return tuple(row)
 
 
 def toggle_favorite(db: Session, photo_id: int, user_id: int) -> Tuple[bool, bool]:
@@ -120,21 +211,24 @@ def toggle_favorite(db: Session, photo_id: int, user_id: int) -> Tuple[bool, boo
         return False, False
 
     photo.is_favorite = not photo.is_favorite
+    change_favorite_in_stats(db, user_id, photo.taken_date, photo.is_favorite)
     db.commit()
     return True, photo.is_favorite
 
 
-def today_memory(db: Session, user_id: int) -> Optional[CouplePhoto]:
+async def today_memory(db: AsyncSession, user_id: int) -> Optional[CouplePhoto]:
     """
     获取今天的回忆（同一天拍摄的随机一张照片）
     """
     today = datetime.now().date()
 
     # 查找同一天的照片
-    photo = db.query(CouplePhoto).filter(
-        CouplePhoto.owner_id == user_id,
-        db.func.date(CouplePhoto.taken_date) == today
-    ).order_by(db.func.random()).first()
+    photo = await db.scalar(
+        select(CouplePhoto).where(
+            CouplePhoto.owner_id == user_id,
+            func.date(CouplePhoto.taken_date) == today
+        ).order_by(func.random()).limit(1)
+    )
 
     return photo
 
@@ -166,6 +260,8 @@ def update_photo_info(
     if not photo:
         return False, None
 
+    old_taken_date = photo.taken_date
+
     if caption is not None:
         photo.caption = caption
     if memory is not None:
@@ -178,37 +274,21 @@ def update_photo_info(
         photo.is_private = is_private
 
     photo.updated_at = datetime.now()
+
+    # 拍摄日期变了：从旧年份移出，再计入新年份
+    if photo.taken_date != old_taken_date:
+        db.flush()
+        remove_photo_from_stats(db, user_id, old_taken_date, photo.is_favorite)
+        add_photo_to_stats(db, user_id, photo.taken_date, photo.is_favorite)
+
     db.commit()
     db.refresh(photo)
 
     return True, photo
 
 
-def get_user_stats(db: Session, user_id: int) -> dict:
+async def get_user_stats(db: AsyncSession, user_id: int) -> dict:
     """
-    获取用户统计信息
+    获取用户统计信息（读 couple_photo_stats 汇总表，不扫照片）
     """
-    total = db.query(CouplePhoto).filter(CouplePhoto.owner_id == user_id).count()
-    favorites = db.query(CouplePhoto).filter(
-        CouplePhoto.owner_id == user_id,
-        CouplePhoto.is_favorite == True
-    ).count()
-
-    # 获取最早和最晚照片日期
-    earliest = db.query(CouplePhoto.taken_date).filter(
-        CouplePhoto.owner_id == user_id
-    ).order_by(CouplePhoto.taken_date).first()
-
-    latest = db.query(CouplePhoto.taken_date).filter(
-        CouplePhoto.owner_id == user_id
-    ).order_by(desc(CouplePhoto.taken_date)).first()
-
-    return {
-        "total_photos": total,
-        "favorite_photos": favorites,
-        "earliest_date": earliest[0] if earliest else None,
-        "latest_date": latest[0] if latest else None,
-        "years": db.query(
-            db.extract('year', CouplePhoto.taken_date).distinct()
-        ).filter(CouplePhoto.owner_id == user_id).all()
-    }
\ No newline at end of file
+    return await read_user_stats(db, user_id)
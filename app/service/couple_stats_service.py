@@ -0,0 +1,179 @@
+# app/service/couple_stats_service.py
+"""
+合照统计汇总表 couple_photo_stats 的维护
+
+每个用户每个拍摄年份一行（照片数、收藏数、最早/最晚拍摄日期）。
+couple_service 里创建、删除、收藏、改信息时在提交前调用这里的函数，和照片改动同一个事务；
+计数用原子的 upsert / UPDATE 累加，删除后只在对应年份里按索引重算最早/最晚日期。
+读统计只查这个用户的几行汇总，和照片总数无关。
+
+对不上时重建：
+    python -m app.service.couple_stats_service              # 全部重建
+    python -m app.service.couple_stats_service --owner 1    # 只重建一个用户
+"""
+import argparse
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import select, update, delete, func, case, extract, cast, Integer, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.db import SessionLocal
+from app.db_schema import ensure_schema
+from app.models import CouplePhoto, CouplePhotoStats
+
+# 没有拍摄日期的照片归到这一组，不参与年份列表和最早/最晚日期
+NO_DATE_YEAR = 0
+
+
+def stats_year(taken_date: Optional[date]) -> int:
+    return taken_date.year if taken_date else NO_DATE_YEAR
+
+
+def _dialect_insert(db: Session):
+    """SQLite / Postgres 都支持 INSERT ... ON CONFLICT DO UPDATE"""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    return dialect_insert(CouplePhotoStats)
+
+
+def add_photo_to_stats(db: Session, owner_id: int, taken_date: Optional[date], is_favorite: bool):
+    """一张照片计入汇总"""
+    stats = CouplePhotoStats.__table__.c
+    taken = taken_date if stats_year(taken_date) != NO_DATE_YEAR else None
+    stmt = _dialect_insert(db).values(
+        owner_id=owner_id,
+        year=stats_year(taken_date),
+        photo_count=1,
+        favorite_count=1 if is_favorite else 0,
+        earliest_date=taken,
+        latest_date=taken,
+    )
+    excluded = stmt.excluded
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[stats.owner_id, stats.year],
+        set_={
+            "photo_count": stats.photo_count + excluded.photo_count,
+            "favorite_count": stats.favorite_count + excluded.favorite_count,
+            "earliest_date": case(
+                (stats.earliest_date.is_(None), excluded.earliest_date),
+                (excluded.earliest_date < stats.earliest_date, excluded.earliest_date),
+                else_=stats.earliest_date
+            ),
+            "latest_date": case(
+                (stats.latest_date.is_(None), excluded.latest_date),
+                (excluded.latest_date > stats.latest_date, excluded.latest_date),
+                else_=stats.latest_date
+            ),
+        }
+    )
+    db.execute(stmt)
+
+
+def remove_photo_from_stats(db: Session, owner_id: int, taken_date: Optional[date], is_favorite: bool):
+    """
+    一张照片移出汇总（删除，或者拍摄日期改了）
+    调用前照片的改动要已经 flush，这样重算最早/最晚日期时看到的是改动后的数据
+    """
+    year = stats_year(taken_date)
+    key = (CouplePhotoStats.owner_id == owner_id, CouplePhotoStats.year == year)
+
+    values = {
+        "photo_count": CouplePhotoStats.photo_count - 1,
+        "favorite_count": CouplePhotoStats.favorite_count - (1 if is_favorite else 0),
+    }
+    if year != NO_DATE_YEAR:
+        # 只扫这个用户这一年的照片，走 owner_id + taken_date 索引
+        in_year = select(CouplePhoto.taken_date).where(
+            CouplePhoto.owner_id == owner_id,
+            CouplePhoto.taken_date >= date(year, 1, 1),
+            CouplePhoto.taken_date < date(year + 1, 1, 1)
+        ).subquery()
+        values["earliest_date"] = select(func.min(in_year.c.taken_date)).scalar_subquery()
+        values["latest_date"] = select(func.max(in_year.c.taken_date)).scalar_subquery()
+
+    db.execute(update(CouplePhotoStats).where(*key).values(**values))
+    db.execute(delete(CouplePhotoStats).where(*key, CouplePhotoStats.photo_count <= 0))
+
+
+def change_favorite_in_stats(db: Session, owner_id: int, taken_date: Optional[date], is_favorite: bool):
+    """收藏状态变了：is_favorite 是改动后的值"""
+    db.execute(
+        update(CouplePhotoStats)
+        .where(CouplePhotoStats.owner_id == owner_id, CouplePhotoStats.year == stats_year(taken_date))
+        .values(favorite_count=CouplePhotoStats.favorite_count + (1 if is_favorite else -1))
+    )
+
+
+async def read_user_stats(db: AsyncSession, user_id: int) -> dict:
+    """从汇总表读统计，格式和原来的 get_user_stats 一样"""
+    rows = (await db.scalars(
+        select(CouplePhotoStats).where(CouplePhotoStats.owner_id == user_id)
+        .order_by(CouplePhotoStats.year)
+    )).all()
+    dated = [row for row in rows if row.year != NO_DATE_YEAR]
+
+    return {
+        "total_photos": sum(row.photo_count for row in rows),
+        "favorite_photos": sum(row.favorite_count for row in rows),
+        "earliest_date": min((row.earliest_date for row in dated if row.earliest_date), default=None),
+        "latest_date": max((row.latest_date for row in dated if row.latest_date), default=None),
+        "years": [row.year for row in dated]
+    }
+
+
+def rebuild_stats(db: Session, owner_id: Optional[int] = None) -> int:
+    """按 couple_photos 重新生成汇总（全部或某个用户），返回写入的行数"""
+    year = func.coalesce(cast(extract("year", CouplePhoto.taken_date), Integer), NO_DATE_YEAR)
+    source = select(
+        CouplePhoto.owner_id,
+        year,
+        func.count(CouplePhoto.id),
+        func.count(case((CouplePhoto.is_favorite == True, 1))),
+        func.min(CouplePhoto.taken_date),
+        func.max(CouplePhoto.taken_date),
+    ).where(CouplePhoto.owner_id.is_not(None)).group_by(CouplePhoto.owner_id, year)
+
+    clear = delete(CouplePhotoStats)
+    if owner_id is not None:
+        source = source.where(CouplePhoto.owner_id == owner_id)
+        clear = clear.where(CouplePhotoStats.owner_id == owner_id)
+
+    db.execute(clear)
+    result = db.execute(insert(CouplePhotoStats).from_select(
+        ["owner_id", "year", "photo_count", "favorite_count", "earliest_date", "latest_date"],
+        source
+    ))
+    db.commit()
+    return result.rowcount
+
+
+def ensure_stats(db: Session):
+    """启动时调用：汇总表是空的但已经有照片（刚建表的老库），先整体生成一次"""
+    if db.scalar(select(CouplePhotoStats.owner_id).limit(1)) is not None:
+        return
+    if db.scalar(select(CouplePhoto.id).limit(1)) is None:
+        return
+    print(f"📊 已生成合照统计汇总 {rebuild_stats(db)} 行")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="重建合照统计汇总表 couple_photo_stats")
+    parser.add_argument("--owner", type=int, help="只重建这个用户")
+    args = parser.parse_args(argv)
+
+    # 老库可能还没有这张表
+    ensure_schema()
+    db = SessionLocal()
+    try:
+        rows = rebuild_stats(db, args.owner)
+    finally:
+        db.close()
+    print(f"✅ 合照统计已重建，共 {rows} 行")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+# app/service/deletion_service.py
+"""
+图片的后台删除队列（pending_deletions 表）
+
+- 删除照片 / 动态时调用 enqueue_deletion，和删除数据库记录在同一个事务里提交：
+  接口不用等 Cloudinary 往返，进程中途退出任务也不会丢
+- deletion_worker_loop 每 DELETION_POLL_SECONDS 秒取一批到期任务，按后端分组批量删除
+  （Cloudinary 用 delete_resources，一次最多 100 个）
+- 失败的按 DELETION_RETRY_BASE * 2^(attempts-1) 秒退避（最长 DELETION_RETRY_MAX），
+  失败 DELETION_MAX_ATTEMPTS 次后不再重试，留在表里，/_ops/deletions 可以看到
+- 远端删除是幂等的（不存在也算成功），多个 worker 进程同时处理同一批也没关系
+"""
+import asyncio
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.db import SessionLocal
+from app.models import PendingDeletion
+from app.service.storage import get_backend, storage_for
+
+DELETION_POLL_SECONDS = float(os.getenv("DELETION_POLL_SECONDS", "10"))
+DELETION_BATCH_SIZE = int(os.getenv("DELETION_BATCH_SIZE", "100"))
+DELETION_RETRY_BASE = int(os.getenv("DELETION_RETRY_BASE", "30"))
+DELETION_RETRY_MAX = int(os.getenv("DELETION_RETRY_MAX", str(6 * 3600)))
+DELETION_MAX_ATTEMPTS = int(os.getenv("DELETION_MAX_ATTEMPTS", "10"))
+
+
+def enqueue_deletion(db, public_id: Optional[str]):
+    """登记一个待删除的图片；只是 db.add，跟着调用方的事务一起提交（同步、异步 session 都可以）"""
+    if not public_id:
+        return
+    db.add(PendingDeletion(backend=storage_for(public_id).name, public_id=public_id))
+
+
+def retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=min(DELETION_RETRY_BASE * 2 ** (attempts - 1), DELETION_RETRY_MAX))
+
+
+def process_pending_deletions(db: Session, now: datetime = None, limit: int = DELETION_BATCH_SIZE) -> dict:
+    """处理一批到期的任务，返回 {"deleted": 成功数, "failed": 失败数}"""
+    now = now or datetime.now()
+    rows = db.execute(
+        select(PendingDeletion.id, PendingDeletion.backend, PendingDeletion.public_id, PendingDeletion.attempts)
+        .where(PendingDeletion.next_attempt_at <= now)
+        .order_by(PendingDeletion.next_attempt_at)
+        .limit(limit)
+    ).all()
+    if not rows:
+        return {"deleted": 0, "failed": 0}
+
+    by_backend = defaultdict(list)
+    for row in rows:
+        by_backend[row.backend].append(row)
+
+    done_ids = []
+    failed = 0
+    for backend_name, items in by_backend.items():
+        public_ids = list(dict.fromkeys(row.public_id for row in items))
+        try:
+            results = get_backend(backend_name).delete_many(public_ids)
+        except Exception as e:
+            # 整批请求失败（网络、鉴权等），这一批都按失败重试
+            results = {public_id: f"{type(e).__name__}: {e}" for public_id in public_ids}
+
+        for row in items:
+            error = results.get(row.public_id, "没有返回结果")
+            if error is None:
+                done_ids.append(row.id)
+                continue
+            failed += 1
+            attempts = row.attempts + 1
+            db.execute(
+                update(PendingDeletion)
+                .where(PendingDeletion.id == row.id)
+                .values(
+                    attempts=attempts,
+                    last_error=error[:1000],
+                    next_attempt_at=None if attempts >= DELETION_MAX_ATTEMPTS else now + retry_delay(attempts),
+                )
+            )
+            if attempts >= DELETION_MAX_ATTEMPTS:
+                print(f"❌ 图片删除重试 {attempts} 次仍失败，不再重试: {row.public_id} ({error})")
+
+    if done_ids:
+        db.execute(delete(PendingDeletion).where(PendingDeletion.id.in_(done_ids)))
+    db.commit()
+    return {"deleted": len(done_ids), "failed": failed}
+
+
+def run_pending_deletions(now: datetime = None) -> dict:
+    """把当前到期的任务处理完（失败的已经推到以后，不会在这一轮里反复重试）"""
+    total = {"deleted": 0, "failed": 0}
+    db = SessionLocal()
+    try:
+        while True:
+            result = process_pending_deletions(db, now)
+            total["deleted"] += result["deleted"]
+            total["failed"] += result["failed"]
+            if result["deleted"] + result["failed"] < DELETION_BATCH_SIZE:
+                break
+    finally:
+        db.close()
+    if total["deleted"] or total["failed"]:
+        print(f"🗑️ 后台删除图片 {total['deleted']} 个，失败 {total['failed']} 个")
+    return total
+
+
+async def deletion_worker_loop():
+    """启动时先跑一轮，之后每 DELETION_POLL_SECONDS 秒一轮；删除是同步的网络/磁盘操作，放到线程池"""
+    while True:
+        try:
+            await run_in_threadpool(run_pending_deletions)
+        except Exception as e:
+            print(f"⚠️ 后台删除图片失败: {e}")
+        await asyncio.sleep(DELETION_POLL_SECONDS)
+
+
+def deletion_stats(db: Session, now: datetime = None) -> dict:
+    now = now or datetime.now()
+    pending, due, oldest = db.execute(
+        select(
+            func.count(PendingDeletion.next_attempt_at),
+            func.count(PendingDeletion.id).filter(PendingDeletion.next_attempt_at <= now),
+            func.min(PendingDeletion.created_at),
+        )
+    ).one()
+    gave_up = db.scalar(
+        select(func.count(PendingDeletion.id)).where(PendingDeletion.next_attempt_at.is_(None))
+    )
+    return {
+        "pending": pending,
+        "due": due,
+        "gave_up": gave_up,
+        "oldest": oldest.isoformat() if oldest else None,
+    }
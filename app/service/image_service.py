@@ -1,21 +1,28 @@
-import cloudinary
-import cloudinary.uploader
-import cloudinary.api
+import asyncio
 import os
 from fastapi import UploadFile
-from typing import Optional, Dict, Tuple
-
-# 配置Cloudinary
-cloudinary.config(
-    cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
-    api_key=os.getenv("CLOUDINARY_API_KEY"),
-    api_secret=os.getenv("CLOUDINARY_API_SECRET"),
-    secure=True
-)
+from typing import Dict
+
+# Cloudinary SDK 在第一次上传/删除时才导入
+from app.cloudinary_config import get_cloudinary
+from app.core.upload_pool import upload_pool, UploadPoolBusy
+from app.core.uploads import spool_upload, UploadTooLarge
+from app.db import SessionLocal
+from app.service.deletion_service import enqueue_deletion
+from app.service.storage import StorageError, get_storage, storage_for
+
+# 后端没返回格式时按 MIME 类型推断（本地存储）
+MIME_FORMATS = {
+    "image/jpeg": "jpg",
+    "image/png": "png",
+    "image/gif": "gif",
+    "image/webp": "webp",
+    "image/bmp": "bmp",
+}
 
 
 class CloudinaryService:
-    """Cloudinary图片上传服务"""
+    """图片上传服务：校验、分块读取，再交给配置的存储后端（STORAGE_BACKEND，见 app/service/storage.py）"""
 
     @staticmethod
     def get_folder(user: str) -> str:
@@ -35,6 +42,25 @@ class CloudinaryService:
         unique_id = str(uuid.uuid4())[:8]
         return f"{user}_{timestamp}_{unique_id}_{name_without_ext}"
 
+    @staticmethod
+    def _put_handle(file_handle, folder: str, public_id: str, fmt: str) -> Dict:
+        """在上传线程里执行；句柄是 spool_upload 复制出来的，传完就关（超时后线程还在读，不能提前关）"""
+        try:
+            return get_storage().put(file_handle, folder, public_id, fmt)
+        finally:
+            file_handle.close()
+
+    @staticmethod
+    def _discard_late_upload(result: Dict):
+        """接口已经按超时返回了，上传才成功：没有数据库记录引用它，登记到后台删除队列"""
+        db = SessionLocal()
+        try:
+            enqueue_deletion(db, result.get("public_id"))
+            db.commit()
+        finally:
+            db.close()
+        print(f"🗑️ 上传超时后才完成，已登记删除: {result.get('public_id')}")
+
     @staticmethod
     async def upload_image(
             file: UploadFile,
@@ -42,7 +68,7 @@ class CloudinaryService:
             folder: str = "love_app/album"
     ) -> Dict:
         """
-        上传图片到Cloudinary
+        上传图片到存储后端（默认 Cloudinary）
 
         返回格式：
         {
@@ -52,61 +78,72 @@ class CloudinaryService:
             "format": "jpg/png等",
             "width": 图片宽度,
             "height": 图片高度,
-            "secure_url": "HTTPS链接"
+            "secure_url": "HTTPS链接",
+            "variants": {"thumb" / "medium" / "full": {"url", "width", "height"}}
         }
         """
         try:
-            # 读取文件内容
-            file_content = await file.read()
-
-            # 验证文件大小（限制10MB）
-            max_size = 10 * 1024 * 1024  # 10MB
-            if len(file_content) > max_size:
+            # 验证文件类型（先看类型，不合格的不用读内容）
+            allowed_types = ['image/jpeg', 'image/png', 'image/gif', 'image/webp', 'image/bmp']
+            if file.content_type not in allowed_types:
                 return {
                     "success": False,
-                    "error": f"图片大小不能超过10MB（当前：{len(file_content) / 1024 / 1024:.2f}MB）"
+                    "error": f"不支持的文件类型，请使用: {', '.join(allowed_types)}"
                 }
 
-            # 验证文件类型
-            allowed_types = ['image/jpeg', 'image/png', 'image/gif', 'image/webp', 'image/bmp']
-            if file.content_type not in allowed_types:
+            # 分块检查大小（限制10MB），拿到文件句柄，不把整个文件读进内存
+            try:
+                file_handle, _ = await spool_upload(file)
+            except UploadTooLarge as e:
                 return {
                     "success": False,
-                    "error": f"不支持的文件类型，请使用: {', '.join(allowed_types)}"
+                    "error": f"图片{e}"
                 }
 
             # 生成public_id（云存储中的唯一标识）
             public_id = CloudinaryService.generate_public_id(user, file.filename)
 
-            # 上传到Cloudinary
-            upload_result = cloudinary.uploader.upload(
-                file_content,
-                folder=CloudinaryService.get_folder(user),
-                public_id=public_id,
-                resource_type="image",
-                overwrite=False,  # 不覆盖同名文件
-                transformation=[
-                    {"width": 1200, "height": 800, "crop": "limit"},  # 限制最大尺寸
-                    {"quality": "auto:good"},  # 自动优化质量
-                    {"fetch_format": "auto"}  # 自动选择最佳格式
-                ]
+            # 存储后端（Cloudinary SDK / 磁盘写入）都是同步的，放到上传线程池里跑，不阻塞事件循环
+            try:
+                upload_result = await upload_pool.run(
+                    CloudinaryService._put_handle,
+                    file_handle,
+                    CloudinaryService.get_folder(user),
+                    public_id,
+                    MIME_FORMATS.get(file.content_type),
+                    on_abandoned=CloudinaryService._discard_late_upload,
+                )
+            except UploadPoolBusy:
+                # 没进线程池，句柄没人关
+                file_handle.close()
+                raise
+
+            # 列表页用的缩略图尺寸在上传时就算好，调用方存进 image_variants
+            variants = storage_for(upload_result["public_id"]).variants(
+                upload_result["public_id"], upload_result.get("format"),
+                upload_result.get("width"), upload_result.get("height")
             )
 
             return {
                 "success": True,
-                "url": upload_result.get("secure_url"),
-                "public_id": upload_result.get("public_id"),
-                "format": upload_result.get("format"),
-                "width": upload_result.get("width"),
-                "height": upload_result.get("height"),
-                "bytes": upload_result.get("bytes"),
-                "created_at": upload_result.get("created_at")
+                **upload_result,
+                "variants": variants
             }
 
-        except cloudinary.exceptions.Error as e:
+        except UploadPoolBusy as e:
+            return {
+                "success": False,
+                "error": str(e)
+            }
+        except asyncio.TimeoutError:
+            return {
+                "success": False,
+                "error": f"上传超时（超过{upload_pool.timeout:.0f}秒），请稍后再试"
+            }
+        except StorageError as e:
             return {
                 "success": False,
-                "error": f"Cloudinary上传失败: {str(e)}"
+                "error": str(e)
             }
         except Exception as e:
             return {
@@ -116,10 +153,9 @@ class CloudinaryService:
 
     @staticmethod
     def delete_image(public_id: str) -> Dict:
-        """从Cloudinary删除图片"""
+        """从图片所在的存储后端删除"""
         try:
-            result = cloudinary.uploader.destroy(public_id)
-            if result.get("result") == "ok":
+            if storage_for(public_id).delete(public_id):
                 return {
                     "success": True,
                     "message": "图片删除成功"
@@ -127,7 +163,7 @@ class CloudinaryService:
             else:
                 return {
                     "success": False,
-                    "error": result.get("result", "未知错误")
+                    "error": "not found"
                 }
         except Exception as e:
             return {
@@ -138,24 +174,19 @@ class CloudinaryService:
     @staticmethod
     def get_image_url(public_id: str, width: int = None, height: int = None) -> str:
         """获取图片URL，支持尺寸调整"""
+        storage = storage_for(public_id)
         if width and height:
             # 生成缩略图
-            return cloudinary.utils.cloudinary_url(
-                public_id,
-                width=width,
-                height=height,
-                crop="fill",
-                quality="auto"
-            )[0]
+            return storage.variant_url(public_id, width=width, height=height)
         else:
             # 原始图片
-            return cloudinary.utils.cloudinary_url(public_id)[0]
+            return storage.url(public_id)
 
     @staticmethod
     def get_user_images(user: str, max_results: int = 100) -> list:
         """获取用户的所有图片"""
         try:
-            result = cloudinary.api.resources(
+            result = get_cloudinary().api.resources(
                 type="upload",
                 prefix=f"love_app/album/{user}/",
                 max_results=max_results,
@@ -1,11 +1,13 @@
 # app/service/memory_service.py
-from sqlalchemy.orm import Session
-from sqlalchemy import func, extract, and_, or_
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, extract, or_, select, case
 from datetime import date, datetime, timedelta
-from typing import List, Optional, Dict, Tuple
-from app.models import MemoryDay, MemorySnapshot, User
+from typing import List, Optional, Dict
+from app.db import AsyncSessionLocal
+from app.models import MemoryDay, MemorySnapshot, anniversary_in_year, next_anniversary_of
 from app.schema.memory import MemoryDayCreate, MemoryDayUpdate, MemorySnapshotCreate
-import math
+import asyncio
 
 
 class MemoryService:
@@ -28,14 +30,8 @@ class MemoryService:
 
     @staticmethod
     def get_next_anniversary_date(memory_date: date, today: date = None) -> date:
-        """获取下一个周年纪念日"""
-        today = today or date.today()
-        this_year = memory_date.replace(year=today.year)
-
-        if this_year >= today:
-            return this_year
-        else:
-            return this_year.replace(year=today.year + 1)
+        """获取下一个周年纪念日（2 月 29 日在平年算 2 月 28 日）"""
+        return next_anniversary_of(memory_date, today)
 
     @staticmethod
     def get_days_to_next_anniversary(memory_date: date, today: date = None) -> int:
@@ -62,38 +58,58 @@ class MemoryService:
         return db_memory
 
     @staticmethod
-    def get_memory_days(
-            db: Session,
+    async def get_memory_days(
+            db: AsyncSession,
             user_id: int,
             memory_type: Optional[str] = None,
             only_upcoming: bool = False,
             limit: int = None
     ) -> List[MemoryDay]:
-        """获取用户的纪念日列表"""
-        query = db.query(MemoryDay).filter(MemoryDay.owner_id == user_id)
+        """获取用户的纪念日列表（异步查询）"""
+        # 年轮记录一起预加载，异步会话里不能懒加载
+        query = select(MemoryDay).where(MemoryDay.owner_id == user_id) \
+            .options(selectinload(MemoryDay.snapshots))
 
         if memory_type:
-            query = query.filter(MemoryDay.type == memory_type)
+            query = query.where(MemoryDay.type == memory_type)
 
         if only_upcoming:
-            # 获取30天内即将到来的纪念日
+            # 获取30天内即将到来的纪念日（走 owner_id + next_anniversary_date 索引）
             today = date.today()
-            query = query.filter(
-                MemoryDay.is_annual == True,
-                extract('month', MemoryDay.date) == today.month,
-                extract('day', MemoryDay.date) >= today.day,
-                extract('day', MemoryDay.date) <= (today + timedelta(days=30)).day
+            query = query.where(
+                MemoryDay.next_anniversary_date.between(today, today + timedelta(days=30))
+            ).order_by(MemoryDay.next_anniversary_date)
+        else:
+            query = query.order_by(
+                extract('month', MemoryDay.date),
+                extract('day', MemoryDay.date)
             )
 
-        query = query.order_by(
-            extract('month', MemoryDay.date),
-            extract('day', MemoryDay.date)
-        )
-
         if limit:
             query = query.limit(limit)
 
-        return query.all()
+        return (await db.scalars(query)).all()
+
+    @staticmethod
+    async def get_memory_days_version(db: AsyncSession, user_id: int) -> tuple:
+        """
+        纪念日列表的版本，用来算 ETag，不加载行：
+        纪念日和年轮各自的行数、最大 id、最近修改时间（列表里带着年轮）
+        """
+        row = (await db.execute(
+            select(
+                func.count(MemoryDay.id.distinct()),
+                func.max(MemoryDay.id),
+                func.max(MemoryDay.updated_at),
+                func.count(MemorySnapshot.id),
+                func.max(MemorySnapshot.id),
+                func.max(func.coalesce(MemorySnapshot.updated_at, MemorySnapshot.created_at)),
+            )
+            .select_from(MemoryDay)
+            .outerjoin(MemorySnapshot, MemorySnapshot.memory_day_id == MemoryDay.id)
+            .where(MemoryDay.owner_id == user_id)
+        )).one()
+        return tuple(row)
 
     @staticmethod
     def get_memory_day_by_id(db: Session, memory_id: int, user_id: int) -> Optional[MemoryDay]:
@@ -224,54 +240,59 @@ class MemoryService:
     # === 统计和计算 ===
 
     @staticmethod
-    def get_memory_stats(db: Session, user_id: int) -> Dict:
+    def memory_stats_query(user_id: int, today: date, upcoming_days: int = 30):
+        """
+        一条查询拿到按类型分组的纪念日数、年轮数、最早日期和即将到来的个数
+        年轮数用相关子查询按纪念日计数（走 memory_day_id + year 索引），不 JOIN 展开
+        """
+        upcoming = MemoryDay.next_anniversary_date.between(today, today + timedelta(days=upcoming_days))
+        snapshot_count = select(func.count(MemorySnapshot.id)) \
+            .where(MemorySnapshot.memory_day_id == MemoryDay.id) \
+            .correlate(MemoryDay).scalar_subquery()
+        return (
+            select(
+                MemoryDay.type,
+                func.count(MemoryDay.id).label("memories"),
+                func.coalesce(func.sum(snapshot_count), 0).label("snapshots"),
+                func.min(MemoryDay.date).label("earliest"),
+                func.count(case((upcoming, 1))).label("upcoming"),
+            )
+            .where(MemoryDay.owner_id == user_id)
+            .group_by(MemoryDay.type)
+        )
+
+    @staticmethod
+    async def get_memory_stats(db: AsyncSession, user_id: int) -> Dict:
         """获取纪念日统计信息"""
         today = date.today()
+        rows = (await db.execute(MemoryService.memory_stats_query(user_id, today))).all()
 
-        # 总纪念日数
-        total_memories = db.query(MemoryDay).filter(
-            MemoryDay.owner_id == user_id
-        ).count()
-
-        # 按类型统计
-        by_type = db.query(
-            MemoryDay.type,
-            func.count(MemoryDay.id).label('count')
-        ).filter(MemoryDay.owner_id == user_id) \
-            .group_by(MemoryDay.type).all()
-
-        # 年轮记录总数
-        total_snapshots = db.query(MemorySnapshot).join(MemoryDay).filter(
-            MemoryDay.owner_id == user_id
-        ).count()
-
-        # 最早纪念日
-        earliest = db.query(MemoryDay).filter(
-            MemoryDay.owner_id == user_id
-        ).order_by(MemoryDay.date.asc()).first()
-
+        earliest = min((row.earliest for row in rows if row.earliest), default=None)
         years_together = 0
         if earliest:
-            years_together = MemoryService.calculate_years_since(earliest.date, today)
-
-        # 即将到来的纪念日（30天内）
-        upcoming_memories = MemoryService.get_memory_days(
-            db, user_id, only_upcoming=True
-        )
+            years_together = MemoryService.calculate_years_since(earliest, today)
+
+        # 即将到来的纪念日（30天内）：个数来自上面的聚合，列表最多取5个
+        upcoming_count = sum(row.upcoming for row in rows)
+        upcoming_memories = []
+        if upcoming_count:
+            upcoming_memories = await MemoryService.get_memory_days(
+                db, user_id, only_upcoming=True, limit=5
+            )
 
         return {
-            "total_memories": total_memories,
-            "by_type": dict(by_type),
-            "total_snapshots": total_snapshots,
+            "total_memories": sum(row.memories for row in rows),
+            "by_type": {row.type: row.memories for row in rows},
+            "total_snapshots": sum(row.snapshots for row in rows),
             "years_together": years_together,
-            "upcoming_count": len(upcoming_memories),
-            "upcoming_memories": upcoming_memories[:5]  # 最多5个
+            "upcoming_count": upcoming_count,
+            "upcoming_memories": upcoming_memories
         }
 
     @staticmethod
-    def get_timeline_view(db: Session, user_id: int) -> List[Dict]:
+    async def get_timeline_view(db: AsyncSession, user_id: int) -> List[Dict]:
         """获取时间线视图"""
-        memories = MemoryService.get_memory_days(db, user_id)
+        memories = await MemoryService.get_memory_days(db, user_id)
         result = []
 
         for memory in memories:
@@ -281,7 +302,7 @@ class MemoryService:
             years = memory.years_since
             for year_offset in range(years + 1):
                 target_year = memory.date.year + year_offset
-                anniversary_date = memory.date.replace(year=target_year)
+                anniversary_date = anniversary_in_year(memory.date, target_year)
 
                 result.append({
                     "date": anniversary_date,
@@ -299,28 +320,51 @@ class MemoryService:
         return result
 
     @staticmethod
-    def get_upcoming_anniversaries(db: Session, user_id: int, days: int = 30) -> List[Dict]:
-        """获取即将到来的纪念日"""
+    async def get_upcoming_anniversaries(db: AsyncSession, user_id: int, days: int = 30) -> List[Dict]:
+        """获取即将到来的纪念日：按 next_anniversary_date 做一次范围查询"""
         today = date.today()
         end_date = today + timedelta(days=days)
 
-        memories = MemoryService.get_memory_days(db, user_id)
-        result = []
-
-        for memory in memories:
-            if not memory.is_annual:
-                continue
+        memories = (await db.scalars(
+            select(MemoryDay)
+            .where(
+                MemoryDay.owner_id == user_id,
+                MemoryDay.next_anniversary_date.between(today, end_date)
+            )
+            .options(selectinload(MemoryDay.snapshots))
+            .order_by(MemoryDay.next_anniversary_date, MemoryDay.id)
+        )).all()
+
+        return [
+            {
+                "memory_day": memory,
+                "date": memory.next_anniversary_date,
+                "days_until": (memory.next_anniversary_date - today).days
+            }
+            for memory in memories
+        ]
 
-            next_date = memory.next_anniversary_date
-            if next_date and today <= next_date <= end_date:
-                result.append({
-                    "memory_day": memory,
-                    "date": next_date,
-                    "days_until": (next_date - today).days
-                })
+    @staticmethod
+    async def roll_over_anniversaries(db: AsyncSession, today: date = None) -> int:
+        """
+        每日任务：已经过去的 next_anniversary_date 往后推到下一年，
+        顺便补上还没算过的（老数据），返回更新的条数
+        """
+        today = today or date.today()
+        memories = (await db.scalars(
+            select(MemoryDay).where(
+                MemoryDay.is_annual == True,
+                or_(
+                    MemoryDay.next_anniversary_date < today,
+                    MemoryDay.next_anniversary_date.is_(None)
+                )
+            )
+        )).all()
 
-        result.sort(key=lambda x: x["days_until"])
-        return result
+        for memory in memories:
+            memory.refresh_next_anniversary(today)
+        await db.commit()
+        return len(memories)
 
     @staticmethod
     def get_memory_day_detail(db: Session, memory_id: int, user_id: int) -> Optional[Dict]:
@@ -345,4 +389,24 @@ class MemoryService:
             "memory": memory,
             "snapshots": snapshots,
             "stats": stats
-        }
\ No newline at end of file
+        }
+
+# ========== 每日滚动 next_anniversary_date ==========
+async def run_anniversary_rollover(today: date = None) -> int:
+    async with AsyncSessionLocal() as db:
+        count = await MemoryService.roll_over_anniversaries(db, today)
+    if count:
+        print(f"📅 已更新 {count} 个纪念日的下一个周年日")
+    return count
+
+
+async def anniversary_rollover_loop():
+    """每天零点过后跑一次（启动时已经先跑过一次）"""
+    while True:
+        now = datetime.now()
+        next_run = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+        await asyncio.sleep((next_run - now).total_seconds() + 1)
+        try:
+            await run_anniversary_rollover()
+        except Exception as e:
+            print(f"⚠️ 纪念日滚动更新失败: {e}")
@@ -0,0 +1,96 @@
+# app/service/moment_service.py
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import select, desc, and_, or_, func
+
+from app.core.pagination import encode_cursor, decode_cursor
+from app.models import Moment
+from app.service.storage import variants_of
+
+# 动态流每页条数 / 流式导出每批从数据库取的行数
+FEED_PAGE_SIZE = 20
+STREAM_BATCH_SIZE = 500
+
+# 流式导出只取需要的列，不构造 ORM 对象
+FEED_COLUMNS = (
+    Moment.id, Moment.user, Moment.content, Moment.image_url,
+    Moment.created_at, Moment.cloudinary_public_id, Moment.format,
+    Moment.width, Moment.height, Moment.image_variants
+)
+
+
+def moments_version_query():
+    """动态流的版本（行数、最大 id、最近修改时间），用来算 ETag，不加载行"""
+    return select(
+        func.count(Moment.id),
+        func.max(Moment.id),
+        func.max(func.coalesce(Moment.updated_at, Moment.created_at))
+    )
+
+
+def encode_moment_cursor(moment) -> str:
+    """动态流游标：(created_at, id)"""
+    return encode_cursor(
+        moment.created_at.isoformat() if moment.created_at else None,
+        moment.id
+    )
+
+
+def decode_moment_cursor(cursor: str) -> Tuple[Optional[datetime], int]:
+    created_at, moment_id = decode_cursor(cursor, 2)
+    try:
+        return (datetime.fromisoformat(created_at) if created_at else None, int(moment_id))
+    except (TypeError, ValueError):
+        raise ValueError("无效的分页游标")
+
+
+def moments_feed_query(before: Optional[str] = None, limit: Optional[int] = None, columns=None):
+    """
+    按时间倒序的动态查询；before 为上一页返回的游标
+    limit 会多取一条，用来判断是否还有下一页（配合 split_page）
+    """
+    query = select(*columns) if columns else select(Moment)
+    query = query.order_by(desc(Moment.created_at), desc(Moment.id))
+
+    if before:
+        created_at, moment_id = decode_moment_cursor(before)
+        if created_at is None:
+            query = query.where(Moment.created_at.is_(None), Moment.id < moment_id)
+        else:
+            query = query.where(or_(
+                Moment.created_at < created_at,
+                and_(Moment.created_at == created_at, Moment.id < moment_id)
+            ))
+
+    if limit:
+        query = query.limit(limit + 1)
+    return query
+
+
+def split_page(rows: List, limit: int) -> Tuple[List, Optional[str]]:
+    """去掉多取的一条，返回 (本页数据, 下一页游标)"""
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_moment_cursor(rows[-1])
+    return rows, None
+
+
+def moment_view(m, current_user: Optional[str]) -> dict:
+    """动态页模板用的结构：和 moment_to_dict 一样，只是 created_at 保留 datetime 给模板格式化"""
+    return {**moment_to_dict(m, current_user), "created_at": m.created_at}
+
+
+def moment_to_dict(m, current_user: Optional[str]) -> dict:
+    """动态的 JSON 结构（ORM 对象和查询行都可以）"""
+    return {
+        "id": m.id,
+        "user": m.user,
+        "content": m.content,
+        "image": m.image_url,  # 使用Cloudinary的image_url
+        "created_at": m.created_at.isoformat() if m.created_at else None,
+        "is_owner": m.user == current_user,  # 添加 is_owner 字段
+        "cloudinary_public_id": m.cloudinary_public_id,
+        "format": m.format,
+        "variants": variants_of(m)  # 列表里用 thumb / medium 拼 srcset，点开看 full
+    }
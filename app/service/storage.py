@@ -0,0 +1,331 @@
+# app/service/storage.py
+"""
+图片存储后端：STORAGE_BACKEND=cloudinary（默认）或 local
+
+- put(file_handle, folder, name, fmt)：保存图片，返回 public_id / url / format / width / height / bytes
+  （同步方法，由上传线程池调用）
+- delete(public_id)：删除，找不到返回 False
+- url / variant_url：原图地址、指定尺寸的地址
+- variants：列表页用的几个尺寸（thumb / medium / full）的地址和宽高，上传时算好存进数据库，模板里拼 srcset
+
+本地后端的 public_id 以 "local/" 开头：换了后端以后，老图片照样按 public_id 找到原来的后端生成地址、删除。
+STORAGE_BACKEND=local 时不需要连 Cloudinary，可以离线运行和压测。
+"""
+import glob
+import hashlib
+import os
+import shutil
+import tempfile
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import BinaryIO, Dict, List, Optional
+
+from app.cloudinary_config import get_cloudinary
+
+DEFAULT_STORAGE_BACKEND = "cloudinary"
+LOCAL_STORAGE_DIR = os.getenv("LOCAL_STORAGE_DIR", "static/uploads/media")
+LOCAL_STORAGE_URL = os.getenv("LOCAL_STORAGE_URL", "/static/uploads/media")
+LOCAL_PREFIX = "local/"
+
+# Cloudinary 上传时的处理：限制最大尺寸、自动质量、自动格式
+CLOUDINARY_UPLOAD_TRANSFORMATION = [
+    {"width": 1200, "height": 800, "crop": "limit"},
+    {"quality": "auto:good"},
+    {"fetch_format": "auto"},
+]
+# 分块上传（upload_large）每块的大小：SDK 一次只把一块读进内存；Cloudinary 要求除最后一块外至少 5MB
+CLOUDINARY_UPLOAD_CHUNK_SIZE = int(os.getenv("CLOUDINARY_UPLOAD_CHUNK_SIZE", str(6 * 1024 * 1024)))
+# delete_resources 一次最多 100 个 public_id
+CLOUDINARY_DELETE_BATCH = 100
+
+# 列表缩略图的宽度上限（等比缩小、不裁剪、不放大）；full 就是上传后的原图（最大 1200x800）
+IMAGE_VARIANTS = {"thumb": 320, "medium": 640}
+
+
+class StorageError(Exception):
+    """存储后端保存失败，消息直接展示给用户"""
+
+
+class StorageBackend(ABC):
+    name = "base"
+
+    @abstractmethod
+    def put(self, file_handle: BinaryIO, folder: str, name: str, fmt: Optional[str] = None) -> Dict:
+        ...
+
+    @abstractmethod
+    def delete(self, public_id: str) -> bool:
+        ...
+
+    def delete_many(self, public_ids: List[str]) -> Dict[str, Optional[str]]:
+        """批量删除，返回 public_id -> 错误信息（None 表示已删除或本来就不存在）"""
+        results = {}
+        for public_id in public_ids:
+            try:
+                self.delete(public_id)
+                results[public_id] = None
+            except Exception as e:
+                results[public_id] = str(e)
+        return results
+
+    @abstractmethod
+    def url(self, public_id: str, fmt: Optional[str] = None) -> str:
+        ...
+
+    @abstractmethod
+    def variant_url(self, public_id: str, fmt: Optional[str] = None,
+                    width: Optional[int] = None, height: Optional[int] = None, crop: str = "fill") -> str:
+        ...
+
+    def variants(self, public_id: str, fmt: Optional[str] = None,
+                 width: Optional[int] = None, height: Optional[int] = None) -> Dict[str, Dict]:
+        """{"thumb": {"url", "width", "height"}, "medium": ..., "full": ...}；原图宽高未知时宽高为 None"""
+        result = {}
+        for name, max_width in IMAGE_VARIANTS.items():
+            variant_width, variant_height = scaled_size(width, height, max_width)
+            result[name] = {
+                "url": self.variant_url(public_id, fmt, width=max_width, crop="limit"),
+                "width": variant_width,
+                "height": variant_height,
+            }
+        result["full"] = {"url": self.url(public_id, fmt), "width": width, "height": height}
+        return result
+
+
+class CloudinaryStorage(StorageBackend):
+    name = "cloudinary"
+
+    def put(self, file_handle, folder, name, fmt=None):
+        cloudinary = get_cloudinary()
+        try:
+            # upload() 会把整个文件 read() 进内存；upload_large 按块读、按块传。
+            # 后续分块会带上第一块返回的 public_id（已含目录），所以目录直接写进 public_id，不另传 folder
+            result = cloudinary.uploader.upload_large(
+                file_handle,
+                chunk_size=CLOUDINARY_UPLOAD_CHUNK_SIZE,
+                filename=name,
+                public_id=f"{folder.strip('/')}/{name}",
+                resource_type="image",
+                overwrite=False,  # 不覆盖同名文件
+                transformation=CLOUDINARY_UPLOAD_TRANSFORMATION,
+            )
+        except cloudinary.exceptions.Error as e:
+            raise StorageError(f"Cloudinary上传失败: {e}")
+        return {
+            "public_id": result.get("public_id"),
+            "url": result.get("secure_url"),
+            "format": result.get("format"),
+            "width": result.get("width"),
+            "height": result.get("height"),
+            "bytes": result.get("bytes"),
+            "created_at": result.get("created_at"),
+        }
+
+    def delete(self, public_id):
+        result = get_cloudinary().uploader.destroy(public_id)
+        if result.get("result") == "ok":
+            return True
+        if result.get("result") == "not found":
+            return False
+        raise StorageError(result.get("result", "未知错误"))
+
+    def delete_many(self, public_ids):
+        # Admin API 一次最多 100 个；整批请求失败时异常直接抛给调用方，整批重试
+        results = {}
+        for start in range(0, len(public_ids), CLOUDINARY_DELETE_BATCH):
+            batch = public_ids[start:start + CLOUDINARY_DELETE_BATCH]
+            deleted = get_cloudinary().api.delete_resources(batch, resource_type="image").get("deleted", {})
+            for public_id in batch:
+                status = deleted.get(public_id)
+                results[public_id] = None if status in ("deleted", "not_found") else f"删除失败: {status}"
+        return results
+
+    # 地址直接拼，不为了拼字符串导入 SDK（照片墙一页要拼几十个）
+    def _base(self) -> str:
+        return f"https://res.cloudinary.com/{os.getenv('CLOUDINARY_CLOUD_NAME')}/image/upload"
+
+    def url(self, public_id, fmt=None):
+        suffix = f".{fmt}" if fmt else ""
+        return f"{self._base()}/{public_id}{suffix}"
+
+    def variant_url(self, public_id, fmt=None, width=None, height=None, crop="fill"):
+        params = []
+        if width:
+            params.append(f"w_{width}")
+        if height:
+            params.append(f"h_{height}")
+        if params:
+            params.append(f"c_{crop}")
+        suffix = f".{fmt}" if fmt else ""
+        transformation = ",".join(params) + "/" if params else ""
+        return f"{self._base()}/{transformation}{public_id}{suffix}"
+
+
+class LocalStorage(StorageBackend):
+    """
+    存在本地目录里，由 /static 直接提供访问
+    - 按文件名哈希分两级目录（ab/cd/），单个目录下文件不会太多
+    - 先写同目录的临时文件再 os.replace，读到的要么是完整文件要么不存在
+    - 不做缩放，variant_url 返回原图
+    """
+    name = "local"
+
+    def __init__(self, root: str = LOCAL_STORAGE_DIR, url_prefix: str = LOCAL_STORAGE_URL):
+        self.root = root
+        self.url_prefix = url_prefix.rstrip("/")
+
+    def _relative(self, public_id: str) -> str:
+        relative = public_id[len(LOCAL_PREFIX):] if public_id.startswith(LOCAL_PREFIX) else public_id
+        # public_id 来自数据库，仍然防一下 ../
+        normalized = os.path.normpath(relative)
+        if normalized.startswith("..") or os.path.isabs(normalized):
+            raise ValueError(f"非法的 public_id: {public_id}")
+        return normalized
+
+    def path(self, public_id: str, fmt: str) -> str:
+        return os.path.join(self.root, f"{self._relative(public_id)}.{fmt}")
+
+    def put(self, file_handle, folder, name, fmt=None):
+        fmt = fmt or "jpg"
+        # name 里带着用户上传的文件名，去掉路径分隔符
+        name = name.replace("/", "_").replace("\\", "_")
+        digest = hashlib.sha1(name.encode("utf-8")).hexdigest()
+        public_id = f"{LOCAL_PREFIX}{folder.strip('/')}/{digest[:2]}/{digest[2:4]}/{name}"
+        target = self.path(public_id, fmt)
+        directory = os.path.dirname(target)
+        os.makedirs(directory, exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                shutil.copyfileobj(file_handle, out, 256 * 1024)
+                out.flush()
+                os.fsync(out.fileno())
+            os.chmod(tmp_path, 0o644)  # mkstemp 默认 0600
+            os.replace(tmp_path, target)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        return {
+            "public_id": public_id,
+            "url": self.url(public_id, fmt),
+            "format": fmt,
+            "width": None,
+            "height": None,
+            "bytes": os.path.getsize(target),
+            "created_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        }
+
+    def delete(self, public_id):
+        # 删除时数据库里不一定有格式，按 public_id.* 找
+        pattern = os.path.join(self.root, glob.escape(self._relative(public_id)) + ".*")
+        removed = False
+        for path in glob.glob(pattern):
+            os.remove(path)
+            removed = True
+        return removed
+
+    def url(self, public_id, fmt=None):
+        suffix = f".{fmt}" if fmt else ""
+        return f"{self.url_prefix}/{self._relative(public_id)}{suffix}".replace(os.sep, "/")
+
+    def variant_url(self, public_id, fmt=None, width=None, height=None, crop="fill"):
+        return self.url(public_id, fmt)
+
+    def variants(self, public_id, fmt=None, width=None, height=None):
+        # 不缩放，几个尺寸都是原图
+        original = {"url": self.url(public_id, fmt), "width": width, "height": height}
+        return {name: dict(original) for name in (*IMAGE_VARIANTS, "full")}
+
+
+def scaled_size(width: Optional[int], height: Optional[int], max_width: int):
+    """按宽度上限等比缩小后的宽高（c_limit 不放大）"""
+    if not width or not height:
+        return None, None
+    if width <= max_width:
+        return width, height
+    return max_width, round(height * max_width / width)
+
+
+BACKENDS = {
+    "cloudinary": CloudinaryStorage,
+    "local": LocalStorage,
+}
+
+_backends: Dict[str, StorageBackend] = {}
+
+
+def get_backend(name: str) -> StorageBackend:
+    if name not in _backends:
+        if name not in BACKENDS:
+            raise ValueError(f"未知的存储后端: {name}（可选: {', '.join(BACKENDS)}）")
+        _backends[name] = BACKENDS[name]()
+    return _backends[name]
+
+
+def get_storage() -> StorageBackend:
+    """新上传的图片用配置里的后端（每次读环境变量，.env 在路由导入之后才加载）"""
+    return get_backend(os.getenv("STORAGE_BACKEND", DEFAULT_STORAGE_BACKEND))
+
+
+def storage_for(public_id: str) -> StorageBackend:
+    """已有图片按 public_id 找到它所在的后端"""
+    return get_backend("local" if public_id.startswith(LOCAL_PREFIX) else "cloudinary")
+
+
+def image_url(public_id: str, fmt: Optional[str] = None) -> str:
+    return storage_for(public_id).url(public_id, fmt)
+
+
+def image_variant_url(public_id: str, fmt: Optional[str] = None,
+                      width: Optional[int] = None, height: Optional[int] = None, crop: str = "fill") -> str:
+    """模板里用：{{ image_variant_url(photo.cloudinary_public_id, photo.format, 300, 300) }}"""
+    return storage_for(public_id).variant_url(public_id, fmt, width, height, crop)
+
+
+def image_variants(public_id: Optional[str], fmt: Optional[str] = None,
+                   width: Optional[int] = None, height: Optional[int] = None,
+                   image_url: Optional[str] = None, stored: Optional[dict] = None) -> Optional[dict]:
+    """
+    照片返回给前端的尺寸变体：优先用上传时存下的；
+    老数据按 public_id 现算（只是拼字符串）；连 public_id 都没有的只有原图
+    """
+    if stored:
+        return stored
+    if public_id:
+        return storage_for(public_id).variants(public_id, fmt, width, height)
+    if image_url:
+        return {"full": {"url": image_url, "width": width, "height": height}}
+    return None
+
+
+def variants_of(item) -> Optional[dict]:
+    """照片 / 动态对象（ORM 对象或查询行）的尺寸变体"""
+    return image_variants(
+        item.cloudinary_public_id, item.format,
+        getattr(item, "width", None), getattr(item, "height", None),
+        item.image_url, item.image_variants
+    )
+
+
+def image_srcset(variants: Optional[dict]) -> str:
+    """
+    模板里用：变体拼成 srcset（按宽度升序），不到两个尺寸时返回空串
+    原图比缩略图还小时几个变体会缩成同一个宽度，每个宽度只留最小的那个变体；同一个地址也只出现一次
+    """
+    if not variants:
+        return ""
+    # 从小到大看：thumb、medium，最后是 full
+    names = sorted(variants, key=lambda name: IMAGE_VARIANTS.get(name, float("inf")))
+    entries = {}
+    for name in names:
+        variant = variants[name]
+        url = variant.get("url")
+        width = variant.get("width") or IMAGE_VARIANTS.get(name)
+        if url and width and width not in entries and url not in entries.values():
+            entries[width] = url
+    if len(entries) < 2:
+        return ""
+    return ", ".join(f"{url} {width}w" for width, url in sorted(entries.items()))
@@ -1,5 +1,11 @@
 # app/services/weather_service.py
-import requests
+import asyncio
+import os
+import time
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+if TYPE_CHECKING:
+    import httpx
 
 WEATHER_CODE_MAP = {
     0: "晴天",
@@ -14,38 +20,214 @@ WEATHER_CODE_MAP = {
     80: "阵雨",
 }
 
-def get_weather() -> dict | None:
+WEATHER_API_URL = "https://api.open-meteo.com/v1/forecast"
+# 默认坐标：咸阳
+DEFAULT_LATITUDE = 34.3296
+DEFAULT_LONGITUDE = 108.7093
+
+# 缓存多久算新鲜 / 后台多久刷新一次 / 请求超时（秒）
+WEATHER_TTL_SECONDS = float(os.getenv("WEATHER_TTL_SECONDS", "600"))
+WEATHER_REFRESH_SECONDS = float(os.getenv("WEATHER_REFRESH_SECONDS", "300"))
+WEATHER_TIMEOUT_SECONDS = float(os.getenv("WEATHER_TIMEOUT_SECONDS", "3"))
+# 上游失败后多久内不再由页面请求触发重试（后台定时刷新不受影响）
+WEATHER_RETRY_SECONDS = 30
+# 最多缓存多少组坐标，超过时淘汰最久没被访问的
+WEATHER_MAX_LOCATIONS = 64
+
+Coords = Tuple[float, float]
+
+
+def coords_key(latitude: float, longitude: float) -> Coords:
+    """坐标保留两位小数（约 1km），附近的请求共用一份缓存"""
+    return round(latitude, 2), round(longitude, 2)
+
+
+def parse_weather(data: dict) -> Optional[dict]:
     """
-    返回示例：
+    open-meteo 的返回转成：
     {
         "temp": 23,
         "text": "多云"
     }
     """
-    url = (
-        "https://api.open-meteo.com/v1/forecast"
-        "?latitude=34.3296"
-        "&longitude=108.7093"
-        "&current_weather=true"
-    )
-
-    try:
-        res = requests.get(url, timeout=3)
-        data = res.json()
-
-        current = data.get("current_weather")
-        if not current:
+    current = data.get("current_weather")
+    if not current:
+        return None
+
+    return {
+        "temp": int(current["temperature"]),
+        "text": WEATHER_CODE_MAP.get(current["weathercode"], "天气不错")
+    }
+
+
+class _Entry:
+    __slots__ = ("value", "fetched_at", "accessed_at")
+
+    def __init__(self, value: dict, fetched_at: float):
+        self.value = value
+        self.fetched_at = fetched_at
+        self.accessed_at = fetched_at
+
+
+class WeatherProvider:
+    """
+    天气缓存：按坐标缓存，后台任务定时刷新。
+    过期的值在刷新完成前（或上游挂掉时）继续返回，页面不会等网络。
+    """
+
+    def __init__(
+            self,
+            ttl: float = WEATHER_TTL_SECONDS,
+            refresh_interval: float = WEATHER_REFRESH_SECONDS,
+            timeout: float = WEATHER_TIMEOUT_SECONDS
+    ):
+        self.ttl = ttl
+        self.refresh_interval = refresh_interval
+        self.timeout = timeout
+        self._cache: Dict[Coords, _Entry] = {}
+        self._inflight: Dict[Coords, asyncio.Task] = {}
+        self._retry_at: Dict[Coords, float] = {}
+        self._client: Optional["httpx.AsyncClient"] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    # ========== 生命周期 ==========
+    async def start(self):
+        """应用启动时调用：创建共享的 HTTP 客户端，启动后台刷新"""
+        self._loop = asyncio.get_running_loop()
+        self._get_client()
+        self.refresh(DEFAULT_LATITUDE, DEFAULT_LONGITUDE)
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+        for task in list(self._inflight.values()):
+            task.cancel()
+        if self._client:
+            await self._client.aclose()
+            self._client = None
+        self._loop = None
+
+    def _get_client(self) -> "httpx.AsyncClient":
+        if self._client is None:
+            # 用到时才导入，httpx 不放在 worker 启动的导入路径上
+            import httpx
+            self._client = httpx.AsyncClient(timeout=self.timeout)
+        return self._client
+
+    # ========== 读取 ==========
+    def peek(self, latitude: float = DEFAULT_LATITUDE, longitude: float = DEFAULT_LONGITUDE) -> Optional[dict]:
+        """
+        只读缓存，不做任何网络请求（同步路由也可以调用）
+        缓存过期时在后台刷新，这次先返回旧值
+        """
+        key = coords_key(latitude, longitude)
+        entry = self._cache.get(key)
+        if (entry is None or self._is_stale(entry)) and self._can_retry(key):
+            self._schedule_refresh(key)
+        if entry is None:
             return None
+        entry.accessed_at = time.monotonic()
+        return entry.value
 
-        temp = int(current["temperature"])
-        code = current["weathercode"]
-        text = WEATHER_CODE_MAP.get(code, "天气不错")
+    async def get(self, latitude: float = DEFAULT_LATITUDE, longitude: float = DEFAULT_LONGITUDE) -> Optional[dict]:
+        """有缓存就直接返回（过期的同时触发后台刷新），完全没有缓存时才等一次请求"""
+        key = coords_key(latitude, longitude)
+        entry = self._cache.get(key)
+        if entry is not None:
+            return self.peek(latitude, longitude)
+        if not self._can_retry(key):
+            return None
 
-        return {
-            "temp": temp,
-            "text": text
-        }
+        await asyncio.shield(self._refresh(key))
+        entry = self._cache.get(key)
+        return entry.value if entry else None
 
-    except Exception as e:
-        print("Weather API error:", e)
-        return None
+    # ========== 刷新 ==========
+    def refresh(self, latitude: float, longitude: float):
+        """在后台刷新某个坐标（同一坐标同时只有一个请求）"""
+        self._refresh(coords_key(latitude, longitude))
+
+    def _is_stale(self, entry: _Entry) -> bool:
+        return time.monotonic() - entry.fetched_at > self.ttl
+
+    def _can_retry(self, key: Coords) -> bool:
+        return time.monotonic() >= self._retry_at.get(key, 0)
+
+    def _schedule_refresh(self, key: Coords):
+        """从任意线程触发刷新；还没 start（比如测试里）时什么都不做"""
+        if self._loop is None or self._loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._refresh(key)
+        else:
+            self._loop.call_soon_threadsafe(self._refresh, key)
+
+    def _refresh(self, key: Coords) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is None or task.done():
+            task = asyncio.get_running_loop().create_task(self._fetch(key))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return task
+
+    async def _fetch(self, key: Coords):
+        latitude, longitude = key
+        try:
+            res = await self._get_client().get(WEATHER_API_URL, params={
+                "latitude": latitude,
+                "longitude": longitude,
+                "current_weather": "true"
+            })
+            res.raise_for_status()
+            value = parse_weather(res.json())
+        except Exception as e:
+            # 上游失败时保留旧值，过一会儿再试
+            print("Weather API error:", e)
+            self._retry_at[key] = time.monotonic() + WEATHER_RETRY_SECONDS
+            return
+
+        self._retry_at.pop(key, None)
+        if value is None:
+            return
+        entry = self._cache.get(key)
+        if entry:
+            entry.value, entry.fetched_at = value, time.monotonic()
+        else:
+            self._cache[key] = _Entry(value, time.monotonic())
+            self._evict()
+
+    def _evict(self):
+        while len(self._cache) > WEATHER_MAX_LOCATIONS:
+            oldest = min(self._cache, key=lambda k: self._cache[k].accessed_at)
+            del self._cache[oldest]
+
+    async def _refresh_loop(self):
+        """定时刷新所有缓存中的坐标（默认坐标即使还没拿到过也刷新），让首页总能拿到热缓存"""
+        default_key = coords_key(DEFAULT_LATITUDE, DEFAULT_LONGITUDE)
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            for key in {default_key, *self._cache}:
+                self._refresh(key)
+
+
+weather_provider = WeatherProvider()
+
+
+def get_weather() -> dict | None:
+    """
+    返回示例：
+    {
+        "temp": 23,
+        "text": "多云"
+    }
+    只读缓存，不会阻塞在网络请求上；缓存为空时返回 None
+    """
+    return weather_provider.peek()
@@ -0,0 +1,105 @@
+# app/startup_profile.py
+"""
+启动耗时分析：在子进程里用 -X importtime 导入 app.main，按模块汇总导入耗时
+
+    python -m app.startup_profile
+    python -m app.startup_profile --top 30 --only app
+    python -m app.startup_profile --max-total-ms 1500   # 超过阈值时退出码为 1，可放进 CI
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+
+# import time:     self [us] | cumulative | imported package
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def parse_importtime(stderr: str) -> list:
+    """解析 -X importtime 的输出，返回 [{module, self_us, cumulative_us, depth}]"""
+    rows = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, module = match.groups()
+        rows.append({
+            "module": module,
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us),
+            # 输出里每层缩进两个空格（第一层前面有一个空格）
+            "depth": (len(indent) - 1) // 2,
+        })
+    return rows
+
+
+def profile_import(module: str = "app.main") -> tuple:
+    """在干净的子进程里导入模块，返回 (解析结果, 总耗时秒数)"""
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    elapsed = time.perf_counter() - start
+
+    if proc.returncode != 0:
+        print(proc.stderr[-2000:], file=sys.stderr)
+        raise SystemExit(f"❌ 导入 {module} 失败")
+
+    return parse_importtime(proc.stderr), elapsed
+
+
+def top_level_package(module: str) -> str:
+    return module.split(".")[0]
+
+
+def print_report(rows: list, elapsed: float, top: int, only: str = None):
+    total_us = sum(r["self_us"] for r in rows)
+    print(f"🚀 导入耗时合计 {total_us / 1000:.1f}ms，子进程总耗时 {elapsed * 1000:.1f}ms，共 {len(rows)} 个模块")
+
+    selected = [r for r in rows if not only or top_level_package(r["module"]) == only]
+
+    print(f"\n📦 累计耗时最高的 {top} 个模块（含子模块）")
+    for r in sorted(selected, key=lambda r: r["cumulative_us"], reverse=True)[:top]:
+        print(f"  {r['cumulative_us'] / 1000:9.1f}ms  {r['module']}")
+
+    print(f"\n🐢 自身耗时最高的 {top} 个模块")
+    for r in sorted(selected, key=lambda r: r["self_us"], reverse=True)[:top]:
+        print(f"  {r['self_us'] / 1000:9.1f}ms  {r['module']}")
+
+    # 按顶层包汇总，方便看是哪个依赖拖慢了启动
+    packages = {}
+    for r in rows:
+        name = top_level_package(r["module"])
+        packages[name] = packages.get(name, 0) + r["self_us"]
+
+    print(f"\n📚 按顶层包汇总（前 {top} 个）")
+    for name, self_us in sorted(packages.items(), key=lambda x: x[1], reverse=True)[:top]:
+        print(f"  {self_us / 1000:9.1f}ms  {name}")
+
+    return total_us
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="统计 app.main 的导入耗时（-X importtime）")
+    parser.add_argument("--module", default="app.main", help="要导入的模块")
+    parser.add_argument("--top", type=int, default=20, help="每个列表显示多少行")
+    parser.add_argument("--only", help="只看某个顶层包，比如 app")
+    parser.add_argument("--max-total-ms", type=float, help="导入总耗时超过这个值时以退出码 1 结束")
+    args = parser.parse_args(argv)
+
+    rows, elapsed = profile_import(args.module)
+    total_us = print_report(rows, elapsed, args.top, args.only)
+
+    if args.max_total_ms is not None and total_us / 1000 > args.max_total_ms:
+        print(f"\n❌ 导入耗时 {total_us / 1000:.1f}ms 超过阈值 {args.max_total_ms:.0f}ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+# benchmarks/bench_compression.py
+"""
+压缩级别基准：gzip / brotli 各个级别的压缩耗时和压缩后大小
+
+样本是几个大模板（memory.html、album_couple_wall.html、album_timeline.html）和一份模拟的动态列表 JSON。
+另外按给定带宽估算“压缩耗时 + 传输耗时”，带宽越小，越值得用更高的级别。
+
+用法：
+    python -m benchmarks.bench_compression
+    python -m benchmarks.bench_compression --bandwidth-kbps 512 --runs 50
+    python -m benchmarks.bench_compression --json-items 2000
+"""
+import argparse
+import gzip
+import json
+import statistics
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+TEMPLATE_DIR = Path(__file__).resolve().parent.parent / "app" / "templates"
+TEMPLATE_SAMPLES = ("memory.html", "album_couple_wall.html", "album_timeline.html")
+
+GZIP_LEVELS = (1, 4, 6, 9)
+BROTLI_QUALITIES = (1, 3, 4, 5, 6, 9, 11)
+
+
+def json_sample(items: int) -> bytes:
+    """和 /moments/ 返回格式一样的列表"""
+    now = datetime(2026, 1, 1)
+    return json.dumps([{
+        "id": i,
+        "user": "me" if i % 2 else "her",
+        "content": f"今天一起去看了海，第 {i} 条动态 🌊",
+        "image": f"https://res.cloudinary.com/demo/image/upload/v1/moments/{i:06d}.jpg" if i % 3 else None,
+        "created_at": (now - timedelta(minutes=37 * i)).isoformat(),
+        "is_owner": i % 2 == 1,
+        "cloudinary_public_id": f"moments/{i:06d}" if i % 3 else None,
+        "format": "jpg" if i % 3 else None,
+    } for i in range(items)], ensure_ascii=False).encode()
+
+
+def load_samples(json_items: int) -> dict:
+    samples = {name: (TEMPLATE_DIR / name).read_bytes() for name in TEMPLATE_SAMPLES}
+    samples[f"moments json ({json_items})"] = json_sample(json_items)
+    return samples
+
+
+def codecs():
+    for level in GZIP_LEVELS:
+        yield f"gzip-{level}", lambda body, level=level: gzip.compress(body, compresslevel=level, mtime=0)
+    if brotli is not None:
+        for quality in BROTLI_QUALITIES:
+            yield f"br-{quality}", lambda body, quality=quality: brotli.compress(body, quality=quality)
+
+
+def measure(body: bytes, fn, runs: int) -> tuple:
+    fn(body)  # 预热
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        out = fn(body)
+        timings.append((time.perf_counter() - start) * 1000)
+    return len(out), statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="gzip / brotli level benchmark")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--json-items", type=int, default=500)
+    parser.add_argument("--bandwidth-kbps", type=float, default=1000, help="估算传输耗时用的带宽")
+    args = parser.parse_args()
+
+    if brotli is None:
+        print("⚠️ 没有安装 brotli，只测 gzip")
+
+    bytes_per_ms = args.bandwidth_kbps * 1000 / 8 / 1000
+    samples = load_samples(args.json_items)
+
+    for name, body in samples.items():
+        raw_ms = len(body) / bytes_per_ms
+        print(f"\n▶ {name}: {len(body) / 1024:.1f} KB，未压缩传输约 {raw_ms:.0f}ms @ {args.bandwidth_kbps:.0f}kbps")
+        print(f"  {'codec':<10}{'size KB':>10}{'ratio':>8}{'cpu ms':>10}{'MB/s':>9}{'cpu+传输 ms':>14}")
+        for codec, fn in codecs():
+            size, cpu_ms = measure(body, fn, args.runs)
+            throughput = len(body) / 1024 / 1024 / (cpu_ms / 1000) if cpu_ms else 0
+            total_ms = cpu_ms + size / bytes_per_ms
+            print(f"  {codec:<10}{size / 1024:>10.1f}{len(body) / size:>8.2f}{cpu_ms:>10.3f}{throughput:>9.1f}{total_ms:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
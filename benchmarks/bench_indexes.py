@@ -0,0 +1,210 @@
+# benchmarks/bench_indexes.py
+"""
+热点查询的索引基准：在种子数据上对比加索引前后的执行计划和耗时
+
+用法：
+    python -m benchmarks.bench_indexes                 # 默认临时 SQLite 文件
+    BENCH_DATABASE_URL=postgresql://... python -m benchmarks.bench_indexes
+    python -m benchmarks.bench_indexes --photos 100000 --runs 50
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, date, timedelta
+
+from sqlalchemy import create_engine, text, insert
+
+from app.db import Base
+from app.models import User, CouplePhoto, MemoryDay, MemorySnapshot, AlbumPhoto, AlbumComment, Moment
+
+# 本次迁移新增的索引（17a03615758e）
+NEW_INDEXES = {
+    "ix_couple_photos_owner_taken_created",
+    "uq_memory_snapshots_memory_day_id_year",
+    "ix_memory_days_owner_id_type",
+    "ix_album_comments_photo_id",
+    "ix_moments_created_at",
+    "ix_album_photos_shoot_date",
+}
+
+# 和 service / 路由里一致的查询形状
+QUERIES = {
+    "couple wall page": (
+        "SELECT * FROM couple_photos WHERE owner_id = :owner "
+        "ORDER BY taken_date DESC, created_at DESC LIMIT 20 OFFSET 0",
+        {"owner": 1},
+    ),
+    "snapshot by day+year": (
+        "SELECT * FROM memory_snapshots WHERE memory_day_id = :day AND year = :year",
+        {"day": 42, "year": 2024},
+    ),
+    "memory days by type": (
+        "SELECT * FROM memory_days WHERE owner_id = :owner AND type = :type",
+        {"owner": 1, "type": "travel"},
+    ),
+    "album comments by photo": (
+        "SELECT * FROM album_comments WHERE photo_id = :photo",
+        {"photo": 777},
+    ),
+    "moments feed": (
+        "SELECT * FROM moments ORDER BY created_at DESC LIMIT 20",
+        {},
+    ),
+    "album timeline": (
+        "SELECT * FROM album_photos ORDER BY shoot_date DESC LIMIT 50",
+        {},
+    ),
+}
+
+
+def new_index_objects():
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            if index.name in NEW_INDEXES:
+                yield index
+
+
+def seed(engine, photos: int, memory_days: int, album_photos: int, moments: int):
+    """写入种子数据（两个用户，数据集中在 user 1 上）"""
+    rnd = random.Random(20260215)
+    now = datetime.now()
+
+    def rand_dt(days_back=3650):
+        return now - timedelta(days=rnd.randint(0, days_back), seconds=rnd.randint(0, 86400))
+
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"id": 1, "name": "me"}, {"id": 2, "name": "her"}])
+
+        conn.execute(insert(CouplePhoto), [{
+            "owner_id": 1 if i % 10 else 2,
+            "image_url": f"https://example.com/{i}.jpg",
+            "caption": f"photo {i}",
+            "taken_date": rand_dt().date(),
+            "is_favorite": i % 7 == 0,
+            "created_at": rand_dt(),
+            "updated_at": now,
+        } for i in range(photos)])
+
+        types = ["love", "birthday", "travel", "custom"]
+        conn.execute(insert(MemoryDay), [{
+            "id": i + 1,
+            "title": f"day {i}",
+            "date": date(2000, 1, 1) + timedelta(days=rnd.randint(0, 9000)),
+            "type": types[i % len(types)],
+            "owner_id": 1 if i % 10 else 2,
+            "created_at": now,
+            "updated_at": now,
+        } for i in range(memory_days)])
+
+        conn.execute(insert(MemorySnapshot), [{
+            "memory_day_id": day_id,
+            "year": year,
+            "note": "note",
+            "created_by": "me",
+            "created_at": now,
+        } for day_id in range(1, memory_days + 1) for year in range(2018, 2026)])
+
+        conn.execute(insert(AlbumPhoto), [{
+            "id": i + 1,
+            "user": "me" if i % 2 else "her",
+            "memory": f"memory {i}",
+            "shoot_date": rand_dt(),
+            "image_url": f"https://example.com/a{i}.jpg",
+            "created_at": rand_dt(),
+        } for i in range(album_photos)])
+
+        conn.execute(insert(AlbumComment), [{
+            "photo_id": rnd.randint(1, album_photos),
+            "user": "me",
+            "content": "❤️",
+            "created_at": rand_dt(),
+        } for _ in range(album_photos * 3)])
+
+        conn.execute(insert(Moment), [{
+            "user": "me" if i % 2 else "her",
+            "content": f"moment {i}",
+            "created_at": rand_dt(),
+        } for i in range(moments)])
+
+
+def explain(conn, sql: str, params: dict) -> str:
+    if conn.dialect.name == "sqlite":
+        rows = conn.execute(text("EXPLAIN QUERY PLAN " + sql), params).all()
+        return " | ".join(row[-1] for row in rows)
+    rows = conn.execute(text("EXPLAIN " + sql), params).all()
+    return " | ".join(row[0].strip() for row in rows[:2])
+
+
+def measure(engine, runs: int) -> dict:
+    results = {}
+    with engine.connect() as conn:
+        for name, (sql, params) in QUERIES.items():
+            conn.execute(text(sql), params).all()  # 预热
+            timings = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                conn.execute(text(sql), params).all()
+                timings.append((time.perf_counter() - start) * 1000)
+            results[name] = {
+                "plan": explain(conn, sql, params),
+                "median_ms": statistics.median(timings),
+                "p95_ms": sorted(timings)[int(len(timings) * 0.95) - 1],
+            }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="composite index benchmark")
+    parser.add_argument("--photos", type=int, default=50000)
+    parser.add_argument("--memory-days", type=int, default=5000)
+    parser.add_argument("--album-photos", type=int, default=20000)
+    parser.add_argument("--moments", type=int, default=50000)
+    parser.add_argument("--runs", type=int, default=30)
+    args = parser.parse_args()
+
+    url = os.getenv("BENCH_DATABASE_URL")
+    if not url:
+        url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_indexes.db')}"
+    engine = create_engine(url)
+    print(f"📦 数据库: {engine.url.render_as_string(hide_password=True)}")
+
+    # 旧结构：建表后去掉新索引
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    for index in new_index_objects():
+        index.drop(engine)
+
+    start = time.perf_counter()
+    seed(engine, args.photos, args.memory_days, args.album_photos, args.moments)
+    print(f"🌱 种子数据写入完成，用时 {time.perf_counter() - start:.1f}s")
+
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+    before = measure(engine, args.runs)
+
+    for index in new_index_objects():
+        index.create(engine)
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+    after = measure(engine, args.runs)
+
+    print()
+    print(f"{'query':<26}{'before ms':>12}{'after ms':>12}{'speedup':>10}")
+    for name in QUERIES:
+        b, a = before[name]["median_ms"], after[name]["median_ms"]
+        print(f"{name:<26}{b:>12.3f}{a:>12.3f}{b / a if a else 0:>9.1f}x")
+
+    print()
+    for name in QUERIES:
+        print(f"▶ {name}")
+        print(f"    before: {before[name]['plan']}")
+        print(f"    after:  {after[name]['plan']}")
+
+    Base.metadata.drop_all(engine)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+# benchmarks/bench_memory_stats.py
+"""
+纪念日统计基准：旧版 get_memory_stats（4 条统计查询 + 一次完整的 only_upcoming 列表查询）
+对比现在的单条聚合查询（有即将到来的纪念日时再查最多 5 条）
+SQLite 在进程内，省掉的主要是网络往返，用 Postgres 跑差距更明显
+
+用法：
+    python -m benchmarks.bench_memory_stats                     # 默认临时 SQLite 文件
+    BENCH_DATABASE_URL=postgresql://... python -m benchmarks.bench_memory_stats
+    python -m benchmarks.bench_memory_stats --memory-days 5000 --snapshots 8 --runs 50
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import create_engine, event, extract, func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import selectinload
+
+from app.db import Base, to_async_url
+from app.models import User, MemoryDay, MemorySnapshot, next_anniversary_of
+from app.service.memory_service import MemoryService
+
+
+async def legacy_memory_stats(db: AsyncSession, user_id: int) -> dict:
+    """改动前的实现，保留在这里做对比"""
+    today = date.today()
+
+    total_memories = await db.scalar(
+        select(func.count(MemoryDay.id)).where(MemoryDay.owner_id == user_id)
+    )
+    by_type = (await db.execute(
+        select(MemoryDay.type, func.count(MemoryDay.id).label('count'))
+        .where(MemoryDay.owner_id == user_id)
+        .group_by(MemoryDay.type)
+    )).all()
+    total_snapshots = await db.scalar(
+        select(func.count(MemorySnapshot.id)).join(MemoryDay)
+        .where(MemoryDay.owner_id == user_id)
+    )
+    earliest = await db.scalar(
+        select(MemoryDay.date).where(MemoryDay.owner_id == user_id)
+        .order_by(MemoryDay.date.asc()).limit(1)
+    )
+    years_together = MemoryService.calculate_years_since(earliest, today) if earliest else 0
+
+    upcoming_memories = (await db.scalars(
+        select(MemoryDay).where(
+            MemoryDay.owner_id == user_id,
+            MemoryDay.is_annual == True,
+            extract('month', MemoryDay.date) == today.month,
+            extract('day', MemoryDay.date) >= today.day,
+            extract('day', MemoryDay.date) <= (today + timedelta(days=30)).day
+        )
+        .options(selectinload(MemoryDay.snapshots))
+        .order_by(extract('month', MemoryDay.date), extract('day', MemoryDay.date))
+    )).all()
+
+    return {
+        "total_memories": total_memories,
+        "by_type": dict(by_type),
+        "total_snapshots": total_snapshots,
+        "years_together": years_together,
+        "upcoming_count": len(upcoming_memories),
+        "upcoming_memories": upcoming_memories[:5]
+    }
+
+
+IMPLEMENTATIONS = {
+    "legacy (5 queries)": legacy_memory_stats,
+    "aggregate": MemoryService.get_memory_stats,
+}
+
+
+def seed(engine, users: int, memory_days: int, snapshots: int):
+    """每个用户 memory_days 个纪念日，每个纪念日 snapshots 条年轮"""
+    rnd = random.Random(20260301)
+    now = datetime.now()
+    types = ["love", "birthday", "travel", "custom"]
+
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"id": u, "name": f"user{u}"} for u in range(1, users + 1)])
+
+        days = []
+        for i in range(users * memory_days):
+            day = date(2000, 1, 1) + timedelta(days=rnd.randint(0, 9000))
+            days.append({
+                "id": i + 1,
+                "title": f"day {i}",
+                "date": day,
+                "type": types[i // users % len(types)],
+                "is_annual": i % 5 != 0,
+                "next_anniversary_date": next_anniversary_of(day) if i % 5 != 0 else None,
+                "owner_id": i % users + 1,
+                "created_at": now,
+                "updated_at": now,
+            })
+        conn.execute(insert(MemoryDay), days)
+
+        conn.execute(insert(MemorySnapshot), [{
+            "memory_day_id": day["id"],
+            "year": 2025 - k,
+            "note": "note",
+            "created_by": "me",
+            "created_at": now,
+        } for day in days for k in range(rnd.randint(0, snapshots))])
+
+
+async def measure(url: str, user_id: int, runs: int) -> dict:
+    engine = create_async_engine(url)
+    statements = []
+    # 统计每次调用发了几条 SQL（网络数据库上每条都是一次往返）
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(1))
+    results = {}
+    try:
+        for name, impl in IMPLEMENTATIONS.items():
+            async with AsyncSession(engine, expire_on_commit=False) as db:
+                stats = await impl(db, user_id)  # 预热
+                timings = []
+                for _ in range(runs):
+                    db.expunge_all()
+                    start = time.perf_counter()
+                    await impl(db, user_id)
+                    timings.append((time.perf_counter() - start) * 1000)
+                statements.clear()
+                await impl(db, user_id)
+            results[name] = {
+                "stats": stats,
+                "queries": len(statements),
+                "median_ms": statistics.median(timings),
+                "p95_ms": sorted(timings)[int(len(timings) * 0.95) - 1],
+            }
+    finally:
+        await engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="memory stats benchmark")
+    parser.add_argument("--users", type=int, default=4)
+    parser.add_argument("--memory-days", type=int, default=3000, help="每个用户的纪念日数")
+    parser.add_argument("--snapshots", type=int, default=8, help="每个纪念日最多几条年轮")
+    parser.add_argument("--runs", type=int, default=30)
+    args = parser.parse_args()
+
+    url = os.getenv("BENCH_DATABASE_URL")
+    if not url:
+        url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_memory_stats.db')}"
+    engine = create_engine(url)
+    print(f"📦 数据库: {engine.url.render_as_string(hide_password=True)}")
+
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+
+    start = time.perf_counter()
+    seed(engine, args.users, args.memory_days, args.snapshots)
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+    print(f"🌱 种子数据写入完成，用时 {time.perf_counter() - start:.1f}s")
+
+    results = asyncio.run(measure(to_async_url(url), 1, args.runs))
+
+    print()
+    print(f"{'implementation':<22}{'queries':>8}{'median ms':>12}{'p95 ms':>12}")
+    for name, r in results.items():
+        print(f"{name:<22}{r['queries']:>8}{r['median_ms']:>12.3f}{r['p95_ms']:>12.3f}")
+
+    # 两边的计数应该一致（即将到来的个数除外：旧版只看当月，会漏掉跨月的）
+    legacy, current = (r["stats"] for r in results.values())
+    for key in ("total_memories", "by_type", "total_snapshots", "years_together"):
+        mark = "✅" if legacy[key] == current[key] else "❌"
+        print(f"{mark} {key}: {legacy[key]} / {current[key]}")
+    print(f"ℹ️ upcoming_count: {legacy['upcoming_count']} / {current['upcoming_count']}")
+
+    Base.metadata.drop_all(engine)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+// static/js/image_attrs.js
+// 图片尺寸变体 -> src / srcset / sizes 属性（和模板里的 image_attrs 一致），照片墙和动态页共用
+const VARIANT_WIDTHS = { thumb: 320, medium: 640 };
+
+function imageAttrs(variants, fallbackUrl, size, sizes) {
+    variants = variants || {};
+    const chosen = variants[size] || variants.full || {};
+    const src = chosen.url || fallbackUrl || '';
+    // 从小到大看（thumb、medium、full），每个宽度只留最小的变体，同一个地址也只出现一次
+    const entries = new Map();
+    const rank = name => VARIANT_WIDTHS[name] || Infinity;
+    Object.keys(variants).sort((a, b) => rank(a) - rank(b)).forEach(name => {
+        const variant = variants[name] || {};
+        const width = variant.width || VARIANT_WIDTHS[name];
+        const urls = [...entries.values()];
+        if (variant.url && width && !entries.has(width) && !urls.includes(variant.url)) entries.set(width, variant.url);
+    });
+    let attrs = `src="${escapeAttr(src)}"`;
+    if (entries.size >= 2) {
+        const srcset = [...entries].sort((a, b) => a[0] - b[0]).map(([width, url]) => `${url} ${width}w`).join(', ');
+        attrs += ` srcset="${escapeAttr(srcset)}" sizes="${sizes}"`;
+    }
+    return attrs;
+}
+
+function escapeAttr(text) {
+    return String(text).replace(/&/g, '&amp;').replace(/"/g, '&quot;');
+}
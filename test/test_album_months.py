@@ -0,0 +1,20 @@
+from datetime import datetime
+
+import pytest
+
+from app.service.album_service import parse_month, month_range
+
+
+def test_parse_month():
+    assert parse_month("2024-05") == (2024, 5)
+
+
+@pytest.mark.parametrize("month", ["2024-13", "2024", "abc", "2024-05-01"])
+def test_parse_month_rejects_invalid(month):
+    with pytest.raises(ValueError):
+        parse_month(month)
+
+
+def test_month_range_rolls_over_year():
+    assert month_range(2024, 12) == (datetime(2024, 12, 1), datetime(2025, 1, 1))
+    assert month_range(2024, 2) == (datetime(2024, 2, 1), datetime(2024, 3, 1))
@@ -0,0 +1,66 @@
+import gzip
+
+import brotli
+from fastapi import FastAPI
+from fastapi.responses import HTMLResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core.compression import CompressionMiddleware, choose_encoding
+
+PAGE = "<p>你好</p>" * 500
+
+demo = FastAPI()
+demo.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+
+@demo.get("/page")
+def page():
+    return HTMLResponse(PAGE)
+
+
+@demo.get("/small")
+def small():
+    return HTMLResponse("<p>hi</p>")
+
+
+@demo.get("/image")
+def image():
+    return Response(b"\xff\xd8" * 2000, media_type="image/jpeg")
+
+
+@demo.get("/stream")
+def stream():
+    return StreamingResponse(iter([PAGE, PAGE]), media_type="text/html")
+
+
+client = TestClient(demo)
+
+
+def raw_get(path, encoding):
+    # 不让 httpx 自动解压，直接看原始字节
+    with client.stream("GET", path, headers={"Accept-Encoding": encoding}) as r:
+        return r, b"".join(r.iter_raw())
+
+
+def test_choose_encoding_respects_q_values():
+    assert choose_encoding("gzip, deflate, br") == "br"
+    assert choose_encoding("gzip;q=1, br;q=0.5") == "gzip"
+    assert choose_encoding("identity") is None
+    assert choose_encoding("br;q=0") is None
+
+
+def test_compresses_html_and_streams():
+    r, body = raw_get("/page", "br")
+    assert r.headers["content-encoding"] == "br"
+    assert r.headers["vary"] == "Accept-Encoding"
+    assert brotli.decompress(body).decode() == PAGE
+
+    r, body = raw_get("/stream", "gzip")
+    assert r.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(body).decode() == PAGE * 2
+
+
+def test_skips_small_and_binary_responses():
+    for path in ("/small", "/image"):
+        r, _ = raw_get(path, "br, gzip")
+        assert "content-encoding" not in r.headers
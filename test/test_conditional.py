@@ -0,0 +1,27 @@
+from starlette.requests import Request
+
+from app.core.conditional import etag_matches, make_etag, not_modified
+
+
+def request_with(if_none_match=None):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+def test_etag_changes_with_version_and_filters():
+    assert make_etag("moments", "me", None, 20, 3, 9) == make_etag("moments", "me", None, 20, 3, 9)
+    assert make_etag("moments", "me", None, 20, 3, 9) != make_etag("moments", "me", None, 20, 4, 10)
+    assert make_etag("moments", "me", None, 20, 3, 9) != make_etag("moments", "her", None, 20, 3, 9)
+
+
+def test_if_none_match_list_and_weak_comparison():
+    etag = make_etag("x", 1)
+    assert etag_matches(request_with(f'"other", {etag}'), etag)
+    assert etag_matches(request_with(etag[2:]), etag)
+    assert etag_matches(request_with("*"), etag)
+    assert not etag_matches(request_with('"other"'), etag)
+    assert not etag_matches(request_with(), etag)
+
+    response = not_modified(etag)
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
@@ -0,0 +1,69 @@
+from datetime import date, datetime
+
+import pytest
+
+from app.models import CouplePhoto
+from app.service.couple_service import encode_photo_cursor, decode_photo_cursor
+
+
+def test_photo_cursor_roundtrip():
+    photo = CouplePhoto(id=42, taken_date=date(2025, 5, 11), created_at=datetime(2025, 5, 11, 20, 30, 1, 123))
+    cursor = encode_photo_cursor(photo)
+
+    assert "=" not in cursor
+    assert decode_photo_cursor(cursor) == (date(2025, 5, 11), datetime(2025, 5, 11, 20, 30, 1, 123), 42)
+
+
+def test_photo_cursor_without_taken_date():
+    photo = CouplePhoto(id=7, taken_date=None, created_at=datetime(2024, 1, 1))
+    assert decode_photo_cursor(encode_photo_cursor(photo)) == (None, datetime(2024, 1, 1), 7)
+
+
+def test_invalid_photo_cursor():
+    with pytest.raises(ValueError):
+        decode_photo_cursor("not-a-cursor")
+
+
+def test_wall_data_rejects_bad_cursor(client):
+    client.post("/login", data={"username": "me"})
+    resp = client.get("/couple/wall/data", params={"cursor": "bad"})
+    assert resp.status_code == 400
+
+
+def test_cursor_paging_mixes_dated_and_undated_photos(tmp_path):
+    import asyncio
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+    from app.db import Base
+    from app.service.couple_service import get_all_photos
+
+    async def scenario():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'photos.db'}")
+        try:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            async with AsyncSession(engine, expire_on_commit=False) as db:
+                taken = [date(2025, 5, 3), None, date(2025, 5, 1), None, date(2025, 5, 1), None, date(2025, 4, 30)]
+                db.add_all([
+                    CouplePhoto(owner_id=1, image_url=f"u{i}", cloudinary_public_id=f"p{i}",
+                                taken_date=d, created_at=datetime(2025, 6, 1, 12, i % 3))
+                    for i, d in enumerate(taken)
+                ])
+                await db.commit()
+
+                seen, cursor = [], None
+                while True:
+                    photos, _, cursor = await get_all_photos(db, 1, per_page=2, cursor=cursor, include_total=False)
+                    seen += [p.id for p in photos]
+                    if cursor is None:
+                        break
+        finally:
+            # 不 dispose 的话 aiosqlite 的连接线程不退出，asyncio.run 会一直等
+            await engine.dispose()
+        return seen, [p.taken_date for p in photos]
+
+    seen, last_page = asyncio.run(scenario())
+    assert sorted(seen) == list(range(1, 8))
+    assert len(seen) == 7
+    # 没有拍摄日期的照片排在最后
+    assert last_page[-1] is None
@@ -0,0 +1,45 @@
+from datetime import date
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from app.db import Base
+from app.models import CouplePhotoStats
+from app.service.couple_service import create_photo, delete_photo, toggle_favorite, update_photo_info
+from app.service.couple_stats_service import rebuild_stats
+
+
+def stats_rows(db):
+    return [
+        (r.owner_id, r.year, r.photo_count, r.favorite_count, r.earliest_date, r.latest_date)
+        for r in db.scalars(select(CouplePhotoStats).order_by(CouplePhotoStats.owner_id, CouplePhotoStats.year))
+    ]
+
+
+def new_photo(db, owner_id, taken_date):
+    return create_photo(db, owner_id, None, "https://example.com/x.jpg", "jpg", 1, 1, 1, taken_date=taken_date)
+
+
+def test_incremental_stats_match_rebuild():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        a = new_photo(db, 1, date(2023, 5, 1))
+        b = new_photo(db, 1, date(2023, 1, 9))
+        c = new_photo(db, 1, date(2024, 2, 2))
+        new_photo(db, 2, date(2024, 3, 3))
+
+        toggle_favorite(db, a.id, 1)
+        toggle_favorite(db, c.id, 1)
+        update_photo_info(db, b.id, 1, taken_date=date(2022, 12, 31))
+        delete_photo(db, c.id, 1)
+
+        incremental = stats_rows(db)
+        assert incremental == [
+            (1, 2022, 1, 0, date(2022, 12, 31), date(2022, 12, 31)),
+            (1, 2023, 1, 1, date(2023, 5, 1), date(2023, 5, 1)),
+            (2, 2024, 1, 0, date(2024, 3, 3), date(2024, 3, 3)),
+        ]
+
+        rebuild_stats(db)
+        assert stats_rows(db) == incremental
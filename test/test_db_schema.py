@@ -0,0 +1,17 @@
+from sqlalchemy import MetaData, Table, Column, Integer, String
+
+from app.db_schema import schema_fingerprint
+
+
+def _metadata(*extra_columns):
+    metadata = MetaData()
+    Table("items", metadata, Column("id", Integer, primary_key=True), Column("name", String(20)), *extra_columns)
+    return metadata
+
+
+def test_fingerprint_is_stable():
+    assert schema_fingerprint(_metadata()) == schema_fingerprint(_metadata())
+
+
+def test_fingerprint_changes_with_columns():
+    assert schema_fingerprint(_metadata()) != schema_fingerprint(_metadata(Column("note", String(50))))
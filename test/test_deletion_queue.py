@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from app.db import Base
+from app.models import PendingDeletion
+from app.service import deletion_service
+from app.service.deletion_service import (
+    DELETION_MAX_ATTEMPTS, deletion_stats, enqueue_deletion, process_pending_deletions
+)
+
+
+class FakeBackend:
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.calls = []
+
+    def delete_many(self, public_ids):
+        self.calls.append(list(public_ids))
+        return {p: ("boom" if p in self.fail else None) for p in public_ids}
+
+
+def test_batches_retries_and_gives_up(monkeypatch):
+    backend = FakeBackend(fail={"love_app/bad"})
+    monkeypatch.setattr(deletion_service, "get_backend", lambda name: backend)
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    now = datetime.now()
+    with Session(engine) as db:
+        for public_id in ("love_app/a", "love_app/b", "love_app/bad", None):
+            enqueue_deletion(db, public_id)
+        db.commit()
+
+        later = now + timedelta(seconds=1)
+        assert process_pending_deletions(db, later) == {"deleted": 2, "failed": 1}
+        assert backend.calls == [["love_app/a", "love_app/b", "love_app/bad"]]
+
+        row = db.scalars(select(PendingDeletion)).one()
+        assert (row.public_id, row.attempts, row.last_error) == ("love_app/bad", 1, "boom")
+        assert row.next_attempt_at > later
+        # 还没到重试时间
+        assert process_pending_deletions(db, later) == {"deleted": 0, "failed": 0}
+
+        for _ in range(DELETION_MAX_ATTEMPTS - 1):
+            db.expire_all()
+            process_pending_deletions(db, db.scalars(select(PendingDeletion)).one().next_attempt_at)
+        db.expire_all()
+        assert db.scalars(select(PendingDeletion)).one().next_attempt_at is None
+        assert deletion_stats(db, later) == {"pending": 0, "due": 0, "gave_up": 1, "oldest": row.created_at.isoformat()}
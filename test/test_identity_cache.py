@@ -0,0 +1,37 @@
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.orm import Session
+
+from app.core.identity import IdentityCache, identity_cache
+from app.models import Base, User
+
+
+def test_cached_user_is_detached_and_expires():
+    cache = IdentityCache(ttl=60)
+    cache.set(User(id=1, name="me"))
+
+    user = cache.get(1)
+    assert (user.id, user.name) == (1, "me")
+    assert inspect(user).detached
+
+    cache.ttl = -1
+    cache.set(User(id=2, name="her"))
+    assert cache.get(2) is None
+
+
+def test_commit_invalidates_changed_user():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.add(User(id=1, name="me"))
+        db.commit()
+
+        identity_cache.set(db.get(User, 1))
+        assert identity_cache.get(1) is not None
+
+        # 缓存里的对象可以直接 merge 回会话，不再查库
+        user = db.merge(identity_cache.get(1), load=False)
+        assert user.name == "me"
+
+        db.get(User, 1).name = "me2"
+        db.commit()
+        assert identity_cache.get(1) is None
@@ -0,0 +1,32 @@
+from datetime import date
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.db import Base
+from app.models import MemoryDay, next_anniversary_of
+
+
+def test_leap_day_anniversary_falls_back_to_feb_28():
+    leap_day = date(2020, 2, 29)
+    assert next_anniversary_of(leap_day, date(2025, 1, 10)) == date(2025, 2, 28)
+    assert next_anniversary_of(leap_day, date(2025, 3, 1)) == date(2026, 2, 28)
+    assert next_anniversary_of(leap_day, date(2027, 3, 1)) == date(2028, 2, 29)
+
+
+def test_next_anniversary_is_stored_on_write():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    today = date.today()
+    with Session(engine) as db:
+        annual = MemoryDay(title="a", date=date(2020, today.month, min(today.day, 28)), owner_id=1)
+        once = MemoryDay(title="b", date=date(2020, 1, 1), is_annual=False, owner_id=1)
+        db.add_all([annual, once])
+        db.commit()
+
+        assert annual.next_anniversary_date == next_anniversary_of(annual.date)
+        assert once.next_anniversary_date is None
+
+        annual.is_annual = False
+        db.commit()
+        assert annual.next_anniversary_date is None
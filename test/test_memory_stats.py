@@ -0,0 +1,31 @@
+from datetime import date, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.db import Base
+from app.models import MemoryDay, MemorySnapshot
+from app.service.memory_service import MemoryService
+
+
+def test_stats_query_groups_by_type_without_join_fanout():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    today = date.today()
+    with Session(engine) as db:
+        love = MemoryDay(title="a", date=today - timedelta(days=365 * 3 - 5), type="love", owner_id=1)
+        trip = MemoryDay(title="b", date=date(2015, 6, 1), type="travel", owner_id=1)
+        other = MemoryDay(title="c", date=date(2010, 1, 1), type="love", owner_id=2)
+        db.add_all([love, trip, other])
+        db.flush()
+        db.add_all([MemorySnapshot(memory_day_id=love.id, year=y, created_by="me") for y in (2023, 2024)])
+        db.add(MemorySnapshot(memory_day_id=other.id, year=2024, created_by="me"))
+        db.commit()
+
+        rows = {row.type: row for row in db.execute(MemoryService.memory_stats_query(1, today))}
+
+    assert set(rows) == {"love", "travel"}
+    assert (rows["love"].memories, rows["love"].snapshots) == (1, 2)
+    assert (rows["travel"].memories, rows["travel"].snapshots) == (1, 0)
+    assert rows["travel"].earliest == date(2015, 6, 1)
+    assert rows["love"].upcoming == 1
@@ -0,0 +1,42 @@
+from datetime import datetime
+
+import pytest
+
+from app.models import Moment
+from app.service.moment_service import encode_moment_cursor, decode_moment_cursor, split_page
+
+
+def test_moment_cursor_roundtrip():
+    moment = Moment(id=9, created_at=datetime(2025, 2, 14, 8, 0, 0, 500))
+    assert decode_moment_cursor(encode_moment_cursor(moment)) == (datetime(2025, 2, 14, 8, 0, 0, 500), 9)
+
+
+def test_split_page_returns_cursor_of_last_row():
+    rows = [Moment(id=i, created_at=datetime(2025, 1, 1)) for i in (5, 4, 3)]
+    page, next_before = split_page(rows, 2)
+
+    assert [m.id for m in page] == [5, 4]
+    assert decode_moment_cursor(next_before) == (datetime(2025, 1, 1), 4)
+    assert split_page(rows, 3) == (rows, None)
+
+
+def test_invalid_moment_cursor():
+    with pytest.raises(ValueError):
+        decode_moment_cursor("bad")
+
+
+def test_list_moments_rejects_bad_cursor(client):
+    resp = client.get("/moments/", params={"before": "bad"})
+    assert resp.status_code == 400
+
+
+def test_moment_view_keeps_datetime_and_variants():
+    from app.service.moment_service import moment_view
+
+    moment = Moment(id=3, user="me", content="hi", image_url="https://x/a.jpg", cloudinary_public_id="love_app/a",
+                    format="jpg", width=1200, height=800, created_at=datetime(2025, 2, 14, 8, 0))
+    view = moment_view(moment, "me")
+
+    assert view["created_at"] == datetime(2025, 2, 14, 8, 0)
+    assert view["is_owner"] is True
+    assert set(view["variants"]) == {"thumb", "medium", "full"}
@@ -0,0 +1,20 @@
+import pytest
+from fastapi import HTTPException
+
+from app.api.ops import check_ops_token
+
+
+def test_ops_token_required(monkeypatch):
+    monkeypatch.delenv("OPS_TOKEN", raising=False)
+    monkeypatch.delenv("OPS_DEV", raising=False)
+    # 没有配置 OPS_TOKEN：默认拒绝，OPS_DEV=1 才放行
+    with pytest.raises(HTTPException):
+        check_ops_token(None)
+    monkeypatch.setenv("OPS_DEV", "1")
+    check_ops_token(None)
+
+    monkeypatch.setenv("OPS_TOKEN", "s3cret")
+    for token in (None, "", "wrong", "s3cre"):
+        with pytest.raises(HTTPException):
+            check_ops_token(token)
+    check_ops_token("s3cret")
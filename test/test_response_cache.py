@@ -0,0 +1,101 @@
+import asyncio
+
+from app.core.cache import LRUCacheBackend, ResponseCache
+
+
+def test_lru_evicts_least_recently_used():
+    backend = LRUCacheBackend(max_entries=2)
+    cache = ResponseCache(backend, ttl=60)
+
+    async def load(value):
+        return value
+
+    async def run():
+        await cache.get_or_load("couple", 1, "a", lambda: load(1))
+        await cache.get_or_load("couple", 1, "b", lambda: load(2))
+        await cache.get_or_load("couple", 1, "a", lambda: load(99))  # 命中，a 变成最近使用
+        await cache.get_or_load("couple", 1, "c", lambda: load(3))   # 淘汰 b
+        return await cache.get_or_load("couple", 1, "b", lambda: load(20))
+
+    assert asyncio.run(run()) == 20
+    assert backend.stats()["hits"] == 1
+
+
+def test_invalidate_only_touches_user_scope():
+    backend = LRUCacheBackend()
+    cache = ResponseCache(backend, ttl=60)
+
+    async def load(value):
+        return value
+
+    async def run():
+        await cache.get_or_load("memory", 1, "stats", lambda: load("u1"))
+        await cache.get_or_load("memory", 2, "stats", lambda: load("u2"))
+        await cache.get_or_load("couple", 1, "stats", lambda: load("c1"))
+        cache.invalidate("memory", 1)
+        return (
+            await cache.get_or_load("memory", 1, "stats", lambda: load("u1-new")),
+            await cache.get_or_load("memory", 2, "stats", lambda: load("u2-new")),
+            await cache.get_or_load("couple", 1, "stats", lambda: load("c1-new")),
+        )
+
+    assert asyncio.run(run()) == ("u1-new", "u2", "c1")
+
+
+def test_commit_through_session_invalidates_user_scope():
+    from datetime import date
+
+    import pytest
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+
+    from app.core.cache import CacheBackend, response_cache
+    from app.db import Base
+    from app.models import CouplePhoto, MemoryDay
+
+    # 少实现方法的后端在实例化时就报错
+    with pytest.raises(TypeError):
+        type("HalfBackend", (CacheBackend,), {"get": lambda self, key: None})()
+
+    async def load(value):
+        return value
+
+    def stats(scope, user_id, value):
+        return asyncio.run(response_cache.get_or_load(scope, user_id, "stats", lambda: load(value)))
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    response_cache.backend.clear()
+    try:
+        assert stats("couple", 1, "old") == "old"
+        assert stats("couple", 2, "other") == "other"
+        assert stats("memory", 1, "old") == "old"
+
+        with Session(engine) as db:
+            photo = CouplePhoto(owner_id=1, image_url="u", cloudinary_public_id="p", taken_date=date(2025, 5, 1))
+            db.add(photo)
+            db.flush()
+            # 还没提交：缓存不动
+            assert stats("couple", 1, "new") == "old"
+            db.commit()
+
+            assert stats("couple", 1, "new") == "new"
+            assert stats("couple", 2, "other-new") == "other"
+            assert stats("memory", 1, "new") == "old"
+
+            # 回滚的改动不失效
+            db.add(MemoryDay(owner_id=1, title="t", date=date(2020, 1, 1)))
+            db.flush()
+            db.rollback()
+            assert stats("memory", 1, "new") == "old"
+
+            db.add(MemoryDay(owner_id=1, title="t", date=date(2020, 1, 1)))
+            db.commit()
+            assert stats("memory", 1, "new") == "new"
+
+            # 批量删除不经过 flush，整个 scope 失效
+            db.query(CouplePhoto).filter(CouplePhoto.owner_id == 1).delete()
+            db.commit()
+            assert stats("couple", 2, "other-new") == "other-new"
+    finally:
+        response_cache.backend.clear()
@@ -0,0 +1,24 @@
+from app.startup_profile import parse_importtime
+
+SAMPLE = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:       640 |       1500 |     jinja2.utils
+import time:      2000 |       3500 | jinja2
+"""
+
+
+def test_parse_importtime():
+    rows = parse_importtime(SAMPLE)
+
+    assert [r["module"] for r in rows] == ["_io", "jinja2.utils", "jinja2"]
+    assert rows[1] == {"module": "jinja2.utils", "self_us": 640, "cumulative_us": 1500, "depth": 2}
+    assert rows[2]["depth"] == 0
+
+
+def test_heavy_sdks_not_imported_at_startup():
+    import subprocess
+    import sys
+
+    code = "import sys, app.main; print(sorted(m for m in ('httpx', 'requests', 'cloudinary') if m in sys.modules))"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert out.strip().splitlines()[-1] == "[]"
@@ -0,0 +1,46 @@
+import gzip
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.static import CachedStaticFiles, IMMUTABLE, REVALIDATE, AssetManifest, build_static
+
+CSS = "body { color: #ff6b6b; }\n" * 200
+
+
+def make_client(tmp_path):
+    (tmp_path / "css").mkdir()
+    (tmp_path / "css" / "app.css").write_text(CSS)
+    (tmp_path / "uploads" / "moments").mkdir(parents=True)
+    (tmp_path / "uploads" / "moments" / "a.jpg").write_bytes(b"\xff\xd8" * 10)
+
+    app = FastAPI()
+    app.mount("/static", CachedStaticFiles(directory=str(tmp_path)))
+    return TestClient(app)
+
+
+def test_cache_headers(tmp_path):
+    client = make_client(tmp_path)
+    fingerprint = AssetManifest(str(tmp_path)).fingerprint("css/app.css")
+
+    assert client.get("/static/uploads/moments/a.jpg").headers["cache-control"] == IMMUTABLE
+    assert client.get("/static/css/app.css").headers["cache-control"] == REVALIDATE
+    assert client.get(f"/static/css/app.css?v={fingerprint}").headers["cache-control"] == IMMUTABLE
+    assert client.get("/static/css/app.css?v=stale").headers["cache-control"] == REVALIDATE
+
+
+def test_serves_precompressed_sibling(tmp_path):
+    client = make_client(tmp_path)
+    result = build_static(str(tmp_path))
+    assert result["assets"] == 1
+    assert (tmp_path / "css" / "app.css.gz").exists()
+
+    with client.stream("GET", "/static/css/app.css", headers={"Accept-Encoding": "gzip"}) as r:
+        body = b"".join(r.iter_raw())
+    assert r.headers["content-encoding"] == "gzip"
+    assert r.headers["content-type"].startswith("text/css")
+    assert gzip.decompress(body).decode() == CSS
+
+    r = client.get("/static/css/app.css", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in r.headers
+    assert r.text == CSS
@@ -0,0 +1,119 @@
+import io
+import os
+
+import pytest
+
+from app.service.storage import (
+    CloudinaryStorage, LocalStorage, LOCAL_PREFIX, StorageBackend, image_srcset, image_variants, storage_for
+)
+
+
+def test_local_storage_roundtrip(tmp_path):
+    storage = LocalStorage(root=str(tmp_path), url_prefix="/static/uploads/media")
+    result = storage.put(io.BytesIO(b"img" * 100), "love_app/moments", "me_1_ab_../x", "png")
+
+    public_id = result["public_id"]
+    assert public_id.startswith(LOCAL_PREFIX + "love_app/moments/")
+    shard1, shard2, name = public_id.split("/")[-3:]
+    assert len(shard1) == len(shard2) == 2 and name == "me_1_ab_.._x"
+
+    path = storage.path(public_id, "png")
+    assert os.path.dirname(path).startswith(str(tmp_path))
+    with open(path, "rb") as f:
+        assert f.read() == b"img" * 100
+    # 临时文件已经改名，不留下 .tmp-*
+    assert os.listdir(os.path.dirname(path)) == [os.path.basename(path)]
+    assert result["bytes"] == 300
+    assert result["url"] == "/static/uploads/media/" + public_id[len(LOCAL_PREFIX):] + ".png"
+    assert storage.variant_url(public_id, "png", 300, 300) == result["url"]
+
+    assert storage.delete(public_id) is True
+    assert not os.path.exists(path)
+    assert storage.delete(public_id) is False
+
+
+def test_local_storage_rejects_traversal(tmp_path):
+    storage = LocalStorage(root=str(tmp_path))
+    with pytest.raises(ValueError):
+        storage.path(LOCAL_PREFIX + "../../etc/passwd", "txt")
+
+
+def test_backend_by_public_id(monkeypatch):
+    monkeypatch.setenv("CLOUDINARY_CLOUD_NAME", "demo")
+    assert isinstance(storage_for("love_app/album/me/x"), CloudinaryStorage)
+    assert isinstance(storage_for(LOCAL_PREFIX + "love_app/album/me/x"), LocalStorage)
+    assert CloudinaryStorage().variant_url("love_app/a", "jpg", 300, 300) == \
+        "https://res.cloudinary.com/demo/image/upload/w_300,h_300,c_fill/love_app/a.jpg"
+
+
+def test_variants_and_srcset(monkeypatch):
+    monkeypatch.setenv("CLOUDINARY_CLOUD_NAME", "demo")
+    variants = CloudinaryStorage().variants("love_app/a", "jpg", 1200, 800)
+    assert variants["thumb"] == {
+        "url": "https://res.cloudinary.com/demo/image/upload/w_320,c_limit/love_app/a.jpg", "width": 320, "height": 213
+    }
+    assert variants["full"]["width"] == 1200
+    assert image_srcset(variants).split(", ")[0].endswith(" 320w")
+    assert image_srcset(variants).split(", ")[-1].endswith("/love_app/a.jpg 1200w")
+
+    # 原图比 medium 还窄：medium 和 full 都是 500w，只留 medium
+    small = CloudinaryStorage().variants("love_app/s", "jpg", 500, 300)
+    assert image_srcset(small) == (
+        "https://res.cloudinary.com/demo/image/upload/w_320,c_limit/love_app/s.jpg 320w, "
+        "https://res.cloudinary.com/demo/image/upload/w_640,c_limit/love_app/s.jpg 500w"
+    )
+    # 比 thumb 还窄：只剩一个宽度，不输出 srcset
+    assert image_srcset(CloudinaryStorage().variants("love_app/t", "jpg", 300, 200)) == ""
+
+    # 本地后端不缩放，只有一个地址，不输出 srcset
+    local = LocalStorage().variants(LOCAL_PREFIX + "x/ab/cd/n", "jpg", 1000, 500)
+    assert image_srcset(local) == ""
+
+    # 老数据没存变体：按 public_id 现算；没有 public_id 只有原图
+    assert image_variants("love_app/a", "jpg", 1200, 800) == variants
+    assert image_variants(None, image_url="/static/uploads/a.jpg") == {
+        "full": {"url": "/static/uploads/a.jpg", "width": None, "height": None}
+    }
+
+
+def test_incomplete_backend_fails_at_instantiation():
+    class PutOnly(StorageBackend):
+        def put(self, file_handle, folder, name, fmt=None):
+            return {}
+
+    with pytest.raises(TypeError):
+        PutOnly()
+
+
+def test_cloudinary_put_streams_in_chunks(monkeypatch):
+    import cloudinary.uploader
+
+    from app.service import storage
+
+    class Handle(io.BytesIO):
+        def __init__(self, data):
+            super().__init__(data)
+            self.reads = []
+
+        def read(self, size=-1):
+            self.reads.append(size)
+            return super().read(size)
+
+    parts = []
+
+    def fake_part(file, http_headers=None, **options):
+        parts.append((len(file[1]), http_headers["Content-Range"], options["public_id"]))
+        return {"public_id": "love_app/couple/me_1", "secure_url": "https://x/me_1.jpg", "format": "jpg"}
+
+    monkeypatch.setattr(storage, "CLOUDINARY_UPLOAD_CHUNK_SIZE", 1000)
+    monkeypatch.setattr(cloudinary.uploader, "upload_large_part", fake_part)
+
+    handle = Handle(b"x" * 2500)
+    result = CloudinaryStorage().put(handle, "love_app/couple", "me_1", "jpg")
+
+    # 每次只读一块，没有整文件的 read()
+    assert -1 not in handle.reads and None not in handle.reads
+    assert [size for size, _, _ in parts] == [1000, 1000, 500]
+    assert parts[0][1] == "bytes 0-999/2500"
+    assert parts[0][2] == "love_app/couple/me_1"
+    assert result["public_id"] == "love_app/couple/me_1"
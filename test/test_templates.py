@@ -0,0 +1,14 @@
+from app.api import album, couple, memory, moment, page
+from app.core.templates import env, preload_templates, templates
+
+
+def test_routers_share_one_template_environment():
+    for module in (album, couple, memory, moment, page):
+        assert module.templates is templates
+    assert templates.env is env
+
+
+def test_preload_compiles_every_template():
+    count = preload_templates()
+    assert count == len(env.list_templates(extensions=["html"]))
+    assert len(env.cache) >= count
@@ -0,0 +1,69 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.core.upload_pool import UploadPool, UploadPoolBusy
+
+
+def test_bounded_queue_and_timeout():
+    pool = UploadPool(max_workers=1, queue_limit=1, timeout=5)
+    release = threading.Event()
+
+    async def scenario():
+        first = asyncio.ensure_future(pool.run(release.wait))
+        second = asyncio.ensure_future(pool.run(lambda: "done"))
+        await asyncio.sleep(0.05)
+        assert pool.stats()["in_flight"] == 1
+        assert pool.stats()["queued"] == 1
+
+        with pytest.raises(UploadPoolBusy):
+            await pool.run(lambda: None)
+        release.set()
+        return await first, await second
+
+    assert asyncio.run(scenario()) == (True, "done")
+    stats = pool.stats()
+    assert (stats["completed"], stats["rejected"], stats["queued"], stats["in_flight"]) == (2, 1, 0, 0)
+    pool.shutdown()
+
+
+def test_upload_timeout_counted():
+    pool = UploadPool(max_workers=1, queue_limit=0, timeout=0.05)
+    release = threading.Event()
+
+    async def scenario():
+        with pytest.raises(asyncio.TimeoutError):
+            await pool.run(release.wait)
+        release.set()
+
+    asyncio.run(scenario())
+    assert pool.stats()["timeouts"] == 1
+    pool.shutdown()
+
+
+def test_late_result_after_timeout_is_handed_to_cleanup():
+    pool = UploadPool(max_workers=1, queue_limit=0, timeout=0.05)
+    release = threading.Event()
+    abandoned = []
+    done = threading.Event()
+
+    def upload():
+        release.wait()
+        return {"public_id": "love_app/late"}
+
+    def cleanup(result):
+        abandoned.append(result)
+        done.set()
+
+    async def scenario():
+        with pytest.raises(asyncio.TimeoutError):
+            await pool.run(upload, on_abandoned=cleanup)
+        release.set()
+        assert await asyncio.to_thread(done.wait, 2)
+        # 没超时的调用不触发清理
+        assert await pool.run(lambda: {"public_id": "love_app/ok"}, on_abandoned=cleanup) == {"public_id": "love_app/ok"}
+
+    asyncio.run(scenario())
+    assert abandoned == [{"public_id": "love_app/late"}]
+    pool.shutdown()
@@ -0,0 +1,54 @@
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+
+from app.core.uploads import UploadSizeLimitMiddleware, UploadTooLarge, spool_upload
+
+LIMIT = 64 * 1024
+
+
+def make_client():
+    app = FastAPI()
+    app.add_middleware(UploadSizeLimitMiddleware, max_bytes=LIMIT)
+
+    @app.post("/spool")
+    async def spool(file: UploadFile = File(...)):
+        try:
+            handle, size = await spool_upload(file, max_bytes=LIMIT // 2)
+        except UploadTooLarge:
+            return {"error": "too large"}
+        return {"size": size, "same_handle": handle is file.file}
+
+    return TestClient(app)
+
+
+def test_rejects_oversized_request_body():
+    client = make_client()
+    r = client.post("/spool", files={"file": ("a.jpg", b"x" * (LIMIT + 1), "image/jpeg")})
+    assert r.status_code == 413
+    assert "error" in r.json()
+
+
+def test_rejects_oversized_chunked_body():
+    client = make_client()
+    boundary = "limit-test"
+
+    def body():
+        # 生成器做请求体：没有 Content-Length，按 Transfer-Encoding: chunked 发
+        yield (f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"a.jpg\"\r\n"
+               f"Content-Type: image/jpeg\r\n\r\n").encode()
+        for _ in range(LIMIT // 4096 + 2):
+            yield b"x" * 4096
+        yield f"\r\n--{boundary}--\r\n".encode()
+
+    r = client.post("/spool", content=body(), headers={"Content-Type": f"multipart/form-data; boundary={boundary}"})
+    assert "content-length" not in r.request.headers
+    assert r.status_code == 413
+    assert "error" in r.json()
+
+
+def test_file_limits():
+    client = make_client()
+    r = client.post("/spool", files={"file": ("a.jpg", b"x" * 1000, "image/jpeg")})
+    assert r.json() == {"size": 1000, "same_handle": False}
+    assert client.post("/spool", files={"file": ("a.jpg", b"x" * (LIMIT // 2 + 1), "image/jpeg")}).json() == {"error": "too large"}
+
@@ -0,0 +1,53 @@
+import asyncio
+
+import httpx
+
+from app.service.weather_service import WeatherProvider, parse_weather
+
+
+def _provider(handler, ttl=600):
+    provider = WeatherProvider(ttl=ttl, refresh_interval=3600, timeout=1)
+    provider._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return provider
+
+
+def test_parse_weather():
+    assert parse_weather({"current_weather": {"temperature": 23.6, "weathercode": 1}}) == {"temp": 23, "text": "多云"}
+    assert parse_weather({}) is None
+
+
+def test_concurrent_misses_share_one_request():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(200, json={"current_weather": {"temperature": 20, "weathercode": 0}})
+
+    async def run():
+        provider = _provider(handler)
+        results = await asyncio.gather(*(provider.get(34.33, 108.71) for _ in range(5)))
+        await provider.stop()
+        return results
+
+    assert asyncio.run(run()) == [{"temp": 20, "text": "晴天"}] * 5
+    assert len(calls) == 1
+
+
+def test_stale_value_served_when_upstream_down():
+    responses = [httpx.Response(200, json={"current_weather": {"temperature": 10, "weathercode": 3}})]
+
+    def handler(request):
+        return responses.pop(0) if responses else httpx.Response(503)
+
+    async def run():
+        provider = _provider(handler, ttl=0)
+        await provider.start()
+        await provider.get()
+        first = provider.peek()
+        # 过期后触发的刷新失败，仍然返回旧值
+        await asyncio.sleep(0.05)
+        second = provider.peek()
+        await provider.stop()
+        return first, second
+
+    assert asyncio.run(run()) == ({"temp": 10, "text": "阴天"}, {"temp": 10, "text": "阴天"})